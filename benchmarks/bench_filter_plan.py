@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the adaptive filter plan (FILTER_PLAN) against the
+sequential stages 1–2.
+
+Runs BASIC_FILTER + GENRE_FILTER with watched titles over a processed
+database — a synthetic one by default (type, source, age rating, score,
+episodes, years, continuations, genres and themes drawn from realistic
+distributions) — both ways:
+
+- sequential: 3_filter_basic.filter_basic, then
+  4_filter_romantic.filter_romantic_anime;
+- plan: 3_filter_basic.filter_basic_plan with
+  4_filter_romantic.genre_checks as extra checks.
+
+Reports the predicate calls of the plan against the same checks run in
+declaration order (the order the sequential filters test an entry in),
+the best time of each path, and whether both return the same anime.
+With --check the exit code is 1 if the plan makes more predicate calls
+than declaration order or returns a different result.
+
+Usage:
+    python benchmarks/bench_filter_plan.py
+    python benchmarks/bench_filter_plan.py --size 100000 --rounds 3
+    python benchmarks/bench_filter_plan.py data/processed/anime_database.json --check
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SRC_DIR = ROOT_DIR / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import json_io  # noqa: E402
+from filter_plan import FilterPlan  # noqa: E402
+
+# (value, weight)
+TYPES = [("TV Сериал", 45), ("Фильм", 20), ("OVA", 15), ("ONA", 10), ("Спецвыпуск", 10)]
+SOURCES = [("Манга", 40), ("Оригинал", 25), ("Ранобэ", 15), ("Визуальная новелла", 5),
+           ("Игра", 5), ("Другое", 10)]
+AGE_RATINGS = [("G", 12), ("PG", 20), ("PG-13", 43), ("R-17", 15), ("R+", 7), ("Rx", 3)]
+GENRES = [("Comedy Комедия", 30), ("Action Экшен", 25), ("Fantasy Фэнтези", 15), ("Drama Драма", 15),
+          ("Romance Романтика", 12), ("Adventure Приключения", 10), ("Sci-Fi Фантастика", 8),
+          ("Slice of Life Повседневность", 8), ("Mystery Тайна", 5), ("Supernatural Сверхъестественное", 7),
+          ("Sports Спорт", 4), ("Horror Ужасы", 3)]
+THEMES = [("School Школа", 20), ("Music Музыка", 5), ("Mecha Меха", 6), ("Isekai Исекай", 4),
+          ("Historical Исторический", 5), ("Military Военное", 4), ("Psychological Психологическое", 4),
+          ("Harem Гарем", 3), ("Gore Жестокость", 3)]
+WATCHED = 300
+
+# The default settings of config.py
+BASIC_FILTER = {
+    "type_of_anime": "TV Сериал",
+    "has_continuations": False,
+    "exclude_rating_g": True,
+    "min_rating": 7.5,
+    "max_episodes": 50,
+    "min_year": 2000,
+}
+GENRE_FILTER = {
+    "excluded_genres": ["Fantasy", "Mystery", "Сверхъестественное", "Sci-Fi Фантастика", "Фэнтези"],
+    "excluded_themes": ["Школа"],
+    "required_genres": ["Романтика"],
+}
+
+
+def _load(name: str, filename: str):
+    spec = importlib.util.spec_from_file_location(name, SRC_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _pick(rng: random.Random, table: List[Tuple[str, int]]) -> str:
+    return rng.choices([value for value, _ in table], weights=[weight for _, weight in table])[0]
+
+
+def _tags(rng: random.Random, table: List[Tuple[str, int]], low: int, high: int) -> List[str]:
+    values = {_pick(rng, table) for _ in range(rng.randint(low, high))}
+    return sorted({token for value in values for token in value.split()})
+
+
+def generate(size: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    """Synthetic processed database in the shape 2_process_raw.py writes."""
+    rng = random.Random(seed)
+    anime: Dict[str, Dict[str, Any]] = {}
+    for n in range(size):
+        kind = _pick(rng, TYPES)
+        year = rng.randint(1975, 2025)
+        episodes = 1 if kind == "Фильм" else rng.choice([1, 2, 6, 12, 12, 13, 24, 26, 50, 52, 100])
+        score = None if rng.random() < 0.1 else round(min(9.3, max(3.0, rng.gauss(6.8, 0.9))), 2)
+        genres = _tags(rng, GENRES, 1, 4)
+        themes = _tags(rng, THEMES, 0, 2)
+        anime[f"Аниме {n} / Anime {n}"] = {
+            "Тип": kind,
+            "Эпизоды": str(episodes),
+            "Статус": f"в {year} г.",
+            "Жанры": " ".join(genres),
+            "Темы": " ".join(themes),
+            "Рейтинг": _pick(rng, AGE_RATINGS),
+            "Первоисточник": _pick(rng, SOURCES),
+            "rating": None if score is None else f"{score:.2f}",
+            "Продолжения": rng.choice([0, 0, 0, 1, 2]),
+            "score": score,
+            "episodes": episodes,
+            "air_year_start": year,
+            "air_year_end": year,
+            "genres": genres,
+            "themes": themes,
+        }
+    return anime
+
+
+def declaration_order_calls(checks, anime_dict: Dict[str, Dict[str, Any]]) -> int:
+    """Predicate calls of the checks run in declaration order, stopping at the first failure."""
+    calls = 0
+    for title, entry in anime_dict.items():
+        for check in checks:
+            calls += 1
+            if not check.predicate(title, entry):
+                break
+    return calls
+
+
+def _best(func: Callable[[], Any], rounds: int) -> Tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(rounds):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark of the adaptive filter plan against the sequential filters.")
+    ap.add_argument("input", nargs="?", type=Path,
+                    help="Processed database (anime_database.json); default: a synthetic one")
+    ap.add_argument("--size", type=int, default=30000, help="Entries of the synthetic database (default: 30000)")
+    ap.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    ap.add_argument("--rounds", type=int, default=5, help="Timing rounds, best is reported (default: 5)")
+    ap.add_argument("--check", action="store_true",
+                    help="Exit with code 1 if the plan makes more predicate calls or differs in result")
+    args = ap.parse_args()
+
+    filter_basic_mod = _load("filter_basic", "3_filter_basic.py")
+    filter_romantic_mod = _load("filter_romantic", "4_filter_romantic.py")
+
+    anime_dict = json_io.load(args.input) if args.input else generate(args.size, args.seed)
+    rng = random.Random(args.seed)
+    watched = rng.sample(list(anime_dict), min(WATCHED, len(anime_dict)))
+
+    def sequential():
+        data = filter_basic_mod.filter_basic(anime_dict, watched_anime=watched, **BASIC_FILTER)
+        return filter_romantic_mod.filter_romantic_anime(data, **GENRE_FILTER)
+
+    def plan():
+        data, _ = filter_basic_mod.filter_basic_plan(
+            anime_dict, watched_anime=watched,
+            extra_checks=filter_romantic_mod.genre_checks(**GENRE_FILTER), **BASIC_FILTER,
+        )
+        return data
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        allowed_types, allowed_sources, has_continuations, min_year, max_year = filter_basic_mod._resolve_options(
+            BASIC_FILTER.get("type_of_anime"), BASIC_FILTER.get("source_material"),
+            BASIC_FILTER.get("has_continuations"), BASIC_FILTER.get("min_year"), BASIC_FILTER.get("max_year"),
+        )
+        checks = filter_basic_mod._basic_checks(
+            allowed_types, allowed_sources, has_continuations, BASIC_FILTER.get("exclude_rating_g", True),
+            BASIC_FILTER.get("min_rating"), BASIC_FILTER.get("min_episodes"), BASIC_FILTER.get("max_episodes"),
+            min_year, max_year, watched,
+        ) + filter_romantic_mod.genre_checks(**GENRE_FILTER)
+        adaptive = FilterPlan(checks)
+        kept = sum(1 for _ in adaptive.run(anime_dict.items()))
+    declared = declaration_order_calls(checks, anime_dict)
+
+    sequential_time, sequential_result = _best(sequential, args.rounds)
+    plan_time, plan_result = _best(plan, args.rounds)
+    same = list(sequential_result) == list(plan_result)
+
+    print("=" * 70)
+    print(f"FILTER PLAN BENCHMARK ({len(anime_dict)} anime, {len(watched)} watched, {kept} kept)")
+    print("=" * 70)
+    print(f"{'':<26} {'predicate calls':>16} {'per anime':>10} {'best time':>12}")
+    print(f"{'declaration order':<26} {declared:>16} {declared / len(anime_dict):>10.2f} "
+          f"{sequential_time * 1000:>9.1f} ms  (filter_basic + filter_romantic_anime)")
+    print(f"{'filter plan':<26} {adaptive.evaluations:>16} {adaptive.evaluations / len(anime_dict):>10.2f} "
+          f"{plan_time * 1000:>9.1f} ms  (filter_basic_plan)")
+    print(f"Final order: {', '.join(check.key for check in adaptive.order)}")
+    print(f"Same result: {same}")
+    print("=" * 70)
+
+    if args.check and (adaptive.evaluations > declared or not same):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the JSON backends of json_io on the processed database.
+
+For the standard json module and orjson (if installed), in the pretty
+(indent=2) and compact layouts, measures the time to serialize and
+write the database, the time to read and parse it back, and the file
+size. Also checks that both backends write identical files.
+
+Usage:
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py data/processed/anime_database.json --rounds 5
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import json_io  # noqa: E402
+
+DEFAULT_INPUT = Path(__file__).resolve().parent.parent / "data/processed/anime_database.json"
+
+
+def _stdlib_dumps(data: Any, pretty: bool) -> bytes:
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _backends() -> Dict[str, Dict[str, Callable]]:
+    backends = {"json": {"dumps": _stdlib_dumps, "loads": json.loads}}
+    if json_io.orjson is not None:
+        # json_io.dumps / loads use orjson when it is installed
+        backends["orjson"] = {"dumps": json_io.dumps, "loads": json_io.loads}
+    return backends
+
+
+def _best(func: Callable[[], Any], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark of the JSON backends on the processed database.")
+    ap.add_argument("input", nargs="?", type=Path, default=DEFAULT_INPUT,
+                    help=f"Processed database (default: {DEFAULT_INPUT})")
+    ap.add_argument("--rounds", type=int, default=3, help="Timing rounds, best is reported (default: 3)")
+    args = ap.parse_args()
+
+    if not args.input.exists():
+        print(f"File not found: {args.input}")
+        print("Run first: python src/2_process_raw.py")
+        sys.exit(1)
+
+    data = json_io.load(args.input)
+    backends = _backends()
+    print(f"Database: {args.input} ({len(data)} anime)")
+    if "orjson" not in backends:
+        print("orjson is not installed — only the json backend is measured")
+
+    print("\n" + "=" * 70)
+    print("JSON BACKENDS")
+    print("=" * 70)
+    print(f"{'backend':<8} {'layout':<8} {'write, s':>9} {'read, s':>9} {'size, MB':>9}")
+    outputs: Dict[tuple, bytes] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "database.json"
+        for name, backend in backends.items():
+            for pretty in (True, False):
+                def write():
+                    with open(path, "wb") as f:
+                        f.write(backend["dumps"](data, pretty))
+
+                def read():
+                    with open(path, "rb") as f:
+                        return backend["loads"](f.read())
+
+                write_seconds = _best(write, args.rounds)
+                read_seconds = _best(read, args.rounds)
+                outputs[name, pretty] = path.read_bytes()
+                print(f"{name:<8} {'pretty' if pretty else 'compact':<8} {write_seconds:>9.3f} "
+                      f"{read_seconds:>9.3f} {len(outputs[name, pretty]) / 1e6:>9.1f}")
+    print("=" * 70)
+
+    if "orjson" in backends:
+        same = all(outputs["json", pretty] == outputs["orjson", pretty] for pretty in (True, False))
+        print(f"Identical files from both backends: {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
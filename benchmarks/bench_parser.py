@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline benchmark and regression suite for shikimori_parser.
+
+Runs without network access against saved pages:
+- golden check: every page of the checked-in corpus (benchmarks/corpus)
+  must parse to exactly the output stored in corpus/golden.json,
+  with every extraction backend;
+- backend check: on any other pages (e.g. the crawler's HTML cache) each
+  backend must match the reference "bs4" backend;
+- throughput of clean_text, each extract_* function and end-to-end
+  parse_html per backend, plus peak memory per parsed page.
+
+Usage:
+    # Golden check + benchmark on the checked-in corpus
+    python benchmarks/bench_parser.py
+
+    # Golden check only (exit code 1 on regressions)
+    python benchmarks/bench_parser.py --check
+
+    # Accept the current output as the new golden output
+    python benchmarks/bench_parser.py --update-golden
+
+    # Benchmark on other saved pages (*.html or *.html.gz), e.g. the HTML cache
+    python benchmarks/bench_parser.py data/raw/html_cache/blobs --rounds 5
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from shikimori_parser import (  # noqa: E402
+    BACKENDS,
+    clean_text,
+    extract_description,
+    extract_info_block,
+    extract_rating,
+    extract_title,
+    parse_html,
+)
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+GOLDEN_FILE = CORPUS_DIR / "golden.json"
+REFERENCE_BACKEND = "bs4"
+
+
+def load_pages(paths: List[Path]) -> List[Tuple[str, str]]:
+    """Read (name, html) pairs from files and directories of *.html / *.html.gz."""
+    files: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.html")) + sorted(path.rglob("*.html.gz")))
+        elif path.exists():
+            files.append(path)
+
+    pages = []
+    for file in files:
+        if file.suffix == ".gz":
+            with gzip.open(file, "rt", encoding="utf-8") as f:
+                pages.append((file.name, f.read()))
+        else:
+            pages.append((file.name, file.read_text(encoding="utf-8")))
+    return pages
+
+
+def load_golden() -> Dict[str, Any]:
+    if not GOLDEN_FILE.exists():
+        return {}
+    with open(GOLDEN_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_golden(pages: List[Tuple[str, str]]) -> None:
+    golden = {name: parse_html(html, name, REFERENCE_BACKEND) for name, html in pages}
+    with open(GOLDEN_FILE, "w", encoding="utf-8") as f:
+        json.dump(golden, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"Golden output for {len(golden)} pages saved to {GOLDEN_FILE}")
+
+
+def _report_mismatch(label: str, name: str, expected: Any, actual: Any) -> None:
+    print(f"✗ {label}: {name}")
+    print(f"  expected: {expected}")
+    print(f"  actual:   {actual}")
+
+
+def check_golden(pages: List[Tuple[str, str]], golden: Dict[str, Any]) -> int:
+    """Compare every backend with the golden output; return the number of failures."""
+    failures = 0
+    for name, html in pages:
+        if name not in golden:
+            print(f"✗ no golden output for {name} (run with --update-golden)")
+            failures += 1
+            continue
+        for backend in BACKENDS:
+            actual = parse_html(html, name, backend)
+            if actual != golden[name]:
+                _report_mismatch(f"{backend} differs from golden output", name, golden[name], actual)
+                failures += 1
+    return failures
+
+
+def check_backends(pages: List[Tuple[str, str]]) -> int:
+    """Compare every backend with the reference; return the number of mismatches."""
+    mismatches = 0
+    for name, html in pages:
+        expected = parse_html(html, name, REFERENCE_BACKEND)
+        for backend in BACKENDS:
+            if backend == REFERENCE_BACKEND:
+                continue
+            actual = parse_html(html, name, backend)
+            if actual != expected:
+                _report_mismatch(f"{backend} differs from {REFERENCE_BACKEND}", name, expected, actual)
+                mismatches += 1
+    return mismatches
+
+
+def _best_time(func: Callable[[], Any], rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_functions(pages: List[Tuple[str, str]], rounds: int) -> List[Tuple[str, int, float]]:
+    """(function, calls per round, best seconds per round) for the bs4 building blocks."""
+    htmls = [html for _, html in pages]
+    soups = [BeautifulSoup(html, "lxml") for html in htmls]
+    texts = [node.get_text(" ", strip=True) for soup in soups for node in soup.select("div.line, .value")]
+
+    cases = [
+        ("BeautifulSoup(html)", len(htmls), lambda: [BeautifulSoup(h, "lxml") for h in htmls]),
+        ("clean_text", len(texts), lambda: [clean_text(t) for t in texts]),
+        ("extract_title", len(soups), lambda: [extract_title(s) for s in soups]),
+        ("extract_info_block", len(soups), lambda: [extract_info_block(s) for s in soups]),
+        ("extract_rating", len(soups), lambda: [extract_rating(s) for s in soups]),
+        ("extract_description", len(soups), lambda: [extract_description(s) for s in soups]),
+    ]
+    return [(name, calls, _best_time(func, rounds)) for name, calls, func in cases]
+
+
+def bench_end_to_end(pages: List[Tuple[str, str]], rounds: int) -> Dict[str, float]:
+    """Best seconds per round of parse_html over all pages, per backend."""
+    return {
+        backend: _best_time(lambda b=backend: [parse_html(h, n, b) for n, h in pages], rounds)
+        for backend in BACKENDS
+    }
+
+
+def bench_memory(pages: List[Tuple[str, str]]) -> Dict[str, Tuple[float, float]]:
+    """(mean, max) peak traced memory in KiB while parsing one page, per backend."""
+    result = {}
+    for backend in BACKENDS:
+        peaks = []
+        for name, html in pages:
+            tracemalloc.start()
+            parse_html(html, name, backend)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+        result[backend] = (sum(peaks) / len(peaks), max(peaks))
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline benchmark and regression suite for shikimori_parser.")
+    ap.add_argument("paths", nargs="*", type=Path,
+                    help="Page files or directories to benchmark instead of the corpus "
+                         "(checked against the bs4 backend, not the golden output)")
+    ap.add_argument("--check", action="store_true",
+                    help="Only run the golden / backend checks")
+    ap.add_argument("--update-golden", action="store_true",
+                    help="Save the current bs4 output of the corpus as golden output")
+    ap.add_argument("--rounds", type=int, default=5,
+                    help="Timing rounds, best is reported (default: 5)")
+    args = ap.parse_args()
+
+    use_corpus = not args.paths
+    pages = load_pages([CORPUS_DIR] if use_corpus else args.paths)
+    if not pages:
+        print(f"No pages found in: {', '.join(map(str, args.paths or [CORPUS_DIR]))}")
+        sys.exit(1)
+
+    if args.update_golden:
+        if not use_corpus:
+            ap.error("--update-golden works on the checked-in corpus only")
+        update_golden(pages)
+        return
+
+    print("=" * 70)
+    print(f"PARSER REGRESSION CHECK: {len(pages)} pages")
+    print("=" * 70)
+    if use_corpus:
+        failures = check_golden(pages, load_golden())
+        print(f"Golden output ({', '.join(BACKENDS)}): "
+              f"{'OK' if not failures else f'{failures} failures'}")
+    else:
+        failures = check_backends(pages)
+        print(f"Output identical to {REFERENCE_BACKEND}: "
+              f"{'yes' if not failures else f'no ({failures} mismatches)'}")
+
+    if not args.check:
+        print("\n" + "=" * 70)
+        print(f"THROUGHPUT (best of {args.rounds} rounds)")
+        print("=" * 70)
+        for name, calls, seconds in bench_functions(pages, args.rounds):
+            print(f"{name:<22} {calls / seconds:12.1f} calls/sec   {seconds / calls * 1e6:10.1f} µs/call")
+        print("-" * 70)
+        end_to_end = bench_end_to_end(pages, args.rounds)
+        reference = end_to_end[REFERENCE_BACKEND]
+        for backend, seconds in end_to_end.items():
+            print(f"parse_html [{backend}]{'':<{9 - len(backend)}} {len(pages) / seconds:12.1f} pages/sec   "
+                  f"x{reference / seconds:.2f}")
+        print("-" * 70)
+        for backend, (mean, peak) in bench_memory(pages).items():
+            print(f"peak memory [{backend}]{'':<{8 - len(backend)}} {mean:10.1f} KiB/page avg   {peak:10.1f} KiB max")
+    print("=" * 70)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
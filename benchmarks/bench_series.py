@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the series grouping of 2_process_raw.py on synthetic data.
+
+Generates a raw database of N titles (default 500 000) belonging to known
+series: seasons ("2", "II", "Season 2"), subtitles after ":", English
+spelling variants ("ou" / "o"), and part of the series under a
+transliterated Russian name instead of a translated one. Then it times
+exact grouping and fuzzy grouping (--fuzzy-series) at N/4, N/2 and N
+titles — µs per title should stay roughly flat — and reports how well
+each mode recovers the true series.
+
+Usage:
+    python benchmarks/bench_series.py
+    python benchmarks/bench_series.py --size 100000 --seed 7
+"""
+
+import argparse
+import importlib.util
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+# (romaji, Russian spelling) syllables for Japanese-like series names
+SYLLABLES = [
+    ("ka", "ка"), ("ki", "ки"), ("ku", "ку"), ("ko", "ко"), ("sa", "са"), ("shi", "си"),
+    ("su", "су"), ("so", "со"), ("ta", "та"), ("chi", "ти"), ("tsu", "цу"), ("to", "то"),
+    ("na", "на"), ("ni", "ни"), ("no", "но"), ("ha", "ха"), ("hi", "хи"), ("mo", "мо"),
+    ("ma", "ма"), ("mi", "ми"), ("ra", "ра"), ("ri", "ри"), ("ru", "ру"), ("yo", "ё"),
+    ("yu", "ю"), ("ga", "га"), ("ji", "дзи"), ("ba", "ба"), ("da", "да"), ("ko", "ко"),
+]
+RUSSIAN_WORDS = ["Тетрадь", "Сад", "Ветер", "Море", "Клинок", "Город", "Звезда", "Песня",
+                 "Тень", "Небо", "Врата", "Дорога", "Сердце", "Легенда", "Охотник", "Маг"]
+STATUSES = ["вышло {year} г.", "с 3 апр. {year} г. по 19 июня {year} г.", "в {year}-{next} гг."]
+
+
+def _load_process_raw():
+    spec = importlib.util.spec_from_file_location("process_raw", SRC_DIR / "2_process_raw.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _word(rng: random.Random) -> Tuple[str, str]:
+    parts = [rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))]
+    return "".join(p[0] for p in parts), "".join(p[1] for p in parts)
+
+
+def generate(size: int, seed: int) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """Synthetic raw database and the true series id of every title."""
+    rng = random.Random(seed)
+    anime: Dict[str, Any] = {}
+    series_of: Dict[str, int] = {}
+    series_id = 0
+    while len(anime) < size:
+        series_id += 1
+        words = [_word(rng) for _ in range(rng.randint(2, 3))]
+        english = " ".join(w[0] for w in words).title()
+        if rng.random() < 0.3:
+            russian = " ".join(w[1] for w in words).capitalize()
+        else:
+            # A translated name: unrelated to the English one
+            russian = f"{rng.choice(RUSSIAN_WORDS)} {_word(rng)[1]} {_word(rng)[1]}"
+        year = rng.randint(1980, 2023)
+        for season in range(1, rng.choice([1, 1, 1, 2, 3, 5]) + 1):
+            ru = russian if season == 1 else rng.choice([f"{russian} {season}", f"{russian}: Часть {season}"])
+            en = english if season == 1 else rng.choice(
+                [f"{english} {season}", f"{english} Season {season}", f"{english} II", f"{english}: Movie"])
+            if rng.random() < 0.1:
+                en = en.replace("o", "ou", 1)  # spelling variant
+            if rng.random() < 0.1 and season > 1:
+                # Later season listed under the transliterated name only
+                ru = " ".join(w[1] for w in words).capitalize() + f" {season}"
+            title = f"{ru} / {en}"
+            if title in anime:
+                continue
+            status = rng.choice(STATUSES).format(year=year + season, next=year + season + 1)
+            anime[title] = {
+                "description": "x",
+                "info": {"Тип: TV Сериал": "", f"Статус: {status}": ""},
+            }
+            series_of[title] = series_id
+            if len(anime) >= size:
+                break
+    return anime, series_of
+
+
+def quality(groups: List[List[str]], series_of: Dict[str, int]) -> Tuple[int, int]:
+    """(true series split over several groups, groups mixing several series)."""
+    groups_per_series: Dict[int, int] = {}
+    mixed = 0
+    for names in groups:
+        ids = {series_of[name] for name in names}
+        mixed += len(ids) > 1
+        for series in ids:
+            groups_per_series[series] = groups_per_series.get(series, 0) + 1
+    split = sum(1 for count in groups_per_series.values() if count > 1)
+    return split, mixed
+
+
+def _groups(keep_names, continuations_map) -> List[List[str]]:
+    return [[name, *continuations_map.get(name, [])] for name in keep_names]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark of exact and fuzzy series grouping.")
+    ap.add_argument("--size", type=int, default=500_000, help="Number of titles (default: 500000)")
+    ap.add_argument("--seed", type=int, default=1, help="Random seed (default: 1)")
+    args = ap.parse_args()
+
+    process_raw = _load_process_raw()
+    print(f"Generating {args.size} titles...")
+    anime, series_of = generate(args.size, args.seed)
+    titles = list(anime)
+    print(f"True series: {len(set(series_of.values()))}")
+
+    print("\n" + "=" * 70)
+    print("SERIES GROUPING")
+    print("=" * 70)
+    print(f"{'mode':<7} {'titles':>8} {'seconds':>9} {'µs/title':>9} {'originals':>10} {'split':>7} {'mixed':>7}")
+    for fuzzy in (False, True):
+        for size in (args.size // 4, args.size // 2, args.size):
+            subset = {title: anime[title] for title in titles[:size]}
+            start = time.perf_counter()
+            keep_names, _, continuations_map = process_raw._resolve_series(subset, fuzzy=fuzzy)
+            seconds = time.perf_counter() - start
+            split, mixed = quality(_groups(keep_names, continuations_map), series_of)
+            print(f"{'fuzzy' if fuzzy else 'exact':<7} {size:>8} {seconds:>9.2f} {seconds / size * 1e6:>9.1f} "
+                  f"{len(keep_names):>10} {split:>7} {mixed:>7}")
+    print("=" * 70)
+    print("split — true series spread over several groups; mixed — groups joining different series")
+
+
+if __name__ == "__main__":
+    main()
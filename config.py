@@ -9,7 +9,27 @@ Pipeline settings: paths, filters, and AI analysis parameters.
 
 # Data paths
 PROCESSED_FILE = "data/processed/anime_database.json"
+# SQLite store written by `python src/2_process_raw.py --sqlite <file>`.
+# When set and present, stages 1–2 run as one indexed SQL query and only
+# the surviving anime are loaded. None — filter PROCESSED_FILE in Python.
+ANIME_STORE_FILE = None  # e.g. "data/processed/anime_database.sqlite"
+# Columnar NumPy snapshot written by `python src/2_process_raw.py --columns <dir>`.
+# When set and present (and ANIME_STORE_FILE is not used), stage 1 runs as
+# vectorized masks over it instead of a loop over PROCESSED_FILE.
+ANIME_COLUMNS_DIR = None  # e.g. "data/processed/anime_columns"
+# Split database written by `python src/2_process_raw.py --descriptions <dir>`.
+# When set and present (and ANIME_STORE_FILE is not used), only the small
+# metadata part is loaded for filtering; descriptions are read from disk
+# only for the anime that reach the AI stage or the final result.
+ANIME_DESCRIPTIONS_DIR = None  # e.g. "data/processed/anime_descriptions"
 OUTPUT_FILE = "data/results/final_anime.json"
+# True — run stages 1–2 as one adaptive filter plan (src/filter_plan.py)
+# when neither ANIME_STORE_FILE nor ANIME_COLUMNS_DIR is used: all criteria
+# in one pass, with the checks that are cheap and reject many anime run
+# first (same result; exclusions are counted for the first check that
+# failed in the plan's order). Pays off on large databases, see
+# benchmarks/bench_filter_plan.py. False — the sequential filters.
+FILTER_PLAN = False
 
 # Already watched anime — excluded at stage 1.
 # Keys in anime_database.json look like "Russian title / English title".
@@ -17,6 +37,11 @@ OUTPUT_FILE = "data/results/final_anime.json"
 WATCHED_ANIME = [
     "Твоя апрельская ложь",
 ]
+# Also exclude the titles of a shikimori list export (Profile → List →
+# Export, JSON or XML, optionally .gz) — added to WATCHED_ANIME.
+WATCHED_LIST_FILE = None  # e.g. "data/watched/shikimori_list.json"
+# Statuses of the export that count as watched (everything but "planned")
+WATCHED_LIST_STATUSES = ["completed", "watching", "rewatching", "on_hold", "dropped"]
 
 # --- Stage 1: basic filtering (3_filter_basic.py) ---
 BASIC_FILTER = {
@@ -44,6 +69,12 @@ Genre_FILTER = {
     "excluded_themes": ["Школа"],
     "required_genres": ["Романтика"],
     "required_themes": [],
+    # None — no query; str — boolean expression over genres and themes,
+    # applied after the lists above (which can then be left empty), e.g.
+    # "(Романтика AND Драма) OR (Романтика AND NOT Школа)".
+    # Operators AND / OR / NOT in capitals, parentheses; genre: / theme:
+    # restrict a value to genres or themes (see src/tag_query.py).
+    "query": None,
 }
 
 # --- Stage 3: AI analysis (5_analyze_with_ai.py) ---
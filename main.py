@@ -8,17 +8,27 @@ only the final result is saved.
 """
 
 import importlib.util
-import json
 import os
 import sys
 from pathlib import Path
 
 from dotenv import load_dotenv
 
-from config import (
+# Stage modules import their helper modules (anime_store, ...) from src/
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
+
+import json_io  # noqa: E402
+from anime_store import AnimeStore  # noqa: E402
+from description_store import DescriptionStore  # noqa: E402
+from watched_list import load_watched_list  # noqa: E402
+from config import (  # noqa: E402
     AI_CACHE_FILE,
+    ANIME_COLUMNS_DIR,
+    ANIME_DESCRIPTIONS_DIR,
+    ANIME_STORE_FILE,
     ASK_BEFORE_AI,
     BASIC_FILTER,
+    FILTER_PLAN,
     FINAL_FILTER,
     Genre_FILTER,
     OUTPUT_FILE,
@@ -26,6 +36,8 @@ from config import (
     PROMPTS_DIR,
     RUN_AI_ANALYSIS,
     WATCHED_ANIME,
+    WATCHED_LIST_FILE,
+    WATCHED_LIST_STATUSES,
 )
 
 
@@ -71,27 +83,88 @@ def _should_run_ai_analysis(anime_count: int) -> bool:
     return True
 
 
+def _watched_anime(project_root: Path) -> list:
+    watched_anime = list(WATCHED_ANIME or [])
+    if WATCHED_LIST_FILE:
+        path = project_root / WATCHED_LIST_FILE
+        if path.exists():
+            titles = load_watched_list(path, WATCHED_LIST_STATUSES)
+            print(f"Watched list: {len(titles)} anime from {WATCHED_LIST_FILE}")
+            watched_anime.extend(titles)
+        else:
+            print(f"Watched list {WATCHED_LIST_FILE} not found — only WATCHED_ANIME is excluded.")
+    return watched_anime
+
+
 def main():
     project_root = Path(__file__).resolve().parent
     output_path = project_root / OUTPUT_FILE
 
     load_dotenv(project_root / ".env")
+    watched_anime = _watched_anime(project_root)
 
     filter_basic_mod = _load_module("filter_basic", "3_filter_basic.py")
     filter_romantic_mod = _load_module("filter_romantic", "4_filter_romantic.py")
     analyze_ai_mod = _load_module("analyze_ai", "5_analyze_with_ai.py")
     final_filter_mod = _load_module("final_filter", "6_final_filter.py")
 
-    print("Loading processed database...")
-    with open(PROCESSED_FILE, "r", encoding="utf-8") as f:
-        anime_dict = json.load(f)
-    print(f"Total anime: {len(anime_dict)}\n")
-
-    # Stage 1
-    data = filter_basic_mod.filter_basic(anime_dict, watched_anime=WATCHED_ANIME, **BASIC_FILTER)
-
-    # Stage 2
-    data = filter_romantic_mod.filter_romantic_anime(data, **Genre_FILTER)
+    descriptions = None
+    if ANIME_STORE_FILE and (project_root / ANIME_STORE_FILE).exists():
+        # Stages 1–2 as a single SQL query; only the survivors are loaded
+        print(f"Filtering SQLite store {ANIME_STORE_FILE}...")
+        store = AnimeStore(project_root / ANIME_STORE_FILE)
+        try:
+            data, genre_stats = filter_basic_mod.filter_basic_store(
+                store,
+                watched_anime=watched_anime,
+                extra_conditions=filter_romantic_mod.genre_conditions(store, **Genre_FILTER),
+                **BASIC_FILTER,
+            )
+        finally:
+            store.close()
+        filter_romantic_mod.print_statistics(genre_stats, len(data), **Genre_FILTER)
+    else:
+        if ANIME_DESCRIPTIONS_DIR and (project_root / ANIME_DESCRIPTIONS_DIR).exists():
+            # Filter the metadata only; descriptions are read for the survivors
+            print(f"Loading processed database metadata from {ANIME_DESCRIPTIONS_DIR}...")
+            descriptions = DescriptionStore(project_root / ANIME_DESCRIPTIONS_DIR)
+            anime_dict = descriptions.load_metadata()
+        else:
+            print("Loading processed database...")
+            anime_dict = json_io.load(PROCESSED_FILE)
+        print(f"Total anime: {len(anime_dict)}\n")
+
+        # Stage 1
+        snapshot = None
+        if ANIME_COLUMNS_DIR and (project_root / ANIME_COLUMNS_DIR).exists():
+            from anime_columns import ColumnSnapshot  # NumPy is only needed here
+
+            snapshot = ColumnSnapshot(project_root / ANIME_COLUMNS_DIR)
+            if not snapshot.matches(anime_dict):
+                print(f"Column snapshot {ANIME_COLUMNS_DIR} is out of date — rebuild it with "
+                      f"2_process_raw.py --columns. Filtering without it.\n")
+                snapshot = None
+        if FILTER_PLAN and snapshot is None:
+            # Stages 1–2 in one pass
+            data, genre_stats = filter_basic_mod.filter_basic_plan(
+                anime_dict,
+                watched_anime=watched_anime,
+                extra_checks=filter_romantic_mod.genre_checks(**Genre_FILTER),
+                **BASIC_FILTER,
+            )
+            filter_romantic_mod.print_statistics(genre_stats, len(data), **Genre_FILTER)
+        else:
+            if snapshot is not None:
+                data = filter_basic_mod.filter_basic_columns(
+                    anime_dict, snapshot, watched_anime=watched_anime, **BASIC_FILTER
+                )
+            else:
+                data = filter_basic_mod.filter_basic(anime_dict, watched_anime=watched_anime, **BASIC_FILTER)
+
+            # Stage 2
+            data = filter_romantic_mod.filter_romantic_anime(data, **Genre_FILTER)
+        if descriptions is not None:
+            data = descriptions.attach(data)
 
     ai_fields = analyze_ai_mod.fields_from_final_filter(FINAL_FILTER)
 
@@ -109,8 +182,7 @@ def main():
             cache_file=AI_CACHE_FILE,
             prompts_dir=project_root / PROMPTS_DIR,
         )
-        with open("data/processed/filtered_with_ai.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        json_io.dump(dict(data), "data/processed/filtered_with_ai.json")
         print("\nResult saved to data/processed/filtered_with_ai.json")
 
         data = final_filter_mod.filter_anime(data, **FINAL_FILTER)
@@ -119,9 +191,10 @@ def main():
     else:
         print("\nStages 3–4 skipped. Saving result after genre filtering.")
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # dict() hydrates any descriptions not read yet
+    json_io.dump(dict(data), output_path)
+    if descriptions is not None:
+        descriptions.close()
 
     print(f"\nDone! Final result ({len(data)} anime) saved to {output_path}")
 
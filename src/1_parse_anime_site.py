@@ -15,24 +15,70 @@ Usage:
     # Then run the ETL pipeline
     python 1_parse_anime_site.py -i anime_urls.json -o anime_database.json
 
+    # Or crawl the catalog and the anime pages in one run, no URL file;
+    # each anime page is fetched as soon as its catalog page is in
+    python 1_parse_anime_site.py --from-catalog --max-pages 5 -o anime_database.json
+
     # With a limit for testing
     python 1_parse_anime_site.py -i anime_urls.json -o anime_database.json --limit 10
+
+    # Keep downloaded pages in an HTML cache; a re-crawl then only
+    # downloads pages that changed (conditional GET, 304 Not Modified)
+    python 1_parse_anime_site.py -i anime_urls.json -o anime_database.json --html-cache html_cache
+
+    # Rebuild the database from the cache alone, e.g. after changing
+    # extract_info_block (no network; -i limits it to the listed URLs)
+    python 1_parse_anime_site.py -o anime_database.json --html-cache html_cache --offline
+
+    # Staged mode: fetch threads, a process pool for parsing, one writer
+    python 1_parse_anime_site.py -i anime_urls.json -o anime_database.json --pipeline --fetch-workers 8 --rps 3
+
+    # Nightly refresh: fetch only new URLs, URLs from anime_database_errors.json
+    # and entries older than 30 days; merge them into anime_database.json in place
+    python 1_parse_anime_site.py -i anime_urls.json -o anime_database.json --incremental --max-age-days 30
+
+    # Skip HTML entirely: take the same fields from the GraphQL API,
+    # 50 anime per request (--api-url points it at another endpoint)
+    python 1_parse_anime_site.py -i anime_urls.json -o anime_database.json --source api
+
+    # After a crash or Ctrl+C just run the same command again: every parsed
+    # page is already in anime_database_journal.jsonl and is not fetched twice
+
+    # Concurrent mode: 8 pages at a time in threads, 3 requests per second overall
+    python 1_parse_anime_site.py -i anime_urls.json -o anime_database.json --concurrency 8 --rps 3
+
+    # The request rate adapts to the server (AIMD): it grows while responses
+    # are fast and successful and is halved on 429/503, timeouts or rising
+    # latency, always staying within --min-rps..--max-rps.
+    # --fixed-rate keeps it at --rps instead.
+    python 1_parse_anime_site.py -i anime_urls.json -o anime_database.json --rps 1 --min-rps 0.2 --max-rps 5
 """
 
 import argparse
-import json
+import os
 import sys
 import time
-from typing import List, Dict, Any
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from itertools import islice
+from typing import Callable, List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
 from pathlib import Path
 
-from shikimori_parser import parse
+import json_io
+from rate_limiter import AdaptiveRateLimiter, make_rate_limiter
+from etl_pipeline import run_staged
+from fetch_anime_list import CATALOG_URL, iter_catalog
+from html_cache import HtmlCache
+from shikimori_api import API_URL, MAX_BATCH, iter_api_records
+from shikimori_parser import BACKENDS, DEFAULT_BACKEND, HttpFetcher, parse, parse_offline
 import requests
 
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
 def load_anime_urls(input_file: str) -> List[Dict[str, str]]:
     """Load anime URL list from a JSON file."""
-    with open(input_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = json_io.load(input_file)
 
     # Support different input formats
     if isinstance(data, dict) and "anime" in data:
@@ -43,120 +89,484 @@ def load_anime_urls(input_file: str) -> List[Dict[str, str]]:
         raise ValueError("Unsupported input file format")
 
 
-def save_checkpoint(output_file: str, database: Dict[str, Any], processed_count: int):
-    """Save intermediate result (checkpoint)."""
-    checkpoint_file = output_file.replace(".json", f"_checkpoint_{processed_count}.json")
-    with open(checkpoint_file, "w", encoding="utf-8") as f:
-        json.dump(database, f, ensure_ascii=False, indent=2)
-    return checkpoint_file
+def journal_path(output_file: str) -> str:
+    """Path of the append-only JSONL journal for the given database file."""
+    return output_file.replace(".json", "_journal.jsonl")
+
+
+def open_journal(journal_file: str):
+    """
+    Open the journal for appending. A torn last line left by a crash is
+    terminated first, so new records never get glued onto it.
+    """
+    journal = open(journal_file, "ab+")
+    if journal.tell() > 0:
+        journal.seek(journal.tell() - 1)
+        if journal.read(1) != b"\n":
+            journal.write(b"\n")
+    return journal
+
+
+def append_journal(journal, anime_info: Dict[str, str], anime_data: Dict[str, Any]):
+    """
+    Append one parsed page to the open journal as a single JSON line.
+    Entries are stamped with "fetched_at" for incremental re-crawls.
+    """
+    fetched_at = time.strftime(TIMESTAMP_FORMAT)
+    anime_data = {title: {**entry, "fetched_at": fetched_at} for title, entry in anime_data.items()}
+    record = {"url": anime_info.get("url"), "id": anime_info.get("id"), "anime": anime_data}
+    journal.write(json_io.dumps_line(record))
+    journal.flush()
+
+
+def _iter_journal(journal_file: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yield journal records in write order. A torn last line (crash in the
+    middle of a write) is skipped — that page is simply fetched again.
+    """
+    if not Path(journal_file).exists():
+        return
+    with open(journal_file, "rb") as f:
+        for line in f:
+            try:
+                yield json_io.loads(line)
+            except ValueError:  # json.JSONDecodeError / orjson.JSONDecodeError
+                continue
+
+
+def replay_journal(journal_file: str) -> Tuple[Dict[str, Any], Set[str]]:
+    """
+    Rebuild the database from a journal.
+
+    Returns:
+        (database, URLs already parsed).
+    """
+    database: Dict[str, Any] = {}
+    done_urls: Set[str] = set()
+    for record in _iter_journal(journal_file):
+        database.update(record["anime"])
+        done_urls.add(record["url"])
+    return database, done_urls
+
+
+def compact_journal(
+    journal_file: str,
+    output_file: str,
+    metadata: Dict[str, Any],
+    base: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Write the final {"metadata", "anime"} database from the journal
+    and remove the journal.
+
+    With `base` (incremental mode) journal records are merged into that
+    database: an entry with the same URL is replaced even if its title
+    changed on the site.
+    """
+    database: Dict[str, Any] = dict(base or {})
+    titles_by_url: Dict[str, List[str]] = {}
+    for title, entry in database.items():
+        titles_by_url.setdefault(entry.get("url"), []).append(title)
+
+    for record in _iter_journal(journal_file):
+        for title in titles_by_url.pop(record["url"], []):
+            database.pop(title, None)
+        database.update(record["anime"])
+
+    final_data = {
+        "metadata": {"total_anime": len(database), **metadata},
+        "anime": database
+    }
+
+    # Internal artifact: compact, written atomically
+    json_io.dump(final_data, output_file, pretty=False)
+    if Path(journal_file).exists():
+        os.remove(journal_file)
+    return database
+
+
+def load_database(output_file: str) -> Dict[str, Any]:
+    """Existing {"metadata", "anime"} database, or an empty one."""
+    if not Path(output_file).exists():
+        return {"metadata": {}, "anime": {}}
+    data = json_io.load(output_file)
+    if "anime" not in data:
+        data = {"metadata": {}, "anime": data}
+    return data
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[float]:
+    try:
+        return time.mktime(time.strptime(value, TIMESTAMP_FORMAT))
+    except (TypeError, ValueError):
+        return None
+
+
+def select_incremental(
+    anime_urls: Iterable[Dict[str, str]],
+    data: Dict[str, Any],
+    error_file: str,
+    max_age_days: Optional[float] = None,
+) -> Iterator[Dict[str, str]]:
+    """
+    Pick the URLs an incremental re-crawl has to fetch. The counts per
+    reason are printed once anime_urls is exhausted.
+
+    Args:
+        anime_urls: full input URL list (or the catalog as it is crawled).
+        data: existing {"metadata", "anime"} database.
+        error_file: error log of the previous run (its URLs are retried).
+        max_age_days: refetch entries older than this (None — never).
+            Entries without "fetched_at" use the database timestamp.
+
+    Yields:
+        The entries of anime_urls that are new, previously failed, or stale.
+    """
+    fallback = _parse_timestamp(data.get("metadata", {}).get("timestamp"))
+    fetched_at: Dict[str, Optional[float]] = {}
+    for entry in data["anime"].values():
+        stamp = _parse_timestamp(entry.get("fetched_at"))
+        fetched_at[entry.get("url")] = stamp if stamp is not None else fallback
+
+    failed: Set[str] = set()
+    if Path(error_file).exists():
+        failed = {e.get("url") for e in json_io.load(error_file).get("errors", [])}
+
+    cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+
+    counts = {"new": 0, "failed": 0, "stale": 0, "up to date": 0}
+    for anime_info in anime_urls:
+        url = anime_info.get("url")
+        if url not in fetched_at:
+            reason = "failed" if url in failed else "new"
+        elif url in failed:
+            reason = "failed"
+        elif cutoff is not None and (fetched_at[url] is None or fetched_at[url] < cutoff):
+            reason = "stale"
+        else:
+            reason = "up to date"
+        counts[reason] += 1
+        if reason != "up to date":
+            yield anime_info
+
+    print(f"[INFO] Incremental: {counts['new']} new, {counts['failed']} previously failed, "
+          f"{counts['stale']} stale, {counts['up to date']} up to date")
+
+
+def unretried_errors(error_file: str, attempted: Set[str]) -> List[Dict[str, Any]]:
+    """
+    Entries of the previous error log whose URLs this run does not try
+    again (cut off by --limit, or missing from this run's URL list). They
+    stay in the log, so a later incremental run still retries them.
+
+    Args:
+        error_file: error log of the previous run.
+        attempted: URLs this run fetches or has already fetched (journal).
+    """
+    if not Path(error_file).exists():
+        return []
+    return [e for e in json_io.load(error_file).get("errors", []) if e.get("url") not in attempted]
+
+
+def _parse_concurrently(
+    anime_urls: Iterable[Dict[str, str]],
+    concurrency: int,
+    parse_page: Callable[[str], Dict[str, Any]],
+    handle_result: Callable[[int, Dict[str, str], Any, Exception], None],
+):
+    """
+    Parse pages in a pool of `concurrency` threads (requests and
+    BeautifulSoup are blocking, so each page takes a thread).
+
+    The token bucket of the fetcher used by parse_page keeps the combined
+    request rate under the configured ceiling. At most `concurrency` pages
+    are submitted at a time, and results are reported from the calling
+    thread as they complete, so handle_result needs no locking.
+    """
+    items = iter(enumerate(anime_urls, start=1))
+    pending: Dict[Future, Tuple[int, Dict[str, str]]] = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            while True:
+                for idx, anime_info in islice(items, concurrency - len(pending)):
+                    pending[pool.submit(parse_page, anime_info.get("url"))] = (idx, anime_info)
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, anime_info = pending.pop(future)
+                    try:
+                        anime_data = future.result()
+                    except Exception as e:
+                        handle_result(idx, anime_info, None, e)
+                    else:
+                        handle_result(idx, anime_info, anime_data, None)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _fetch_all(
+    anime_urls: Iterable[Dict[str, str]],
+    concurrency: int,
+    rate_limiter,
+    handle_result: Callable[[int, Dict[str, str], Any, Exception], None],
+    cache: Optional[HtmlCache] = None,
+    offline: bool = False,
+    backend: str = DEFAULT_BACKEND,
+    pipeline: Optional[Dict[str, Any]] = None,
+    api: Optional[Dict[str, Any]] = None,
+) -> Optional[HttpFetcher]:
+    """
+    Parse every page (sequentially, in concurrent threads, in the staged
+    pipeline, or offline from the HTML cache) or fetch the anime from the
+    API in batches; return the fetcher used (None offline).
+    All fetchers share rate_limiter. anime_urls may be a generator (the
+    catalog crawl); every mode takes the URLs from it as it goes.
+    """
+    if api is not None:
+        fetcher = HttpFetcher(pool_size=1, rate_limiter=rate_limiter)
+        records = iter_api_records(anime_urls, fetcher, api["api_url"], api["batch_size"])
+        for idx, (anime_info, anime_data, error) in enumerate(records, start=1):
+            handle_result(idx, anime_info, anime_data, error)
+        return fetcher
+
+    if pipeline is not None:
+        fetcher = None
+        if not offline:
+            workers = pipeline["fetch_workers"]
+            fetcher = HttpFetcher(pool_size=workers, rate_limiter=rate_limiter)
+        stages = run_staged(
+            anime_urls, handle_result,
+            fetcher=fetcher, cache=cache, offline=offline, backend=backend, **pipeline
+        )
+        print("\nPipeline stages:")
+        for stage in stages:
+            print(f"  {stage.report()}")
+        return fetcher
+
+    if offline:
+        for idx, anime_info in enumerate(anime_urls, start=1):
+            try:
+                anime_data = parse_offline(anime_info.get("url"), cache, backend)
+            except Exception as e:
+                handle_result(idx, anime_info, None, e)
+            else:
+                handle_result(idx, anime_info, anime_data, None)
+        return None
+
+    if concurrency > 1:
+        fetcher = HttpFetcher(pool_size=concurrency, rate_limiter=rate_limiter)
+        parse_page = partial(parse, fetcher=fetcher, cache=cache, backend=backend)
+        _parse_concurrently(anime_urls, concurrency, parse_page, handle_result)
+        return fetcher
+
+    fetcher = HttpFetcher(pool_size=1, rate_limiter=rate_limiter)
+    for idx, anime_info in enumerate(anime_urls, start=1):
+        try:
+            # Parse a single anime page
+            anime_data = parse(anime_info.get("url"), fetcher, cache, backend)
+        except Exception as e:
+            handle_result(idx, anime_info, None, e)
+        else:
+            handle_result(idx, anime_info, anime_data, None)
+    return fetcher
 
 
 def run_etl_pipeline(
-    input_file: str,
+    input_file: Optional[str],
     output_file: str,
     limit: int = None,
-    delay: float = 2.0,
     checkpoint_interval: int = 50,
-    skip_first: int = 0
+    fresh: bool = False,
+    concurrency: int = 1,
+    rps: float = 0.5,
+    min_rps: float = 0.1,
+    max_rps: float = 4.0,
+    adaptive: bool = True,
+    html_cache: Optional[str] = None,
+    offline: bool = False,
+    parser_backend: str = DEFAULT_BACKEND,
+    pipeline: Optional[Dict[str, Any]] = None,
+    incremental: bool = False,
+    max_age_days: Optional[float] = None,
+    catalog: Optional[Dict[str, Any]] = None,
+    api: Optional[Dict[str, Any]] = None
 ):
     """
     Run the ETL pipeline for anime data collection.
 
     Args:
-        input_file: path to file with URL list
+        input_file: path to file with URL list (offline: None — every cached URL)
         output_file: path to output database file
         limit: maximum number of anime to process
-        delay: delay between requests in seconds
-        checkpoint_interval: interval for saving intermediate results
-        skip_first: skip first N anime (to resume after failure)
+        checkpoint_interval: interval (in anime) for syncing the journal to disk
+        fresh: discard an existing journal instead of resuming from it
+        concurrency: number of requests in flight; 1 keeps the sequential
+            mode, more fetches that many pages at once in threads
+        rps: starting request rate (the fixed rate if adaptive is False)
+        min_rps: floor of the adaptive request rate
+        max_rps: ceiling of the adaptive request rate
+        adaptive: adapt the rate to server responses (AIMD)
+        html_cache: directory of the HTML cache (None — no caching)
+        offline: rebuild from the HTML cache only, without network access
+        parser_backend: HTML extraction backend of shikimori_parser
+        pipeline: run_staged options (fetch_workers, parse_workers,
+            fetch_queue, parse_queue) to use the staged pipeline; None — off
+        incremental: fetch only new, previously failed and stale URLs and
+            merge them into the existing output database
+        max_age_days: incremental mode — refetch entries older than this
+        catalog: iter_catalog options (max_pages, concurrency, catalog_url)
+            to crawl the URL list from the catalog instead of input_file;
+            anime pages are fetched while the catalog is still being crawled
+        api: GraphQL options (api_url, batch_size) to take the anime from
+            the API instead of their HTML pages; None — scrape HTML
     """
 
     print("="*70)
     print("ETL Pipeline: Collecting anime data from shikimori.one")
     print("="*70)
 
-    # EXTRACT: load URL list
-    print(f"\n[EXTRACT] Loading anime list from {input_file}...")
-    anime_urls = load_anime_urls(input_file)
-    total_anime = len(anime_urls)
-    print(f"✓ Loaded {total_anime} anime")
-
-    # Apply skip_first and limit
-    if skip_first > 0:
-        anime_urls = anime_urls[skip_first:]
-        print(f"[INFO] Skipped first {skip_first} anime")
+    cache = HtmlCache(html_cache) if html_cache else None
+    rate_limiter = make_rate_limiter(rps, {"min_rps": min_rps, "max_rps": max_rps} if adaptive else None)
+    catalog_fetcher = None
+    catalog_entries = None
+
+    # EXTRACT: load URL list. The catalog is not collected first: its
+    # entries go straight to the fetch stage as the catalog pages arrive
+    if catalog is not None:
+        print(f"\n[EXTRACT] Crawling catalog {catalog['catalog_url']} (anime pages are fetched as it goes)...")
+        catalog_fetcher = HttpFetcher(pool_size=catalog["concurrency"], rate_limiter=rate_limiter)
+        catalog_entries = iter_catalog(catalog_fetcher, **catalog)
+        anime_urls = catalog_entries
+    elif input_file:
+        print(f"\n[EXTRACT] Loading anime list from {input_file}...")
+        anime_urls = load_anime_urls(input_file)
+    else:
+        print(f"\n[EXTRACT] Listing pages in HTML cache {html_cache}...")
+        anime_urls = [{"url": url} for url in cache.urls()]
+    if catalog_entries is None:
+        print(f"✓ Loaded {len(anime_urls)} anime")
+
+    error_file = output_file.replace(".json", "_errors.json")
+    base = None
+    if incremental:
+        existing = load_database(output_file)
+        base = existing["anime"]
+        print(f"[INFO] Existing database: {len(base)} anime in {output_file}")
+        anime_urls = select_incremental(anime_urls, existing, error_file, max_age_days)
+
+    # Resume from the journal of an interrupted run
+    journal_file = journal_path(output_file)
+    if fresh and Path(journal_file).exists():
+        os.remove(journal_file)
+        print(f"[INFO] Old journal removed: {journal_file}")
+    _, done_urls = replay_journal(journal_file)
+    if done_urls:
+        anime_urls = (a for a in anime_urls if a.get("url") not in done_urls)
+        print(f"[INFO] Resuming: {len(done_urls)} anime already in {journal_file}")
+    if catalog_entries is None:
+        anime_urls = list(anime_urls)
 
     if limit:
-        anime_urls = anime_urls[:limit]
-        print(f"[INFO] Limit: will process {len(anime_urls)} anime")
+        if catalog_entries is None:
+            anime_urls = anime_urls[:limit]
+            print(f"[INFO] Limit: will process {len(anime_urls)} anime")
+        else:
+            anime_urls = islice(anime_urls, limit)
+            print(f"[INFO] Limit: will process at most {limit} anime")
 
     # TRANSFORM & LOAD
     print(f"\n[TRANSFORM] Starting anime parsing...")
-    print(f"Delay between requests: {delay} sec")
-    print(f"Checkpoint every {checkpoint_interval} anime\n")
-
-    database = {}
+    if pipeline is not None:
+        print(f"Pipeline mode: {pipeline['fetch_workers']} fetch workers, "
+              f"{pipeline['parse_workers'] or os.cpu_count()} parse processes")
+    if offline:
+        print(f"Offline mode: parsing pages from HTML cache {html_cache}")
+    else:
+        if api is not None:
+            print(f"API mode: {api['batch_size']} anime per request to {api['api_url']}")
+        if concurrency > 1 and pipeline is None and api is None:
+            print(f"Concurrent mode: {concurrency} threads")
+        if adaptive:
+            print(f"Adaptive rate: starting at {rps} requests/sec, "
+                  f"floor {min_rps}, ceiling {max_rps}")
+        else:
+            print(f"Fixed rate: {rps} requests/sec")
+    print(f"Journal: {journal_file} (synced every {checkpoint_interval} anime)\n")
+
+    journal = open_journal(journal_file)
     errors = []
+    attempted: Set[str] = set()
     processed = 0
+    total = "" if catalog_entries is not None else f"/{len(anime_urls)}"
 
     start_time = time.time()
 
-    for idx, anime_info in enumerate(anime_urls, start=1):
+    def handle_result(idx, anime_info, anime_data, error):
+        nonlocal processed
         url = anime_info.get("url")
         anime_id = anime_info.get("id", "unknown")
-
-        print(f"[{idx}/{len(anime_urls)}] {url}...", end=" ")
-
-        try:
-            # Parse a single anime page
-            anime_data = parse(url)
-            database.update(anime_data)
-            processed += 1
-            print("✓")
-
-            # Checkpoint
-            if processed % checkpoint_interval == 0:
-                checkpoint_file = save_checkpoint(output_file, database, processed)
-                print(f"  → Checkpoint saved: {checkpoint_file}")
-
-        except requests.HTTPError as e:
-            error_msg = f"HTTP {e.response.status_code}: {url}"
-            errors.append({"url": url, "id": anime_id, "error": str(e)})
-            print(f"✗ {error_msg}")
-        except Exception as e:
-            error_msg = f"{type(e).__name__}: {str(e)}"
+        prefix = f"[{idx}{total}] {url}..."
+        attempted.add(url)
+
+        if isinstance(error, requests.HTTPError):
+            error_msg = f"HTTP {error.response.status_code}: {url}"
+            errors.append({"url": url, "id": anime_id, "error": str(error)})
+            print(f"{prefix} ✗ {error_msg}")
+            return
+        if error is not None:
+            error_msg = f"{type(error).__name__}: {str(error)}"
             errors.append({"url": url, "id": anime_id, "error": error_msg})
-            print(f"✗ {error_msg}")
-
-        # Delay between requests
-        if idx < len(anime_urls):
-            time.sleep(delay)
-
-    # LOAD: final save
-    print(f"\n[LOAD] Saving database to {output_file}...")
+            print(f"{prefix} ✗ {error_msg}")
+            return
 
-    final_data = {
-        "metadata": {
-            "total_anime": len(database),
-            "processed": processed,
-            "errors": len(errors),
-            "source": "shikimori.one",
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-        },
-        "anime": database
-    }
+        append_journal(journal, anime_info, anime_data)
+        processed += 1
+        print(f"{prefix} ✓")
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(final_data, f, ensure_ascii=False, indent=2)
+        if processed % checkpoint_interval == 0:
+            os.fsync(journal.fileno())
 
-    print(f"✓ Database saved")
+    try:
+        fetcher = _fetch_all(
+            anime_urls, concurrency, rate_limiter, handle_result,
+            cache=cache, offline=offline, backend=parser_backend, pipeline=pipeline, api=api
+        )
+    finally:
+        journal.close()
+        if catalog_entries is not None:
+            catalog_entries.close()
 
-    # Save error log
-    if errors:
-        error_file = output_file.replace(".json", "_errors.json")
-        with open(error_file, "w", encoding="utf-8") as f:
-            json.dump({"errors": errors}, f, ensure_ascii=False, indent=2)
+    # LOAD: final save
+    print(f"\n[LOAD] Compacting journal into {output_file}...")
+
+    database = compact_journal(journal_file, output_file, {
+        "processed": processed,
+        "errors": len(errors),
+        "source": (
+            "shikimori.one (HTML cache)" if offline
+            else "shikimori.one (API)" if api is not None
+            else "shikimori.one"
+        ),
+        "timestamp": time.strftime(TIMESTAMP_FORMAT)
+    }, base=base)
+
+    print(f"✓ Database saved ({len(database)} anime)")
+
+    # Save error log: this run's errors plus the old ones it did not retry.
+    # A URL retried successfully leaves the log, so the next incremental
+    # run does not fetch it again; the log is removed once it is empty.
+    old_errors = unretried_errors(error_file, done_urls | attempted)
+    if errors or old_errors:
+        json_io.dump({"errors": old_errors + errors}, error_file)
         print(f"✓ Error log saved: {error_file}")
+        if old_errors:
+            print(f"  (kept {len(old_errors)} errors of the previous run not retried in this one)")
+    elif Path(error_file).exists():
+        os.remove(error_file)
 
     # Summary statistics
     elapsed = time.time() - start_time
@@ -165,6 +575,12 @@ def run_etl_pipeline(
     print("="*70)
     print(f"Processed successfully: {processed}")
     print(f"Errors: {len(errors)}")
+    if catalog_fetcher is not None:
+        print(f"Catalog HTTP {catalog_fetcher.summary()}")
+    if fetcher is not None:
+        print(f"HTTP {fetcher.summary()}")
+    if (fetcher or catalog_fetcher) is not None and isinstance(rate_limiter, AdaptiveRateLimiter):
+        print(f"Adaptive {rate_limiter.summary()}")
     print(f"Elapsed time: {elapsed/60:.1f} min ({elapsed:.0f} sec)")
     if processed > 0:
         print(f"Average time per anime: {elapsed/processed:.1f} sec")
@@ -183,8 +599,8 @@ def main():
     )
     ap.add_argument(
         "-i", "--input",
-        required=True,
-        help="Input JSON file with anime URL list"
+        default=None,
+        help="Input JSON file with anime URL list (optional with --offline or --from-catalog)"
     )
     ap.add_argument(
         "-o", "--output",
@@ -198,28 +614,169 @@ def main():
         help="Maximum number of anime to process (for testing)"
     )
     ap.add_argument(
-        "--delay",
+        "--checkpoint-interval",
+        type=int,
+        default=50,
+        help="Sync the journal to disk every N anime (default: 50)"
+    )
+    ap.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Discard the journal of an interrupted run instead of resuming"
+    )
+    ap.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Requests in flight; more than 1 fetches pages in that many threads (default: 1)"
+    )
+    ap.add_argument(
+        "--rps",
         type=float,
-        default=2.0,
-        help="Delay between requests in seconds (default: 2.0)"
+        default=0.5,
+        help="Starting requests per second of all workers together (default: 0.5)"
     )
     ap.add_argument(
-        "--checkpoint-interval",
+        "--min-rps",
+        type=float,
+        default=0.1,
+        help="Floor of the adaptive request rate (default: 0.1)"
+    )
+    ap.add_argument(
+        "--max-rps",
+        type=float,
+        default=4.0,
+        help="Ceiling of the adaptive request rate (default: 4.0)"
+    )
+    ap.add_argument(
+        "--fixed-rate",
+        action="store_true",
+        help="Keep the request rate at --rps instead of adapting it"
+    )
+    ap.add_argument(
+        "--html-cache",
+        default=None,
+        help="Directory of the compressed HTML cache (default: no cache)"
+    )
+    ap.add_argument(
+        "--offline",
+        action="store_true",
+        help="Rebuild the database from --html-cache without network access"
+    )
+
+    ap.add_argument(
+        "--parser",
+        choices=sorted(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help=f"HTML extraction backend (default: {DEFAULT_BACKEND}; lxml is faster)"
+    )
+
+    ap.add_argument(
+        "--source",
+        choices=["html", "api"],
+        default="html",
+        help="Scrape HTML pages or use the GraphQL API (default: html)"
+    )
+    ap.add_argument(
+        "--api-url",
+        default=API_URL,
+        help=f"API mode: GraphQL endpoint (default: {API_URL})"
+    )
+    ap.add_argument(
+        "--api-batch",
         type=int,
-        default=50,
-        help="Checkpoint save interval (default: every 50 anime)"
+        default=MAX_BATCH,
+        help=f"API mode: anime per request, at most {MAX_BATCH} (default: {MAX_BATCH})"
+    )
+
+    ap.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Staged mode: fetch threads, process pool for parsing, single writer"
+    )
+    ap.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=4,
+        help="Pipeline mode: I/O threads (default: 4)"
+    )
+    ap.add_argument(
+        "--parse-workers",
+        type=int,
+        default=None,
+        help="Pipeline mode: parser processes (default: all cores)"
     )
     ap.add_argument(
-        "--skip-first",
+        "--fetch-queue",
         type=int,
-        default=0,
-        help="Skip first N anime (to resume after failure)"
+        default=64,
+        help="Pipeline mode: fetched pages waiting for a parser (default: 64)"
+    )
+    ap.add_argument(
+        "--parse-queue",
+        type=int,
+        default=None,
+        help="Pipeline mode: pages being parsed or waiting for the writer "
+             "(default: 2 x parse workers)"
+    )
+
+    ap.add_argument(
+        "--from-catalog",
+        action="store_true",
+        help="Crawl the URL list from the catalog instead of reading --input; "
+             "anime pages are fetched while the catalog is crawled"
+    )
+    ap.add_argument(
+        "--max-pages",
+        type=int,
+        default=None,
+        help="Catalog mode: catalog pages to crawl (default: all)"
+    )
+    ap.add_argument(
+        "--catalog-concurrency",
+        type=int,
+        default=4,
+        help="Catalog mode: catalog pages in flight (default: 4)"
+    )
+    ap.add_argument(
+        "--catalog-url",
+        default=CATALOG_URL,
+        help=f"Catalog mode: catalog listing to crawl (default: {CATALOG_URL})"
+    )
+
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Fetch only new, previously failed and stale URLs; merge into --output"
+    )
+    ap.add_argument(
+        "--max-age-days",
+        type=float,
+        default=None,
+        help="Incremental mode: refetch entries older than N days (default: never)"
     )
 
     args = ap.parse_args()
 
+    if args.offline and not args.html_cache:
+        ap.error("--offline requires --html-cache")
+    if args.from_catalog and (args.input or args.offline):
+        ap.error("--from-catalog cannot be combined with --input or --offline")
+    if not args.input and not args.offline and not args.from_catalog:
+        ap.error("the following arguments are required: -i/--input")
+    if args.source == "api" and (args.offline or args.pipeline or args.html_cache):
+        ap.error("--source api cannot be combined with --offline, --pipeline or --html-cache")
+    if not 1 <= args.api_batch <= MAX_BATCH:
+        ap.error(f"--api-batch must be between 1 and {MAX_BATCH}")
+    if args.concurrency < 1:
+        ap.error("--concurrency must be at least 1")
+    if args.rps <= 0:
+        ap.error("--rps must be positive")
+    if not 0 < args.min_rps <= args.max_rps:
+        ap.error("--min-rps must be positive and not above --max-rps")
+
     # Check input file exists
-    if not Path(args.input).exists():
+    if args.input and not Path(args.input).exists():
         sys.stderr.write(f"[ERROR] Input file not found: {args.input}\n")
         sys.stderr.write("Run first: python fetch_anime_list.py\n")
         sys.exit(1)
@@ -229,9 +786,33 @@ def main():
         input_file=args.input,
         output_file=args.output,
         limit=args.limit,
-        delay=args.delay,
         checkpoint_interval=args.checkpoint_interval,
-        skip_first=args.skip_first
+        fresh=args.fresh,
+        concurrency=args.concurrency,
+        rps=args.rps,
+        min_rps=args.min_rps,
+        max_rps=args.max_rps,
+        adaptive=not args.fixed_rate,
+        html_cache=args.html_cache,
+        offline=args.offline,
+        parser_backend=args.parser,
+        pipeline={
+            "fetch_workers": args.fetch_workers,
+            "parse_workers": args.parse_workers,
+            "fetch_queue": args.fetch_queue,
+            "parse_queue": args.parse_queue,
+        } if args.pipeline else None,
+        incremental=args.incremental,
+        max_age_days=args.max_age_days,
+        catalog={
+            "max_pages": args.max_pages,
+            "concurrency": args.catalog_concurrency,
+            "catalog_url": args.catalog_url,
+        } if args.from_catalog else None,
+        api={
+            "api_url": args.api_url,
+            "batch_size": args.api_batch,
+        } if args.source == "api" else None
     )
 
 
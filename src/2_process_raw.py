@@ -5,17 +5,62 @@ Process raw data: convert to structured format.
 Keeps only TV Сериал and Фильм, then only series originals
 (earliest release in each group), then excludes entries without
 description or with an empty description.
+
+Besides the display strings, every entry gets typed fields parsed once
+here, so the filters do not re-parse strings on every run:
+air_year_start / air_year_end (int), episodes (int), score (float) and
+genres / themes (token lists, split like analyze_raw.split_tokens).
+Unknown values are None.
+
+With --sqlite the result is also written as an indexed SQLite store
+(anime_store.py) that main.py can filter with SQL instead of loading
+the whole JSON file. With --columns it is also written as a columnar
+NumPy snapshot (anime_columns.py) for the vectorized stage 1 filter.
+With --descriptions it is also written split into metadata and a
+description blob (description_store.py), so main.py can filter without
+loading any description.
+
+With --incremental a manifest of raw-entry hashes is kept next to the
+output. Later runs re-transform only new or changed raw entries, regroup
+only the series groups (base names) they belong to, and patch the
+previous anime_database.json / anime_continuations.json; the result is
+the same as a full run. Each incremental run also writes a delta of the
+processed entries it added and removed (anime_delta.json), which
+analyze_raw can apply instead of rescanning the database.
+
+With --stream the raw file is never loaded whole: two streaming passes
+(json_stream.py) first collect only what series grouping needs, then
+transform the kept originals one at a time and write them out as they
+come, so memory stays bounded for multi-GB raw dumps.
+
+With --fuzzy-series, series groups are also merged across spelling
+variants of the Russian and English halves (series_matching.py). Such a
+merge can join any two groups, so --incremental then regroups everything.
 """
 
-import json
+import argparse
+import hashlib
 import re
-from datetime import date
 from pathlib import Path
 
+import json_io
+from analyze_raw import split_tokens
+from anime_fields import extract_air_year, parse_float, parse_int, valid_years
+from anime_store import create_store
+from description_store import create_description_store
+from json_stream import ObjectFile, ObjectWriter, iter_anime
+from series_matching import merge_series_groups
+
 
-MIN_VALID_YEAR = 1900
 CONTINUATIONS_FILE = 'data/processed/anime_continuations.json'
+MANIFEST_FILE = 'data/processed/anime_manifest.json'
+DELTA_FILE = 'data/processed/anime_delta.json'
 ALLOWED_TYPES = frozenset({'TV Сериал', 'Фильм'})
+# Raw entry fields written by the crawler about the fetch itself (1_parse_anime_site.py)
+CRAWL_FIELDS = frozenset({'fetched_at'})
+
+TRAILING_NUMBER = re.compile(r'^(.*?)(\d+)\s*$')
+HAS_TRAILING_NUMBER = re.compile(r'\d+\s*$')
 
 
 def _append_field(entry, field_name, value):
@@ -28,7 +73,7 @@ def _append_field(entry, field_name, value):
 
 
 def _strip_trailing_season_number(name):
-    match = re.match(r'^(.*?)(\d+)\s*$', name)
+    match = TRAILING_NUMBER.match(name)
     if match:
         base = match.group(1).strip()
         if base:
@@ -61,32 +106,15 @@ def _get_type_from_raw(anime_data):
     return None
 
 
-def _extract_air_year(status):
-    """
-    Extract release year from the "Статус" field.
-    Supports all patterns from analytic.json → status_patterns.
-    """
-    if not status:
-        return None
-
-    years = [int(match) for match in re.findall(r'\b(\d{4})\b', str(status))]
-    valid_years = [
-        year for year in years
-        if MIN_VALID_YEAR <= year <= date.today().year + 1
-    ]
-    if not valid_years:
-        return None
-
-    return min(valid_years)
+def _original_sort_key(anime_name, anime_data):
+    """Lower key = earlier release (preferred as original)."""
+    return _title_sort_key(anime_name, extract_air_year(_get_status_from_raw(anime_data)))
 
 
-def _original_sort_key(anime_name, anime_dict):
-    """Lower key = earlier release (preferred as original)."""
-    status = _get_status_from_raw(anime_dict[anime_name])
-    year = _extract_air_year(status)
+def _title_sort_key(anime_name, year):
     russian = anime_name.split(' / ', 1)[0].strip()
     has_subtitle = ':' in russian
-    has_trailing_season = bool(re.search(r'\d+\s*$', russian.split(':', 1)[0]))
+    has_trailing_season = bool(HAS_TRAILING_NUMBER.search(russian.split(':', 1)[0]))
     return (
         year if year is not None else 9999,
         has_subtitle,
@@ -95,9 +123,12 @@ def _original_sort_key(anime_name, anime_dict):
     )
 
 
-def _resolve_series(anime_dict):
+def _resolve_series(anime_dict, fuzzy=False, sort_key=None):
     """
-    Group anime by base name.
+    Group anime by base name (and, with fuzzy, merge groups of the same
+    series spelled differently — see series_matching).
+    sort_key: original-first key of a title; by default _original_sort_key
+    of its raw entry in anime_dict.
     Returns:
     - keep_names: original titles to keep in the database;
     - continuation_counts: {original: number of continuations};
@@ -108,17 +139,22 @@ def _resolve_series(anime_dict):
         base = _extract_base_name(anime_name)
         groups.setdefault(base, []).append(anime_name)
 
+    series = merge_series_groups(groups) if fuzzy else groups.values()
+    if sort_key is None:
+        def sort_key(name):
+            return _original_sort_key(name, anime_dict[name])
+
     keep_names = set()
     continuation_counts = {}
     continuations_map = {}
 
-    for names in groups.values():
+    for names in series:
         if len(names) == 1:
             keep_names.add(names[0])
             continuation_counts[names[0]] = 0
             continue
 
-        sorted_names = sorted(names, key=lambda name: _original_sort_key(name, anime_dict))
+        sorted_names = sorted(names, key=sort_key)
         original = sorted_names[0]
         continuations = sorted_names[1:]
 
@@ -153,6 +189,15 @@ def _transform_entry(anime_data, continuation_count):
     if 'rating' in anime_data:
         entry['rating'] = anime_data['rating']
 
+    # Typed fields for the filters
+    years = valid_years(entry.get('Статус'))
+    entry['air_year_start'] = min(years) if years else None
+    entry['air_year_end'] = max(years) if years else None
+    entry['episodes'] = parse_int(entry.get('Эпизоды'))
+    entry['score'] = parse_float(anime_data.get('rating'))
+    entry['genres'] = split_tokens(entry.get('Жанры', ''))
+    entry['themes'] = split_tokens(entry.get('Темы', ''))
+
     return entry
 
 
@@ -163,11 +208,12 @@ def _has_description(anime_data):
     return bool(description and description.strip())
 
 
-def process_raw(anime_dict):
+def process_raw(anime_dict, fuzzy_series=False):
     """
     Convert raw data to structured format.
     Keeps only TV Сериал and Фильм, then only series originals,
     then excludes entries without description or with empty description.
+    fuzzy_series: also merge series groups across title spelling variants.
     """
     print("=" * 70)
     print("RAW DATA PROCESSING")
@@ -182,7 +228,7 @@ def process_raw(anime_dict):
         else:
             skipped_wrong_type += 1
 
-    keep_names, continuation_counts, continuations_map = _resolve_series(type_filtered)
+    keep_names, continuation_counts, continuations_map = _resolve_series(type_filtered, fuzzy=fuzzy_series)
     skipped_continuation = len(type_filtered) - len(keep_names)
 
     processed = {}
@@ -212,33 +258,320 @@ def process_raw(anime_dict):
     return processed, continuations_map
 
 
-def process_raw_file(input_file, output_file, continuations_file=CONTINUATIONS_FILE):
+def process_raw_stream(input_file, output_file, fuzzy_series=False, known=None):
+    """
+    process_raw for raw files too large to load: two streaming passes
+    over input_file, with the same output.
+
+    The first pass keeps only what series grouping needs: the titles of
+    the allowed types, their release years and which of them lack a
+    description. The second transforms the kept originals one at a time
+    and writes them to output_file as it goes.
+    known: entries of an existing manifest; if given, the manifest entries
+    of the raw data are collected during the first pass.
+
+    Returns:
+        (number of entries written, continuations_map, manifest entries or None)
+    """
+    print("=" * 70)
+    print("RAW DATA PROCESSING (streaming)")
+    print("=" * 70)
+
+    total = 0
+    skipped_wrong_type = 0
+    years = {}
+    without_description = set()
+    manifest_entries = None if known is None else {}
+    for anime_name, anime_data in iter_anime(input_file):
+        total += 1
+        if manifest_entries is not None:
+            manifest_entries[anime_name] = _manifest_entry(anime_name, anime_data, known)
+        if _get_type_from_raw(anime_data) not in ALLOWED_TYPES:
+            skipped_wrong_type += 1
+            continue
+        years[anime_name] = extract_air_year(_get_status_from_raw(anime_data))
+        if not _has_description(anime_data):
+            without_description.add(anime_name)
+    print(f"Total anime: {total}")
+
+    keep_names, continuation_counts, continuations_map = _resolve_series(
+        years, fuzzy=fuzzy_series, sort_key=lambda name: _title_sort_key(name, years[name]),
+    )
+    skipped_continuation = len(years) - len(keep_names)
+    skipped_no_description = len(keep_names & without_description)
+    keep_names -= without_description
+
+    with ObjectWriter(output_file) as writer:
+        for anime_name, anime_data in iter_anime(input_file):
+            if anime_name in keep_names:
+                writer.write(anime_name, _transform_entry(anime_data, continuation_counts[anime_name]))
+
+    print("\n" + "=" * 70)
+    print("PROCESSING STATISTICS")
+    print("=" * 70)
+    print(f"Original count:                {total}")
+    print(f"Excluded by type:              {skipped_wrong_type}")
+    print(f"Excluded (continuations):      {skipped_continuation}")
+    print(f"Excluded (no description):     {skipped_no_description}")
+    print(f"Total in database:             {writer.count}")
+    print("=" * 70)
+
+    return writer.count, continuations_map, manifest_entries
+
+
+def _entry_hash(anime_data):
+    # Crawl metadata changes on every re-fetch of an unchanged page and is
+    # not part of the processed entry. repr is stable for the same JSON
+    # input; a mere key reorder only costs a needless reprocess of that entry
+    content = {key: value for key, value in anime_data.items() if key not in CRAWL_FIELDS}
+    return hashlib.blake2b(repr(content).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _manifest_entry(anime_name, anime_data, known):
+    previous = known.get(anime_name)
+    base = previous[1] if previous else _extract_base_name(anime_name)
+    return [_entry_hash(anime_data), base]
+
+
+def _build_manifest(anime_dict, generation, known=None, fuzzy_series=False):
+    """
+    Manifest {generation, fuzzy_series, entries: {raw title: [content hash, base name]}}.
+    known: entries of the previous manifest whose base names can be reused.
+    fuzzy_series: whether the outputs were grouped with fuzzy series merging.
+    """
+    known = known or {}
+    entries = {
+        anime_name: _manifest_entry(anime_name, anime_data, known)
+        for anime_name, anime_data in anime_dict.items()
+    }
+    return {'generation': generation, 'fuzzy_series': fuzzy_series, 'entries': entries}
+
+
+def _group_order(continuations_map, position):
+    """Order of a full run: by the first raw position of any group member."""
+    return dict(sorted(
+        continuations_map.items(),
+        key=lambda item: min(position[name] for name in (item[0], *item[1])),
+    ))
+
+
+def _delta(previous, processed, generation, base_generation):
+    """Processed entries added and removed between two runs; an updated entry is in both."""
+    return {
+        'generation': generation,
+        'base_generation': base_generation,
+        'added': {name: entry for name, entry in processed.items() if previous.get(name) != entry},
+        'removed': {name: entry for name, entry in previous.items() if processed.get(name) != entry},
+    }
+
+
+def process_raw_incremental(anime_dict, manifest, previous, previous_continuations):
+    """
+    Update the result of an earlier run for the current raw data.
+
+    Only entries whose content hash differs from the manifest are
+    re-transformed, and only the series groups of new, changed or removed
+    entries are resolved again; everything else is taken from previous /
+    previous_continuations.
+
+    Returns:
+        (processed, continuations_map, new manifest, delta), where delta is
+        {"generation", "base_generation", "added": {title: entry},
+        "removed": {title: entry}} (see _delta).
+    """
+    print("=" * 70)
+    print("RAW DATA PROCESSING (incremental)")
+    print("=" * 70)
+    print(f"Total anime: {len(anime_dict)}")
+
+    old_entries = manifest['entries']
+    new_manifest = _build_manifest(anime_dict, manifest['generation'] + 1, old_entries)
+    new_entries = new_manifest['entries']
+
+    changed = [name for name, (digest, _) in new_entries.items()
+               if old_entries.get(name, (None,))[0] != digest]
+    removed = [name for name in old_entries if name not in new_entries]
+    added_count = sum(1 for name in changed if name not in old_entries)
+    affected = {new_entries[name][1] for name in changed}
+    affected.update(old_entries[name][1] for name in removed)
+
+    # Regroup the affected groups from their current members
+    members = {
+        anime_name: anime_dict[anime_name]
+        for anime_name, (_, base) in new_entries.items()
+        if base in affected and _get_type_from_raw(anime_dict[anime_name]) in ALLOWED_TYPES
+    }
+    keep_names, continuation_counts, group_continuations = _resolve_series(members)
+
+    regrouped = {}
+    for anime_name in keep_names:
+        if _has_description(members[anime_name]):
+            regrouped[anime_name] = _transform_entry(members[anime_name], continuation_counts[anime_name])
+
+    def old_base(anime_name):
+        return old_entries.get(anime_name, (None, None))[1]
+
+    # Entries unknown to the manifest cannot be placed in a group; drop them
+    stale = {name: entry for name, entry in previous.items()
+             if name not in old_entries or old_base(name) in affected}
+    merged = {name: entry for name, entry in previous.items() if name not in stale}
+    merged.update(regrouped)
+    processed = {name: merged[name] for name in anime_dict if name in merged}
+
+    continuations_map = {
+        original: names for original, names in previous_continuations.items()
+        if old_base(original) not in affected
+    }
+    continuations_map.update(group_continuations)
+    position = {name: i for i, name in enumerate(anime_dict)}
+    continuations_map = _group_order(continuations_map, position)
+
+    delta = _delta(stale, regrouped, new_manifest['generation'], manifest['generation'])
+    updated = len(delta['added'].keys() & delta['removed'].keys())
+
+    print("\n" + "=" * 70)
+    print("PROCESSING STATISTICS")
+    print("=" * 70)
+    print(f"Raw entries new:               {added_count}")
+    print(f"Raw entries changed:           {len(changed) - added_count}")
+    print(f"Raw entries removed:           {len(removed)}")
+    print(f"Series groups re-resolved:     {len(affected)}")
+    print(f"Database entries added:        {len(delta['added']) - updated}")
+    print(f"Database entries updated:      {updated}")
+    print(f"Database entries removed:      {len(delta['removed']) - updated}")
+    print(f"Total in database:             {len(processed)}")
+    print("=" * 70)
+
+    return processed, continuations_map, new_manifest, delta
+
+
+def _load_raw(input_path):
+    data = json_io.load(input_path)
+    return data.get('anime', data)
+
+
+def process_raw_file(input_file, output_file, continuations_file=CONTINUATIONS_FILE, store_file=None,
+                     columns_dir=None, incremental=False, manifest_file=MANIFEST_FILE,
+                     delta_file=DELTA_FILE, fuzzy_series=False, stream=False, descriptions_dir=None):
+    if stream and incremental:
+        raise ValueError("Streaming and incremental processing cannot be combined")
+
     input_path = Path(input_file)
     output_path = Path(output_file)
     continuations_path = Path(continuations_file)
+    manifest_path = Path(manifest_file)
+    delta_path = Path(delta_file)
 
     if not input_path.exists():
         print(f"File not found: {input_path}")
         return None
 
-    with open(input_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    anime_dict = data.get('anime', data)
-    result, continuations_map = process_raw(anime_dict)
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
-
-    continuations_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(continuations_path, 'w', encoding='utf-8') as f:
-        json.dump(continuations_map, f, ensure_ascii=False, indent=2)
-
-    print(f"\nDatabase saved to {output_path}")
-    print(f"Continuations saved to {continuations_path}")
+    previous_ready = manifest_path.exists() and output_path.exists() and continuations_path.exists()
+    old_manifest = json_io.load(manifest_path) if manifest_path.exists() else None
+    # Outputs grouped in the other mode cannot be patched group by group
+    same_mode = old_manifest is not None and old_manifest.get('fuzzy_series', False) == fuzzy_series
+    previous_continuations = None
+    if stream:
+        count, continuations_map, manifest_entries = process_raw_stream(
+            input_path,
+            output_path,
+            fuzzy_series=fuzzy_series,
+            known=old_manifest and old_manifest['entries'],
+        )
+        # Already written; --sqlite / --columns / --descriptions read it back entry by entry
+        result = ObjectFile(output_path, count)
+        manifest, delta = None, None
+        if old_manifest:
+            manifest = {'generation': old_manifest['generation'] + 1, 'fuzzy_series': fuzzy_series,
+                        'entries': manifest_entries}
+    elif incremental and previous_ready and same_mode and not fuzzy_series:
+        anime_dict = _load_raw(input_path)
+        previous_continuations = json_io.load(continuations_path)
+        result, continuations_map, manifest, delta = process_raw_incremental(
+            anime_dict,
+            old_manifest,
+            json_io.load(output_path),
+            previous_continuations,
+        )
+    else:
+        anime_dict = _load_raw(input_path)
+        if incremental and previous_ready and fuzzy_series:
+            print("Fuzzy series merging can join any groups — regrouping everything.\n")
+        elif incremental and previous_ready:
+            print("The earlier run grouped series with --fuzzy-series — regrouping everything.\n")
+        elif incremental:
+            print("No manifest of an earlier run — processing everything.\n")
+        result, continuations_map = process_raw(anime_dict, fuzzy_series=fuzzy_series)
+        manifest, delta = None, None
+        if incremental or manifest_path.exists():
+            # Keep an existing manifest in step with the rewritten outputs
+            generation = old_manifest['generation'] + 1 if old_manifest else 1
+            manifest = _build_manifest(anime_dict, generation, old_manifest and old_manifest['entries'],
+                                       fuzzy_series)
+            if incremental and previous_ready:
+                previous_continuations = json_io.load(continuations_path)
+                delta = _delta(json_io.load(output_path), result, generation, old_manifest['generation'])
+
+    unchanged = (delta is not None and not delta['added'] and not delta['removed']
+                 and continuations_map == previous_continuations)
+    if not unchanged:
+        if not stream:
+            json_io.dump(result, output_path)
+        json_io.dump(continuations_map, continuations_path)
+    if manifest is not None:
+        json_io.dump(manifest, manifest_path, pretty=False)
+    if delta is not None:
+        json_io.dump(delta, delta_path, pretty=False)
+    elif delta_path.exists():
+        # A full rewrite leaves no delta to apply
+        delta_path.unlink()
+
+    if store_file:
+        create_store(store_file, result)
+    if columns_dir:
+        # NumPy is only needed for the snapshot
+        from anime_columns import create_snapshot
+        create_snapshot(columns_dir, result)
+    if descriptions_dir:
+        create_description_store(descriptions_dir, result)
+
+    if unchanged:
+        print(f"\nNo changes — {output_path} and {continuations_path} left as they are")
+    else:
+        print(f"\nDatabase saved to {output_path}")
+        print(f"Continuations saved to {continuations_path}")
+    if manifest is not None:
+        print(f"Manifest saved to {manifest_path}")
+    if delta is not None:
+        print(f"Delta saved to {delta_path}")
+    if store_file:
+        print(f"SQLite store saved to {store_file}")
+    if columns_dir:
+        print(f"Column snapshot saved to {columns_dir}")
+    if descriptions_dir:
+        print(f"Description store saved to {descriptions_dir}")
     return result
 
 
 if __name__ == '__main__':
-    process_raw_file('data/raw/anime_database.json', 'data/processed/anime_database.json')
+    ap = argparse.ArgumentParser(description="Process raw data into the structured database")
+    ap.add_argument("--sqlite", default=None,
+                    help="Also write the indexed SQLite store to this file (default: off)")
+    ap.add_argument("--columns", default=None,
+                    help="Also write the columnar NumPy snapshot to this directory (default: off)")
+    ap.add_argument("--descriptions", default=None,
+                    help="Also write the database split into metadata and a description blob "
+                         "to this directory (default: off)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Reprocess only raw entries changed since the last --incremental run")
+    ap.add_argument("--fuzzy-series", action="store_true",
+                    help="Also merge series whose Russian / English titles are spelled differently")
+    ap.add_argument("--stream", action="store_true",
+                    help="Stream the raw file in two passes instead of loading it (bounded memory; "
+                         "not with --incremental)")
+    args = ap.parse_args()
+    if args.stream and args.incremental:
+        ap.error("--stream cannot be combined with --incremental")
+    process_raw_file('data/raw/anime_database.json', 'data/processed/anime_database.json',
+                     store_file=args.sqlite, columns_dir=args.columns, descriptions_dir=args.descriptions,
+                     incremental=args.incremental, fuzzy_series=args.fuzzy_series, stream=args.stream)
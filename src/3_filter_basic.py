@@ -2,24 +2,20 @@
 # -*- coding: utf-8 -*-
 """
 Basic anime filtering script.
-Expects a structured database from 2_process_raw.py.
+Expects a structured database from 2_process_raw.py
+(a dict, or the SQLite store written with --sqlite — see filter_basic_store;
+a dict with its column snapshot written with --columns — see filter_basic_columns).
 """
 
-import json
-import re
 from datetime import date
 from pathlib import Path
 
-MIN_VALID_YEAR = 1900
-
-ANALYTIC_FILE = Path(__file__).resolve().parent.parent / "data/processed/analytic.json"
-
-
-def _load_analytic_options():
-    with open(ANALYTIC_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data.get("types", []), data.get("sources", [])
-
+import json_io
+from analytic_options import registry
+from anime_fields import MIN_VALID_YEAR, extract_air_year, parse_float, parse_int
+from anime_store import watched_condition
+from filter_plan import Check, FilterPlan
+from watched_list import WatchedIndex
 
 def _validate_choice(value, valid_options, setting_name):
     """None disables the filter. Invalid values print a warning and return None."""
@@ -58,15 +54,6 @@ def _validate_choice(value, valid_options, setting_name):
     return None
 
 
-def _parse_episodes(value):
-    if value is None:
-        return None
-    try:
-        return int(str(value).strip())
-    except (ValueError, TypeError):
-        return None
-
-
 def _validate_year(value, setting_name):
     """None disables the filter. Invalid values print a warning and return None."""
     if value is None:
@@ -92,71 +79,37 @@ def _validate_year(value, setting_name):
     return year
 
 
-def _extract_air_year(status):
-    """
-    Extract release year from the "Статус" field.
-    Supports all patterns from analytic.json → status_patterns.
-    For ranges (e.g. "в 2011-2014 гг.") the first (minimum) year is used.
-    """
-    if not status:
-        return None
+# Typed fields written by 2_process_raw; older databases only have the
+# display strings, which are parsed on the fly.
 
-    years = [int(match) for match in re.findall(r"\b(\d{4})\b", str(status))]
-    valid_years = [
-        year for year in years
-        if MIN_VALID_YEAR <= year <= date.today().year + 1
-    ]
-    if not valid_years:
-        return None
-
-    return min(valid_years)
+def _entry_score(anime_data):
+    if "score" in anime_data:
+        return anime_data["score"]
+    return parse_float(anime_data.get("rating"))
 
 
-def _split_title(anime_name):
-    if " / " in anime_name:
-        russian, english = anime_name.split(" / ", 1)
-        return russian.strip(), english.strip()
-    return anime_name.strip(), ""
+def _entry_episodes(anime_data):
+    if "episodes" in anime_data:
+        return anime_data["episodes"]
+    return parse_int(anime_data.get("Эпизоды"))
 
 
-def _normalize_title(title):
-    return title.strip().casefold()
+def _entry_air_year(anime_data):
+    if "air_year_start" in anime_data:
+        return anime_data["air_year_start"]
+    return extract_air_year(anime_data.get("Статус"))
 
 
 def is_watched(anime_name, watched_list):
-    """Check whether the anime is in the watched list."""
+    """
+    Check whether the anime is in the watched list: a list of titles or,
+    for repeated checks, a watched_list.WatchedIndex built from it once.
+    """
     if not watched_list:
         return False
-
-    russian, english = _split_title(anime_name)
-    russian_norm = _normalize_title(russian)
-    english_norm = _normalize_title(english)
-    name_norm = _normalize_title(anime_name)
-
-    for watched in watched_list:
-        if not watched:
-            continue
-        watched = str(watched).strip()
-        if not watched:
-            continue
-
-        watched_norm = _normalize_title(watched)
-        if watched_norm == name_norm:
-            return True
-
-        w_russian, w_english = _split_title(watched)
-        w_russian_norm = _normalize_title(w_russian)
-        w_english_norm = _normalize_title(w_english)
-
-        if w_english:
-            if w_russian_norm == russian_norm and w_english_norm == english_norm:
-                return True
-            if w_russian_norm == russian_norm or w_english_norm == english_norm:
-                return True
-        elif watched_norm == russian_norm or watched_norm == english_norm:
-            return True
-
-    return False
+    if not isinstance(watched_list, WatchedIndex):
+        watched_list = WatchedIndex(watched_list)
+    return anime_name in watched_list
 
 
 def _has_continuations(anime_data):
@@ -181,24 +134,10 @@ def _validate_bool_filter(value, setting_name):
     return None
 
 
-def filter_basic(
-    anime_dict,
-    *,
-    type_of_anime=None,
-    source_material=None,
-    has_continuations=None,
-    exclude_rating_g=True,
-    min_rating=6.0,
-    min_episodes=None,
-    max_episodes=None,
-    min_year=None,
-    max_year=None,
-    watched_anime=None,
-):
-    """Basic anime filtering. Returns a filtered dictionary."""
-    valid_types, valid_sources = _load_analytic_options()
-    allowed_types = _validate_choice(type_of_anime, valid_types, "type_of_anime")
-    allowed_sources = _validate_choice(source_material, valid_sources, "source_material")
+def _resolve_options(type_of_anime, source_material, has_continuations, min_year, max_year):
+    """Validate the filter settings; invalid ones print a warning and become None."""
+    allowed_types = _validate_choice(type_of_anime, registry.options("types"), "type_of_anime")
+    allowed_sources = _validate_choice(source_material, registry.options("sources"), "source_material")
     has_continuations = _validate_bool_filter(has_continuations, "has_continuations")
     min_year = _validate_year(min_year, "min_year")
     max_year = _validate_year(max_year, "max_year")
@@ -211,13 +150,66 @@ def filter_basic(
         min_year = None
         max_year = None
 
+    return allowed_types, allowed_sources, has_continuations, min_year, max_year
+
+
+def _print_header(total):
     print("=" * 70)
     print("BASIC ANIME FILTERING")
     print("=" * 70)
-    print(f"Total anime: {len(anime_dict)}")
+    print(f"Total anime: {total}")
 
-    filtered = {}
-    stats = {
+
+def _print_statistics(
+    total,
+    stats,
+    remaining,
+    *,
+    allowed_types,
+    allowed_sources,
+    watched_anime,
+    has_continuations,
+    exclude_rating_g,
+    min_rating,
+    min_episodes,
+    max_episodes,
+    min_year,
+    max_year,
+):
+    print("\n" + "=" * 70)
+    print("FILTERING STATISTICS")
+    print("=" * 70)
+    print(f"Original count:                {total}")
+    if allowed_types is not None:
+        types_label = ", ".join(sorted(allowed_types))
+        print(f"Excluded by type ({types_label}): {stats['wrong_type']}")
+    if allowed_sources is not None:
+        sources_label = ", ".join(sorted(allowed_sources))
+        print(f"Excluded by source ({sources_label}): {stats['wrong_source']}")
+    if watched_anime:
+        print(f"Excluded (already watched):    {stats['watched']}")
+    if has_continuations is not None:
+        label = "with continuations" if has_continuations else "without continuations"
+        print(f"Excluded ({label}):            {stats['continuations']}")
+    if exclude_rating_g:
+        print(f"Excluded (G rating):           {stats['rating_g']}")
+    if min_rating is not None:
+        print(f"Excluded (low score):          {stats['low_score']}")
+    if min_episodes is not None or max_episodes is not None:
+        print(f"Excluded (episode count):      {stats['episodes']}")
+    if min_year is not None or max_year is not None:
+        year_range = []
+        if min_year is not None:
+            year_range.append(f"from {min_year}")
+        if max_year is not None:
+            year_range.append(f"to {max_year}")
+        print(f"Excluded (year {', '.join(year_range)}): {stats['year']}")
+    print(f"Remaining:                     {remaining}")
+    print("=" * 70)
+
+
+def _empty_stats():
+    return {
         "wrong_type": 0,
         "wrong_source": 0,
         "watched": 0,
@@ -229,8 +221,34 @@ def filter_basic(
         "year": 0,
     }
 
+
+def filter_basic(
+    anime_dict,
+    *,
+    type_of_anime=None,
+    source_material=None,
+    has_continuations=None,
+    exclude_rating_g=True,
+    min_rating=6.0,
+    min_episodes=None,
+    max_episodes=None,
+    min_year=None,
+    max_year=None,
+    watched_anime=None,
+):
+    """Basic anime filtering. Returns a filtered dictionary."""
+    allowed_types, allowed_sources, has_continuations, min_year, max_year = _resolve_options(
+        type_of_anime, source_material, has_continuations, min_year, max_year
+    )
+
+    _print_header(len(anime_dict))
+
+    filtered = {}
+    stats = _empty_stats()
+    watched = WatchedIndex(watched_anime)
+
     for anime_name, anime_data in anime_dict.items():
-        if watched_anime and is_watched(anime_name, watched_anime):
+        if watched and anime_name in watched:
             stats["watched"] += 1
             continue
 
@@ -256,20 +274,13 @@ def filter_basic(
             continue
 
         if min_rating is not None:
-            rating_value = anime_data.get("rating")
-            if rating_value is None:
-                stats["low_score"] += 1
-                continue
-            try:
-                if float(rating_value) < min_rating:
-                    stats["low_score"] += 1
-                    continue
-            except (ValueError, TypeError):
+            score = _entry_score(anime_data)
+            if score is None or score < min_rating:
                 stats["low_score"] += 1
                 continue
 
         if min_episodes is not None or max_episodes is not None:
-            episodes = _parse_episodes(anime_data.get("Эпизоды"))
+            episodes = _entry_episodes(anime_data)
             if episodes is None:
                 stats["episodes"] += 1
                 continue
@@ -281,7 +292,7 @@ def filter_basic(
                 continue
 
         if min_year is not None or max_year is not None:
-            air_year = _extract_air_year(anime_data.get("Статус"))
+            air_year = _entry_air_year(anime_data)
             if air_year is None:
                 stats["year"] += 1
                 continue
@@ -294,40 +305,325 @@ def filter_basic(
 
         filtered[anime_name] = dict(anime_data)
 
-    print("\n" + "=" * 70)
-    print("FILTERING STATISTICS")
-    print("=" * 70)
-    print(f"Original count:                {len(anime_dict)}")
+    _print_statistics(
+        len(anime_dict),
+        stats,
+        len(filtered),
+        allowed_types=allowed_types,
+        allowed_sources=allowed_sources,
+        watched_anime=watched_anime,
+        has_continuations=has_continuations,
+        exclude_rating_g=exclude_rating_g,
+        min_rating=min_rating,
+        min_episodes=min_episodes,
+        max_episodes=max_episodes,
+        min_year=min_year,
+        max_year=max_year,
+    )
+
+    return filtered
+
+
+def _range_condition(column, low, high):
+    parts, params = [], []
+    if low is not None:
+        parts.append(f"{column} >= ?")
+        params.append(low)
+    if high is not None:
+        parts.append(f"{column} <= ?")
+        params.append(high)
+    return " AND ".join(parts), params
+
+
+def filter_basic_store(
+    store,
+    *,
+    type_of_anime=None,
+    source_material=None,
+    has_continuations=None,
+    exclude_rating_g=True,
+    min_rating=6.0,
+    min_episodes=None,
+    max_episodes=None,
+    min_year=None,
+    max_year=None,
+    watched_anime=None,
+    extra_conditions=(),
+):
+    """
+    filter_basic over an anime_store.AnimeStore: the settings are compiled
+    into SQL and only the surviving entries are loaded. Statistics are the
+    same as those of filter_basic.
+
+    Args:
+        store: open AnimeStore.
+        extra_conditions: further (statistics key, SQL, params) conditions
+            applied in the same query after the basic ones, e.g. the genre
+            filter of 4_filter_romantic.genre_conditions.
+
+    Returns:
+        (filtered dictionary, statistics of extra_conditions with "total" —
+        the number of entries that passed the basic filter).
+    """
+    allowed_types, allowed_sources, has_continuations, min_year, max_year = _resolve_options(
+        type_of_anime, source_material, has_continuations, min_year, max_year
+    )
+
+    total = store.count()
+    _print_header(total)
+
+    conditions = []
+    if watched_anime:
+        condition = watched_condition(watched_anime)
+        if condition is not None:
+            conditions.append(condition)
     if allowed_types is not None:
-        types_label = ", ".join(sorted(allowed_types))
-        print(f"Excluded by type ({types_label}): {stats['wrong_type']}")
+        types = sorted(allowed_types)
+        conditions.append(("wrong_type", f"type IN ({', '.join('?' * len(types))})", types))
     if allowed_sources is not None:
-        sources_label = ", ".join(sorted(allowed_sources))
-        print(f"Excluded by source ({sources_label}): {stats['wrong_source']}")
+        sources = sorted(allowed_sources)
+        conditions.append(("wrong_source", f"source IN ({', '.join('?' * len(sources))})", sources))
+    if has_continuations is not None:
+        conditions.append(("continuations", "continuations > 0" if has_continuations else "continuations = 0", []))
+    if exclude_rating_g:
+        conditions.append(("rating_g", "age_rating IS NOT 'G'", []))
+    if min_rating is not None:
+        conditions.append(("low_score", "score >= ?", [min_rating]))
+    if min_episodes is not None or max_episodes is not None:
+        conditions.append(("episodes", *_range_condition("episodes", min_episodes, max_episodes)))
+    if min_year is not None or max_year is not None:
+        conditions.append(("year", *_range_condition("air_year", min_year, max_year)))
+
+    filtered, counts = store.select(conditions + list(extra_conditions))
+
+    stats = _empty_stats()
+    basic_keys = {key for key, _, _ in conditions}
+    stats.update({key: count for key, count in counts.items() if key in basic_keys})
+    passed_basic = total - sum(stats.values())
+
+    _print_statistics(
+        total,
+        stats,
+        passed_basic,
+        allowed_types=allowed_types,
+        allowed_sources=allowed_sources,
+        watched_anime=watched_anime,
+        has_continuations=has_continuations,
+        exclude_rating_g=exclude_rating_g,
+        min_rating=min_rating,
+        min_episodes=min_episodes,
+        max_episodes=max_episodes,
+        min_year=min_year,
+        max_year=max_year,
+    )
+
+    extra_stats = {key: count for key, count in counts.items() if key not in basic_keys}
+    extra_stats["total"] = passed_basic
+    return filtered, extra_stats
+
+
+def _range_mask(column, low, high):
+    if low is not None and high is not None:
+        return (column >= low) & (column <= high)
+    if low is not None:
+        return column >= low
+    return column <= high
+
+
+def filter_basic_columns(
+    anime_dict,
+    snapshot,
+    *,
+    type_of_anime=None,
+    source_material=None,
+    has_continuations=None,
+    exclude_rating_g=True,
+    min_rating=6.0,
+    min_episodes=None,
+    max_episodes=None,
+    min_year=None,
+    max_year=None,
+    watched_anime=None,
+):
+    """
+    filter_basic evaluated as boolean masks over an
+    anime_columns.ColumnSnapshot of anime_dict. Result and statistics are
+    the same as those of filter_basic.
+
+    Args:
+        anime_dict: the processed database the snapshot was written from.
+        snapshot: open ColumnSnapshot (snapshot.matches(anime_dict) must hold).
+    """
+    if not snapshot.matches(anime_dict):
+        raise ValueError("Column snapshot does not match the database; rebuild it with 2_process_raw.py --columns")
+
+    allowed_types, allowed_sources, has_continuations, min_year, max_year = _resolve_options(
+        type_of_anime, source_material, has_continuations, min_year, max_year
+    )
+
+    _print_header(len(anime_dict))
+
+    # Unknown numbers are NaN, and every comparison with NaN is False
+    conditions = []
     if watched_anime:
-        print(f"Excluded (already watched):    {stats['watched']}")
+        conditions.append(("watched", ~snapshot.watched_mask(watched_anime)))
+    if allowed_types is not None:
+        conditions.append(("wrong_type", snapshot.category_mask("type", allowed_types)))
+    if allowed_sources is not None:
+        conditions.append(("wrong_source", snapshot.category_mask("source", allowed_sources)))
     if has_continuations is not None:
-        label = "with continuations" if has_continuations else "without continuations"
-        print(f"Excluded ({label}):            {stats['continuations']}")
+        has = snapshot.continuations > 0
+        conditions.append(("continuations", has if has_continuations else ~has))
     if exclude_rating_g:
-        print(f"Excluded (G rating):           {stats['rating_g']}")
+        conditions.append(("rating_g", ~snapshot.category_mask("age_rating", ["G"])))
     if min_rating is not None:
-        print(f"Excluded (low score):          {stats['low_score']}")
+        conditions.append(("low_score", snapshot.score >= min_rating))
     if min_episodes is not None or max_episodes is not None:
-        print(f"Excluded (episode count):      {stats['episodes']}")
+        conditions.append(("episodes", _range_mask(snapshot.episodes, min_episodes, max_episodes)))
     if min_year is not None or max_year is not None:
-        year_range = []
-        if min_year is not None:
-            year_range.append(f"from {min_year}")
-        if max_year is not None:
-            year_range.append(f"to {max_year}")
-        print(f"Excluded (year {', '.join(year_range)}): {stats['year']}")
-    print(f"Remaining:                     {len(filtered)}")
-    print("=" * 70)
+        conditions.append(("year", _range_mask(snapshot.air_year, min_year, max_year)))
+
+    rows, counts = snapshot.select(conditions)
+    titles = list(anime_dict)
+    filtered = {titles[i]: dict(anime_dict[titles[i]]) for i in rows.tolist()}
+
+    stats = _empty_stats()
+    stats.update(counts)
+
+    _print_statistics(
+        len(anime_dict),
+        stats,
+        len(filtered),
+        allowed_types=allowed_types,
+        allowed_sources=allowed_sources,
+        watched_anime=watched_anime,
+        has_continuations=has_continuations,
+        exclude_rating_g=exclude_rating_g,
+        min_rating=min_rating,
+        min_episodes=min_episodes,
+        max_episodes=max_episodes,
+        min_year=min_year,
+        max_year=max_year,
+    )
 
     return filtered
 
 
+def _in_range(value, low, high):
+    if value is None:
+        return False
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def _basic_checks(
+    allowed_types,
+    allowed_sources,
+    has_continuations,
+    exclude_rating_g,
+    min_rating,
+    min_episodes,
+    max_episodes,
+    min_year,
+    max_year,
+    watched_anime,
+):
+    """The criteria of filter_basic as filter_plan.Check objects, in the same order."""
+    checks = []
+    watched = WatchedIndex(watched_anime)
+    if watched:
+        checks.append(Check("watched", lambda title, entry: title not in watched))
+    if allowed_types is not None:
+        checks.append(Check("wrong_type", lambda title, entry: entry.get("Тип") in allowed_types))
+    if allowed_sources is not None:
+        checks.append(Check("wrong_source", lambda title, entry: entry.get("Первоисточник") in allowed_sources))
+    if has_continuations is not None:
+        checks.append(Check(
+            "continuations", lambda title, entry: _has_continuations(entry) == has_continuations
+        ))
+    if exclude_rating_g:
+        checks.append(Check("rating_g", lambda title, entry: entry.get("Рейтинг") != "G"))
+    if min_rating is not None:
+        checks.append(Check("low_score", lambda title, entry: _in_range(_entry_score(entry), min_rating, None)))
+    if min_episodes is not None or max_episodes is not None:
+        checks.append(Check(
+            "episodes", lambda title, entry: _in_range(_entry_episodes(entry), min_episodes, max_episodes)
+        ))
+    if min_year is not None or max_year is not None:
+        checks.append(Check("year", lambda title, entry: _in_range(_entry_air_year(entry), min_year, max_year)))
+    return checks
+
+
+def filter_basic_plan(
+    anime_dict,
+    *,
+    type_of_anime=None,
+    source_material=None,
+    has_continuations=None,
+    exclude_rating_g=True,
+    min_rating=6.0,
+    min_episodes=None,
+    max_episodes=None,
+    min_year=None,
+    max_year=None,
+    watched_anime=None,
+    extra_checks=(),
+):
+    """
+    filter_basic as an adaptive filter_plan.FilterPlan: the checks run
+    cheapest-and-most-selective first, and extra_checks (e.g. the genre
+    filter of 4_filter_romantic.genre_checks) are evaluated in the same
+    pass. Each excluded entry is counted for the first check it failed in
+    the plan's order (see filter_plan), so when an entry fails several
+    criteria the per-reason split can differ from filter_basic followed by
+    the extra checks; the result and the number excluded are the same.
+
+    Returns:
+        (filtered dictionary, statistics of extra_checks with "total" —
+        the number of entries no basic check excluded).
+    """
+    allowed_types, allowed_sources, has_continuations, min_year, max_year = _resolve_options(
+        type_of_anime, source_material, has_continuations, min_year, max_year
+    )
+
+    _print_header(len(anime_dict))
+
+    checks = _basic_checks(
+        allowed_types, allowed_sources, has_continuations, exclude_rating_g,
+        min_rating, min_episodes, max_episodes, min_year, max_year, watched_anime,
+    )
+    basic_keys = {check.key for check in checks}
+    plan = FilterPlan(checks + list(extra_checks))
+    filtered = {title: dict(entry) for title, entry in plan.run(anime_dict.items())}
+    plan.print_report()
+
+    counts = plan.stats()
+    stats = _empty_stats()
+    stats.update({key: count for key, count in counts.items() if key in basic_keys})
+    # Entries no basic check rejected in plan order; the rest of the
+    # exclusions are counted by the extra checks
+    passed_basic = len(anime_dict) - sum(stats.values())
+
+    _print_statistics(
+        len(anime_dict),
+        stats,
+        passed_basic,
+        allowed_types=allowed_types,
+        allowed_sources=allowed_sources,
+        watched_anime=watched_anime,
+        has_continuations=has_continuations,
+        exclude_rating_g=exclude_rating_g,
+        min_rating=min_rating,
+        min_episodes=min_episodes,
+        max_episodes=max_episodes,
+        min_year=min_year,
+        max_year=max_year,
+    )
+
+    extra_stats = {key: count for key, count in counts.items() if key not in basic_keys}
+    extra_stats["total"] = passed_basic
+    return filtered, extra_stats
+
+
 if __name__ == '__main__':
     input_file = 'data/processed/anime_database.json'
     output_file = 'data/processed/filtered_anime.json'
@@ -336,11 +632,8 @@ if __name__ == '__main__':
         print(f"File not found: {input_file}")
         print("Run first: python src/2_process_raw.py")
     else:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_io.load(input_file)
         anime_dict = data.get('anime', data)
         result = filter_basic(anime_dict, type_of_anime="TV Сериал")
-        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        json_io.dump(result, output_file)
         print(f"\nResult saved to {output_file}")
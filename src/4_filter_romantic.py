@@ -1,6 +1,171 @@
 import json
 from pathlib import Path
 
+from analytic_options import registry
+from analyze_raw import split_tokens
+from filter_plan import Check
+from tag_index import TagIndex, entry_tokens, popcount
+from tag_query import compile_query
+
+
+def _matches_any(tokens, values):
+    """True if all tokens of at least one value are among the entry tokens."""
+    return any(all(token in tokens for token in value) for value in values)
+
+
+def _check_values(
+    *,
+    excluded_genres=None,
+    excluded_themes=None,
+    required_genres=None,
+    required_themes=None,
+    query=None,
+):
+    """
+    Warn about values with a token that analytic.json does not list (such a
+    value can match no anime). The filter itself is not changed; without
+    analytic.json nothing is checked. An invalid query raises ValueError.
+    """
+    tags = [] if not query else [
+        ('query', tag.kinds, tag.value) for tag in compile_query(query).tags()
+    ]
+    if not registry.exists():
+        return
+    for setting_name, kind, values in (
+        ('required_genres', 'genres', required_genres),
+        ('required_themes', 'themes', required_themes),
+        ('excluded_genres', 'genres', excluded_genres),
+        ('excluded_themes', 'themes', excluded_themes),
+    ):
+        tags.extend((setting_name, (kind,), value) for value in values or [])
+    for setting_name, kinds, value in tags:
+        unknown = [
+            token for token in split_tokens(value)
+            if not any(registry.is_valid(kind, token) for kind in kinds)
+        ]
+        if unknown:
+            print(
+                f"Warning: unknown {' / '.join(kinds)} token(s) {', '.join(unknown)} in '{value}' "
+                f"for '{setting_name}'. See valid options in data/processed/analytic.json."
+            )
+
+
+def print_statistics(
+    stats,
+    final_count,
+    *,
+    excluded_genres=None,
+    excluded_themes=None,
+    required_genres=None,
+    required_themes=None,
+    query=None,
+):
+    """Print the report of a genre & theme filtering run."""
+    print("\n" + "=" * 60)
+    print("GENRE & THEME FILTERING")
+    print("=" * 60)
+    print(f"Total anime: {stats['total']}")
+
+    print("\n" + "=" * 60)
+    print("FILTERING STATISTICS")
+    print("=" * 60)
+    print(f"Total in source database:                 {stats['total']}")
+    if required_genres:
+        print(f"Filtered by required genres:              {stats['filtered_by_required_genres']}")
+    if required_themes:
+        print(f"Filtered by required themes:               {stats['filtered_by_required_themes']}")
+    if excluded_genres:
+        print(f"Filtered by excluded genres:               {stats['filtered_by_excluded_genres']}")
+    if excluded_themes:
+        print(f"Filtered by excluded themes:               {stats['filtered_by_excluded_themes']}")
+    if query:
+        print(f"Filtered by query:                         {stats['filtered_by_query']}")
+        print(f"  {compile_query(query)}")
+    print(f"Final count:                               {final_count}")
+    print("=" * 60)
+
+
+def genre_conditions(
+    store,
+    *,
+    excluded_genres=None,
+    excluded_themes=None,
+    required_genres=None,
+    required_themes=None,
+    query=None,
+):
+    """
+    The filter of filter_romantic_anime as SQL conditions over an
+    anime_store.AnimeStore, in the same order and with the same token
+    matching, for 3_filter_basic.filter_basic_store(extra_conditions=...).
+    """
+    _check_values(
+        excluded_genres=excluded_genres,
+        excluded_themes=excluded_themes,
+        required_genres=required_genres,
+        required_themes=required_themes,
+        query=query,
+    )
+    conditions = []
+    for key, kind, values, required in (
+        ('filtered_by_required_genres', 'genres', required_genres, True),
+        ('filtered_by_required_themes', 'themes', required_themes, True),
+        ('filtered_by_excluded_genres', 'genres', excluded_genres, False),
+        ('filtered_by_excluded_themes', 'themes', excluded_themes, False),
+    ):
+        if values:
+            sql, params = store.tag_predicate(kind, list(values))
+            conditions.append((key, sql if required else f"NOT {sql}", params))
+    if query:
+        conditions.append(('filtered_by_query', *compile_query(query).to_sql(store)))
+    return conditions
+
+
+def genre_checks(
+    *,
+    excluded_genres=None,
+    excluded_themes=None,
+    required_genres=None,
+    required_themes=None,
+    query=None,
+):
+    """
+    The filter of filter_romantic_anime as filter_plan.Check objects, in
+    the same order and with the same token matching, for
+    3_filter_basic.filter_basic_plan(extra_checks=...).
+    """
+    _check_values(
+        excluded_genres=excluded_genres,
+        excluded_themes=excluded_themes,
+        required_genres=required_genres,
+        required_themes=required_themes,
+        query=query,
+    )
+
+    def check(key, kind, values, required):
+        value_tokens = [split_tokens(value) for value in values]
+        if required:
+            return Check(key, lambda title, info: _matches_any(entry_tokens(info, kind), value_tokens))
+        return Check(key, lambda title, info: not _matches_any(entry_tokens(info, kind), value_tokens))
+
+    checks = [
+        check(key, kind, values, required)
+        for key, kind, values, required in (
+            ('filtered_by_required_genres', 'genres', required_genres, True),
+            ('filtered_by_required_themes', 'themes', required_themes, True),
+            ('filtered_by_excluded_genres', 'genres', excluded_genres, False),
+            ('filtered_by_excluded_themes', 'themes', excluded_themes, False),
+        )
+        if values
+    ]
+    if query:
+        compiled = compile_query(query)
+        checks.append(Check(
+            'filtered_by_query',
+            lambda title, info: compiled.matches(entry_tokens(info, 'genres'), entry_tokens(info, 'themes')),
+        ))
+    return checks
+
 
 def filter_romantic_anime(
     anime_data,
@@ -9,6 +174,8 @@ def filter_romantic_anime(
     excluded_themes=None,
     required_genres=None,
     required_themes=None,
+    query=None,
+    index=None,
 ):
     """
     Filter anime by genres and themes. Returns a filtered dictionary.
@@ -18,65 +185,76 @@ def filter_romantic_anime(
     - at least one theme from required_themes (if the list is not empty)
     - no genres from excluded_genres
     - no themes from excluded_themes
+    - the boolean query, e.g. "(Романтика AND Драма) OR NOT Школа"
+      (see tag_query), if given
+
+    A value matches an entry when each of its words is one of the entry's
+    genre / theme tokens, so "Romance" does not match "Romantic Subtext".
+    The criteria are evaluated as bitset operations over a
+    tag_index.TagIndex.
+
+    Args:
+        query: boolean genre / theme expression, an alternative to (or a
+            refinement of) the lists; invalid syntax raises ValueError.
+        index: TagIndex of the database anime_data was selected from, to
+            reuse one index across calls; by default (or if it lacks some
+            of the titles) an index of anime_data is built.
     """
     excluded_genres = excluded_genres or []
     excluded_themes = excluded_themes or []
     required_genres = required_genres or []
     required_themes = required_themes or []
+    _check_values(
+        excluded_genres=excluded_genres,
+        excluded_themes=excluded_themes,
+        required_genres=required_genres,
+        required_themes=required_themes,
+        query=query,
+    )
 
-    print("\n" + "=" * 60)
-    print("GENRE & THEME FILTERING")
-    print("=" * 60)
-    print(f"Total anime: {len(anime_data)}")
+    if index is not None and index.covers(anime_data):
+        remaining = index.mask(anime_data)
+    else:
+        index = TagIndex(anime_data)
+        remaining = index.all
 
-    filtered_data = {}
     stats = {
         'total': len(anime_data),
         'filtered_by_required_genres': 0,
         'filtered_by_required_themes': 0,
         'filtered_by_excluded_genres': 0,
         'filtered_by_excluded_themes': 0,
+        'filtered_by_query': 0,
     }
 
-    for title, info in anime_data.items():
-        genres_combined = info.get('Жанры', '')
-        themes_combined = info.get('Темы', '')
-
-        if required_genres:
-            if not any(genre in genres_combined for genre in required_genres):
-                stats['filtered_by_required_genres'] += 1
-                continue
-
-        if required_themes:
-            if not any(theme in themes_combined for theme in required_themes):
-                stats['filtered_by_required_themes'] += 1
-                continue
+    # Each step only counts the entries that passed the previous ones
+    for key, kind, values, required in (
+        ('filtered_by_required_genres', 'genres', required_genres, True),
+        ('filtered_by_required_themes', 'themes', required_themes, True),
+        ('filtered_by_excluded_genres', 'genres', excluded_genres, False),
+        ('filtered_by_excluded_themes', 'themes', excluded_themes, False),
+    ):
+        if values:
+            matches = index.any_of(kind, values)
+            excluded = remaining & ~matches if required else remaining & matches
+            stats[key] = popcount(excluded)
+            remaining &= ~excluded
+    if query:
+        matched = compile_query(query).evaluate(index, remaining)
+        stats['filtered_by_query'] = popcount(remaining & ~matched)
+        remaining = matched
 
-        if excluded_genres:
-            if any(genre in genres_combined for genre in excluded_genres):
-                stats['filtered_by_excluded_genres'] += 1
-                continue
+    kept = set(index.select(remaining))
+    filtered_data = {title: info for title, info in anime_data.items() if title in kept}
 
-        if excluded_themes:
-            if any(theme in themes_combined for theme in excluded_themes):
-                stats['filtered_by_excluded_themes'] += 1
-                continue
-
-        filtered_data[title] = info
-
-    print("\n" + "=" * 60)
-    print("FILTERING STATISTICS")
-    print("=" * 60)
-    print(f"Total in source database:                 {stats['total']}")
-    if required_genres:
-        print(f"Filtered by required genres:              {stats['filtered_by_required_genres']}")
-    if required_themes:
-        print(f"Filtered by required themes:               {stats['filtered_by_required_themes']}")
-    if excluded_genres:
-        print(f"Filtered by excluded genres:               {stats['filtered_by_excluded_genres']}")
-    if excluded_themes:
-        print(f"Filtered by excluded themes:               {stats['filtered_by_excluded_themes']}")
-    print(f"Final count:                               {len(filtered_data)}")
-    print("=" * 60)
+    print_statistics(
+        stats,
+        len(filtered_data),
+        excluded_genres=excluded_genres,
+        excluded_themes=excluded_themes,
+        required_genres=required_genres,
+        required_themes=required_themes,
+        query=query,
+    )
 
     return filtered_data
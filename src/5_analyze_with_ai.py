@@ -1,5 +1,4 @@
 import hashlib
-import json
 import os
 from pathlib import Path
 from typing import Literal
@@ -9,6 +8,8 @@ from dotenv import load_dotenv
 from openai import OpenAI
 from pydantic import BaseModel, create_model
 
+import json_io
+
 load_dotenv(".env")
 
 DEFAULT_CACHE_FILE = "data/cache/ai_analysis.json"
@@ -65,17 +66,15 @@ def load_analysis_cache(cache_file: Path) -> dict:
     if not cache_file.exists():
         return {}
     try:
-        with open(cache_file, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
+        return json_io.load(cache_file)
+    except (ValueError, OSError) as e:
         print(f"Failed to load cache ({cache_file}): {e}")
         return {}
 
 
 def save_analysis_cache(cache: dict, cache_file: Path) -> None:
-    cache_file.parent.mkdir(parents=True, exist_ok=True)
-    with open(cache_file, "w", encoding="utf-8") as f:
-        json.dump(cache, f, ensure_ascii=False, indent=2)
+    # Rewritten after every API answer: compact and atomic
+    json_io.dump(cache, cache_file, pretty=False)
 
 
 def get_cached_analysis(
@@ -4,9 +4,10 @@
 Final anime filtering based on AI analysis results.
 """
 
-import json
 from pathlib import Path
 
+import json_io
+
 
 def get_min_age(age_str):
     """
@@ -80,10 +81,7 @@ if __name__ == "__main__":
     if not input_file.exists():
         print(f"File not found: {input_file}")
     else:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            anime_data = json.load(f)
+        anime_data = json_io.load(input_file)
         result = filter_anime(anime_data)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        json_io.dump(result, output_file)
         print(f"\nResult saved to {output_file}")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-wide registry of the valid filter options listed in analytic.json.
+
+3_filter_basic validates type_of_anime / source_material and
+4_filter_romantic checks genre / theme values against the values that
+analyze_raw.py found in the database. The registry parses analytic.json
+once and keeps the options as frozensets, so every check is a set
+lookup; before answering it compares the file's mtime and size with the
+loaded copy and reloads only when analytic.json was rewritten. A
+long-lived process running many filter profiles therefore reads the
+file once per analytics run, not once per filter call.
+"""
+
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional, Tuple
+
+import json_io
+
+ANALYTIC_FILE = Path(__file__).resolve().parent.parent / "data/processed/analytic.json"
+OPTION_KINDS = ("types", "sources", "genres", "themes")
+
+
+class AnalyticOptions:
+    """
+    Valid options of analytic.json, reloaded when the file changes.
+
+    Args:
+        path: analytic.json written by analyze_raw.py.
+    """
+
+    def __init__(self, path: Path = ANALYTIC_FILE):
+        self.path = Path(path)
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._options: Dict[str, FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+
+    def _current(self) -> Dict[str, FrozenSet[str]]:
+        # Raises FileNotFoundError if analytic.json is missing
+        stat = self.path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    data = json_io.load(self.path)
+                    self._options = {kind: frozenset(data.get(kind, [])) for kind in OPTION_KINDS}
+                    self._stamp = stamp
+        return self._options
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def options(self, kind: str) -> FrozenSet[str]:
+        """All valid values of kind ("types", "sources", "genres" or "themes")."""
+        return self._current()[kind]
+
+    def is_valid(self, kind: str, value: str) -> bool:
+        """True if analytic.json lists value among the options of kind."""
+        return value in self._current()[kind]
+
+
+# Shared by the filters of this process
+registry = AnalyticOptions()
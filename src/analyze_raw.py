@@ -6,12 +6,34 @@ Analytics for the processed anime_database.json:
 - unique values in Жанры and Темы fields
 - unique values for Тип, Первоисточник, Статус
 - title key patterns: "Russian title / English title"
+
+The database is counted in chunks of CHUNK_SIZE entries, on several
+processes with --workers (fork start method only; elsewhere the count
+runs in one process), and the partial counts are merged. The counts are
+kept in a sidecar file (analytic_counts.json) with the database
+generation they describe, so with --incremental the delta written by
+2_process_raw.py --incremental is applied to them instead of rescanning
+the database. Titles of unusual format are listed in a report file
+(analytic_odd_titles.txt).
 """
 
-import json
+import argparse
+import multiprocessing
+import os
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import json_io
+
+CHUNK_SIZE = 20000
+COUNTS_FILE = 'data/processed/analytic_counts.json'
+ODD_TITLES_FILE = 'data/processed/analytic_odd_titles.txt'
+# Written by 2_process_raw.py
+MANIFEST_FILE = 'data/processed/anime_manifest.json'
+DELTA_FILE = 'data/processed/anime_delta.json'
+
 
 MONTH_PATTERN = re.compile(
     r'(?:'
@@ -76,19 +98,14 @@ def title_to_pattern(title: str) -> str:
     return 'no separator'
 
 
-def _collect_title_patterns(titles: list[str]) -> dict[str, int]:
-    counts: dict[str, int] = {}
-    for title in titles:
-        pattern = title_to_pattern(title)
-        if pattern == 'no separator':
-            print('title without separator:', title)
-        elif pattern == 'multiple_parts (3)':
-            print('title with multiple parts:', title)
-        counts[pattern] = counts.get(pattern, 0) + 1
-    return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+# Title patterns listed in the odd titles report
+ODD_TITLE_MESSAGES = {
+    'no separator': 'title without separator',
+    'multiple_parts (3)': 'title with multiple parts',
+}
 
 
-def _split_tokens(value: str) -> list[str]:
+def split_tokens(value: str) -> list[str]:
     """
     Split a string into individual values.
     Data format: pairs separated by space (EN RU EN RU ...),
@@ -111,64 +128,185 @@ def _split_tokens(value: str) -> list[str]:
     return values
 
 
-def collect_analytics(anime_dict: dict) -> dict:
-    field_keys: set[str] = set()
-    genres: set[str] = set()
-    themes: set[str] = set()
-    types: set[str] = set()
-    sources: set[str] = set()
-    statuses: set[str] = set()
+COUNTER_FIELDS = ('field_keys', 'genres', 'themes', 'types', 'sources', 'statuses', 'title_patterns')
+
+
+def _empty_counts() -> dict:
+    counts = {field: Counter() for field in COUNTER_FIELDS}
+    counts['total'] = 0
+    counts['odd_titles'] = {}
+    return counts
 
-    with_status = 0
-    without_status = 0
 
-    for anime_data in anime_dict.values():
-        field_keys.update(anime_data.keys())
+def _count_entries(items) -> dict:
+    """Counts of one chunk of (title, entry) pairs."""
+    # Plain dicts in the loop (faster than Counter); few distinct key sets
+    # and genre / theme strings, so those are counted whole and split once
+    key_sets = {}
+    genre_values = {}
+    theme_values = {}
+    types = {}
+    sources = {}
+    statuses = {}
+    title_patterns = {}
+    odd_titles = {}
+
+    for title, anime_data in items:
+        key_set = tuple(anime_data)
+        key_sets[key_set] = key_sets.get(key_set, 0) + 1
 
         if genre_value := anime_data.get('Жанры'):
-            genres.update(_split_tokens(genre_value))
+            genre_values[genre_value] = genre_values.get(genre_value, 0) + 1
 
         if theme_value := anime_data.get('Темы'):
-            themes.update(_split_tokens(theme_value))
+            theme_values[theme_value] = theme_values.get(theme_value, 0) + 1
 
         if type_value := anime_data.get('Тип'):
-            types.add(type_value)
+            types[type_value] = types.get(type_value, 0) + 1
 
         if source_value := anime_data.get('Первоисточник'):
-            sources.add(source_value)
+            sources[source_value] = sources.get(source_value, 0) + 1
 
         if status_value := anime_data.get('Статус'):
-            statuses.add(status_value)
-            with_status += 1
+            statuses[status_value] = statuses.get(status_value, 0) + 1
+
+        pattern = title_to_pattern(title)
+        title_patterns[pattern] = title_patterns.get(pattern, 0) + 1
+        if pattern in ODD_TITLE_MESSAGES:
+            odd_titles[title] = pattern
+
+    counts = _empty_counts()
+    for field, values in (('types', types), ('sources', sources), ('statuses', statuses),
+                          ('title_patterns', title_patterns)):
+        counts[field].update(values)
+    counts['odd_titles'] = odd_titles
+    for key_set, count in key_sets.items():
+        counts['total'] += count
+        for key in key_set:
+            counts['field_keys'][key] += count
+    for field, values in (('genres', genre_values), ('themes', theme_values)):
+        for value, count in values.items():
+            for token in split_tokens(value):
+                counts[field][token] += count
+    return counts
+
+
+def _merge_counts(total: dict, part: dict, sign: int = 1) -> None:
+    """Add part to total (sign=-1: subtract it, e.g. removed entries)."""
+    for field in COUNTER_FIELDS:
+        if sign > 0:
+            total[field].update(part[field])
         else:
-            without_status += 1
+            total[field].subtract(part[field])
+            # Values no entry has any more disappear
+            total[field] = +total[field]
+    total['total'] += sign * part['total']
+    if sign > 0:
+        total['odd_titles'].update(part['odd_titles'])
+    else:
+        for title in part['odd_titles']:
+            total['odd_titles'].pop(title, None)
+
+
+# (title, entry) pairs for the forked workers of collect_counts
+_shared_items = None
+
 
-    title_patterns = _collect_title_patterns(list(anime_dict.keys()))
+def _count_range(bounds) -> dict:
+    start, stop = bounds
+    return _count_entries(_shared_items[start:stop])
+
+
+def collect_counts(anime_dict: dict, workers: int = 1, chunk_size: int = CHUNK_SIZE) -> dict:
+    """
+    Counts behind the analytics: {field: Counter} for COUNTER_FIELDS,
+    'total' and 'odd_titles' ({title: pattern}).
+
+    With workers > 1 the entries are split into chunks of chunk_size
+    counted on worker processes. Workers are forked and read the entries
+    from the parent's memory, so only the small partial counts travel
+    between processes; without the fork start method (Windows) the count
+    runs in this process.
+    """
+    global _shared_items
+    fork = 'fork' in multiprocessing.get_all_start_methods()
+    if workers <= 1 or len(anime_dict) <= chunk_size or not fork:
+        return _count_entries(anime_dict.items())
+
+    _shared_items = list(anime_dict.items())
+    total = _empty_counts()
+    try:
+        ranges = [(start, min(start + chunk_size, len(_shared_items)))
+                  for start in range(0, len(_shared_items), chunk_size)]
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            for part in pool.map(_count_range, ranges):
+                _merge_counts(total, part)
+    finally:
+        _shared_items = None
+    return total
+
+
+def analytics_from_counts(counts: dict) -> dict:
+    """The analytic.json structure from collect_counts output."""
+    title_patterns = dict(sorted(counts['title_patterns'].items(), key=lambda item: (-item[1], item[0])))
     matching_titles = title_patterns.get(STANDARD_TITLE_PATTERN, 0)
 
     return {
         'stats': {
-            'total_anime': len(anime_dict),
-            'total sources': len(sources),
-            'total genres': len(genres),
-            'total themes': len(themes),
-            'total types': len(types),
+            'total_anime': counts['total'],
+            'total sources': len(counts['sources']),
+            'total genres': len(counts['genres']),
+            'total themes': len(counts['themes']),
+            'total types': len(counts['types']),
             'titles_ru_en_pattern': matching_titles,
-            'titles_other_patterns': len(anime_dict) - matching_titles,
+            'titles_other_patterns': counts['total'] - matching_titles,
         },
-        'field_keys': sorted(field_keys),
-        'status_patterns': _collect_status_patterns(statuses),
+        'field_keys': sorted(counts['field_keys']),
+        'status_patterns': _collect_status_patterns(set(counts['statuses'])),
         'title_patterns': title_patterns,
-        'sources': sorted(sources),
-        'genres': sorted(genres),
-        'themes': sorted(themes),
-        'types': sorted(types)
+        'sources': sorted(counts['sources']),
+        'genres': sorted(counts['genres']),
+        'themes': sorted(counts['themes']),
+        'types': sorted(counts['types'])
     }
 
 
-def analyze_database_file(input_file, output_file):
+def collect_analytics(anime_dict: dict, workers: int = 1) -> dict:
+    return analytics_from_counts(collect_counts(anime_dict, workers))
+
+
+def _load_counts(counts_path: Path):
+    """(generation, counts) from the sidecar file, or (None, None)."""
+    if not counts_path.exists():
+        return None, None
+    data = json_io.load(counts_path)
+    counts = {field: Counter(data['counts'][field]) for field in COUNTER_FIELDS}
+    counts['total'] = data['counts']['total']
+    counts['odd_titles'] = data['counts']['odd_titles']
+    return data['generation'], counts
+
+
+def _write_odd_titles(report_path: Path, odd_titles: dict) -> None:
+    if not odd_titles:
+        # A stale report would list titles that are fixed by now
+        if report_path.exists():
+            report_path.unlink()
+        return
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        for title, pattern in sorted(odd_titles.items(), key=lambda item: (item[1], item[0])):
+            f.write(f'{ODD_TITLE_MESSAGES[pattern]}: {title}\n')
+
+
+def analyze_database_file(input_file, output_file, workers=1, incremental=False, counts_file=COUNTS_FILE,
+                          report_file=ODD_TITLES_FILE, manifest_file=MANIFEST_FILE, delta_file=DELTA_FILE):
     input_path = Path(input_file)
     output_path = Path(output_file)
+    counts_path = Path(counts_file)
+    report_path = Path(report_file)
+    manifest_path = Path(manifest_file)
+    delta_path = Path(delta_file)
 
     if not input_path.exists():
         print(f'File not found: {input_path}')
@@ -178,15 +316,34 @@ def analyze_database_file(input_file, output_file):
     print('PROCESSED DATABASE ANALYTICS')
     print('=' * 70)
 
-    with open(input_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Generation of anime_database.json, if 2_process_raw keeps a manifest
+    generation = json_io.load(manifest_path)['generation'] if manifest_path.exists() else None
+
+    counts = None
+    if incremental and generation is not None:
+        counts_generation, counts = _load_counts(counts_path)
+        delta = json_io.load(delta_path) if delta_path.exists() else None
+        if counts is not None and counts_generation == generation:
+            print(f'Counts are up to date (generation {generation})')
+        elif counts is not None and delta is not None and delta['base_generation'] == counts_generation \
+                and delta['generation'] == generation:
+            _merge_counts(counts, _count_entries(delta['removed'].items()), sign=-1)
+            _merge_counts(counts, _count_entries(delta['added'].items()))
+            print(f"Delta applied (generation {counts_generation} → {generation}): "
+                  f"{len(delta['added'])} entries added, {len(delta['removed'])} removed")
+        else:
+            counts = None
+            print('No delta matching the saved counts — rescanning the database')
 
-    anime_dict = data.get('anime', data)
-    result = collect_analytics(anime_dict)
+    if counts is None:
+        data = json_io.load(input_path)
+        anime_dict = data.get('anime', data)
+        counts = collect_counts(anime_dict, workers)
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    result = analytics_from_counts(counts)
+    json_io.dump(result, output_path)
+    json_io.dump({'generation': generation, 'counts': counts}, counts_path, pretty=False)
+    _write_odd_titles(report_path, counts['odd_titles'])
 
     stats = result['stats']
     print(f"Total anime:               {stats['total_anime']}")
@@ -203,6 +360,8 @@ def analyze_database_file(input_file, output_file):
     for pattern, count in result['title_patterns'].items():
         if pattern != STANDARD_TITLE_PATTERN:
             print(f"    {pattern}: {count}")
+    print(f"Titles of unusual format:  {len(counts['odd_titles'])}"
+          + (f' (listed in {report_path})' if counts['odd_titles'] else ''))
     print('=' * 70)
     print(f'\nResult saved to {output_path}')
 
@@ -210,7 +369,16 @@ def analyze_database_file(input_file, output_file):
 
 
 if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description="Analytics of the processed database")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Processes counting the database in chunks (default: all cores)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Apply the delta of 2_process_raw.py --incremental to the saved counts "
+                         "instead of rescanning the database")
+    args = ap.parse_args()
     analyze_database_file(
         'data/processed/anime_database.json',
         'data/processed/analytic.json',
+        workers=args.workers,
+        incremental=args.incremental,
     )
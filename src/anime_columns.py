@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar NumPy snapshot of the processed anime database.
+
+2_process_raw.py can write it next to anime_database.json (--columns).
+The snapshot is a directory of .npy files, one per field that stage 1
+filters on, in the row order of anime_database.json:
+
+    score, episodes, air_year        float64, NaN where unknown
+    continuations                    int32
+    type, source, age_rating         int16 codes into meta.json → categories, -1 if missing
+    title_hash, ru_hash, en_hash     uint64 hashes of the normalized title parts
+    meta.json                        row count, categories, digest of the titles
+
+Arrays are memory-mapped, so opening a snapshot reads nothing up front.
+3_filter_basic.filter_basic_columns evaluates BASIC_FILTER on it as
+boolean masks instead of a loop over the entries.
+"""
+
+import hashlib
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import json_io
+from anime_store import filter_fields, title_keys, watched_keys
+
+META_FILE = "meta.json"
+CATEGORY_COLUMNS = ("type", "source", "age_rating")
+NUMERIC_COLUMNS = ("score", "episodes", "air_year")
+HASH_COLUMNS = ("title_hash", "ru_hash", "en_hash")
+
+# (statistics key, boolean mask of the rows that satisfy the condition)
+MaskCondition = Tuple[str, np.ndarray]
+
+
+def title_hash(text: str) -> int:
+    """64-bit hash of a normalized title (see anime_store.title_keys)."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def titles_digest(titles: Iterable[str]) -> str:
+    """Digest of the title order; ties a snapshot to its anime_database.json."""
+    return hashlib.blake2b("\0".join(titles).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def create_snapshot(directory: str, anime_dict: Dict[str, Dict[str, Any]]) -> None:
+    """Write the snapshot of anime_dict into directory (replacing it)."""
+    path = Path(directory)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    # Rows of (type, source, age rating, score, episodes, air year, continuations)
+    fields = [filter_fields(entry) for entry in anime_dict.values()]
+    fields_by_column = list(zip(*fields)) if fields else [()] * 7
+    keys_by_column = list(zip(*map(title_keys, anime_dict))) if anime_dict else [()] * 3
+
+    categories: Dict[str, Dict[str, int]] = {}
+    columns: Dict[str, np.ndarray] = {}
+    for column, values in zip(CATEGORY_COLUMNS, fields_by_column[:3]):
+        codes = categories[column] = {}
+        columns[column] = np.array(
+            [-1 if value is None else codes.setdefault(value, len(codes)) for value in values],
+            dtype=np.int16,
+        )
+    for column, values in zip(NUMERIC_COLUMNS, fields_by_column[3:6]):
+        # None → NaN
+        columns[column] = np.array(values, dtype=float)
+    columns["continuations"] = np.array(fields_by_column[6], dtype=np.int32)
+    for column, keys in zip(HASH_COLUMNS, keys_by_column):
+        columns[column] = np.array([title_hash(key) for key in keys], dtype=np.uint64)
+
+    for column, array in columns.items():
+        np.save(tmp_path / f"{column}.npy", array)
+    meta = {
+        "count": len(anime_dict),
+        "titles_digest": titles_digest(anime_dict),
+        "categories": {column: list(codes) for column, codes in categories.items()},
+    }
+    json_io.dump(meta, tmp_path / META_FILE)
+
+    if path.exists():
+        shutil.rmtree(path)
+    tmp_path.replace(path)
+
+
+class ColumnSnapshot:
+    """
+    Read access to a snapshot written by create_snapshot.
+
+    Columns are attributes (snapshot.score, snapshot.type, ...) holding
+    read-only memory-mapped arrays.
+
+    Args:
+        directory: snapshot directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        meta = json_io.load(self.directory / META_FILE)
+        self.count: int = meta["count"]
+        self.titles_digest: str = meta["titles_digest"]
+        self.categories: Dict[str, List[str]] = meta["categories"]
+        for column in (*CATEGORY_COLUMNS, *NUMERIC_COLUMNS, *HASH_COLUMNS, "continuations"):
+            setattr(self, column, np.load(self.directory / f"{column}.npy", mmap_mode="r"))
+
+    def matches(self, anime_dict: Dict[str, Any]) -> bool:
+        """True if the snapshot rows are the entries of anime_dict, in order."""
+        return self.count == len(anime_dict) and self.titles_digest == titles_digest(anime_dict)
+
+    def category_mask(self, column: str, values: Iterable[str]) -> np.ndarray:
+        """Rows whose category column is one of values (missing never matches)."""
+        values = set(values)
+        codes = [code for code, value in enumerate(self.categories[column]) if value in values]
+        return np.isin(getattr(self, column), codes)
+
+    def watched_mask(self, watched_anime: Optional[List[str]]) -> np.ndarray:
+        """Rows that 3_filter_basic.is_watched reports as watched."""
+        mask = np.zeros(self.count, dtype=bool)
+        for column, keys in zip(HASH_COLUMNS, watched_keys(watched_anime)):
+            if keys:
+                hashes = np.array([title_hash(key) for key in keys], dtype=np.uint64)
+                mask |= np.isin(getattr(self, column), hashes)
+        return mask
+
+    def select(self, conditions: Sequence[MaskCondition]) -> Tuple[np.ndarray, Dict[str, int]]:
+        """
+        Rows that satisfy every condition, and for each condition the
+        number of rows it excluded first (in list order), like the
+        sequential checks of filter_basic.
+
+        Returns:
+            (row indices in database order, {statistics key: count}).
+        """
+        remaining = np.ones(self.count, dtype=bool)
+        stats = {key: 0 for key, _ in conditions}
+        for key, mask in conditions:
+            stats[key] += int(np.count_nonzero(remaining & ~mask))
+            remaining &= mask
+        return np.flatnonzero(remaining), stats
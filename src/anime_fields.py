@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parsing of anime entry fields shared by the pipeline stages.
+
+2_process_raw.py derives the typed fields (score, episodes, air years)
+from the display strings with these functions; 3_filter_basic.py and the
+SQLite / column stores use the same ones to parse databases written
+before the typed fields existed, and to normalize titles for the
+watched-list match. Keeping one implementation means every filter path
+reads an entry the same way.
+"""
+
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+MIN_VALID_YEAR = 1900
+
+YEAR = re.compile(r'\b(\d{4})\b')
+
+
+def valid_years(status) -> List[int]:
+    """
+    Release years mentioned in the "Статус" field.
+    Supports all patterns from analytic.json → status_patterns.
+    """
+    if not status:
+        return []
+
+    years = [int(match) for match in YEAR.findall(str(status))]
+    return [
+        year for year in years
+        if MIN_VALID_YEAR <= year <= date.today().year + 1
+    ]
+
+
+def extract_air_year(status) -> Optional[int]:
+    """Release year (the first one for ranges, e.g. "в 2011-2014 гг.") from the "Статус" field."""
+    years = valid_years(status)
+    return min(years) if years else None
+
+
+def parse_int(value) -> Optional[int]:
+    if value is None:
+        return None
+    try:
+        return int(str(value).strip())
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_float(value) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def split_title(anime_name: str) -> Tuple[str, str]:
+    """("Russian", "English") parts of "Russian / English"; English is "" if absent."""
+    if " / " in anime_name:
+        russian, english = anime_name.split(" / ", 1)
+        return russian.strip(), english.strip()
+    return anime_name.strip(), ""
+
+
+def normalize_title(title: str) -> str:
+    return title.strip().casefold()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite store of the processed anime database.
+
+2_process_raw.py can write it next to anime_database.json. Every entry is
+one row with typed, indexed columns for the fields stage 1 filters on, the
+full entry as JSON, and join tables of genre / theme tokens:
+
+    anime(id, title, title_norm, ru_norm, en_norm, type, source, age_rating,
+          score, episodes, air_year, continuations, data)
+    anime_genres(genre, anime_id)
+    anime_themes(theme, anime_id)
+
+BASIC_FILTER and Genre_FILTER are compiled into SQL conditions (see
+3_filter_basic.filter_basic_store); one indexed query returns only the
+surviving rows, and one aggregate query reproduces the per-reason
+statistics of the Python filters.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from anime_fields import extract_air_year, normalize_title, parse_float, parse_int, split_title
+
+SCHEMA = """
+CREATE TABLE anime (
+    id            INTEGER PRIMARY KEY,
+    title         TEXT NOT NULL UNIQUE,
+    title_norm    TEXT NOT NULL,
+    ru_norm       TEXT NOT NULL,
+    en_norm       TEXT NOT NULL,
+    type          TEXT,
+    source        TEXT,
+    age_rating    TEXT,
+    score         REAL,
+    episodes      INTEGER,
+    air_year      INTEGER,
+    continuations INTEGER NOT NULL,
+    data          TEXT NOT NULL
+);
+CREATE TABLE anime_genres (
+    genre    TEXT NOT NULL,
+    anime_id INTEGER NOT NULL REFERENCES anime(id),
+    PRIMARY KEY (genre, anime_id)
+) WITHOUT ROWID;
+CREATE TABLE anime_themes (
+    theme    TEXT NOT NULL,
+    anime_id INTEGER NOT NULL REFERENCES anime(id),
+    PRIMARY KEY (theme, anime_id)
+) WITHOUT ROWID;
+CREATE INDEX anime_type ON anime(type);
+CREATE INDEX anime_source ON anime(source);
+CREATE INDEX anime_score ON anime(score);
+CREATE INDEX anime_episodes ON anime(episodes);
+CREATE INDEX anime_air_year ON anime(air_year);
+CREATE INDEX anime_continuations ON anime(continuations);
+CREATE INDEX anime_title_norm ON anime(title_norm);
+CREATE INDEX anime_ru_norm ON anime(ru_norm);
+CREATE INDEX anime_en_norm ON anime(en_norm);
+"""
+
+# kind: (entry text field, join table, token column); the kind is also the
+# name of the token list field written by 2_process_raw
+TAG_KINDS = {
+    "genres": ("Жанры", "anime_genres", "genre"),
+    "themes": ("Темы", "anime_themes", "theme"),
+}
+
+# (statistics key, SQL predicate that the entry must satisfy, parameters)
+Condition = Tuple[str, str, Sequence[Any]]
+
+
+# --- Column values; same rules as the Python filters of stages 1–2 ---
+
+def _typed(entry: Dict[str, Any], field: str, text_field: str, parse) -> Any:
+    """Typed field of 2_process_raw, or parsed from the text for older databases."""
+    if field in entry:
+        return entry[field]
+    return parse(entry.get(text_field))
+
+
+def _tokens(entry: Dict[str, Any], kind: str) -> Set[str]:
+    if kind in entry:
+        return set(entry[kind])
+    return set((entry.get(TAG_KINDS[kind][0]) or "").split())
+
+
+def title_keys(title: str) -> Tuple[str, str, str]:
+    """Normalized full title, Russian part and English part ("" if none)."""
+    russian, english = split_title(title)
+    return normalize_title(title), normalize_title(russian), normalize_title(english)
+
+
+def filter_fields(entry: Dict[str, Any]) -> Tuple:
+    """
+    (type, source, age rating, score, episodes, air year, continuations)
+    of a processed entry, as stage 1 compares them; None where unknown.
+    """
+    return (
+        entry.get("Тип"),
+        entry.get("Первоисточник"),
+        entry.get("Рейтинг"),
+        _typed(entry, "score", "rating", parse_float),
+        _typed(entry, "episodes", "Эпизоды", parse_int),
+        _typed(entry, "air_year_start", "Статус", extract_air_year),
+        max(parse_int(entry.get("Продолжения", 0)) or 0, 0),
+    )
+
+
+def _row(anime_id: int, title: str, entry: Dict[str, Any]) -> Tuple:
+    return (
+        anime_id,
+        title,
+        *title_keys(title),
+        *filter_fields(entry),
+        json.dumps(entry, ensure_ascii=False),
+    )
+
+
+def create_store(db_file: str, anime_dict: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Write the processed database into a new SQLite file (replacing it).
+
+    Rows keep the order of anime_dict, so loaded results keep the order
+    of anime_database.json.
+    """
+    path = Path(db_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            for anime_id, (title, entry) in enumerate(anime_dict.items(), start=1):
+                conn.execute("INSERT INTO anime VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                             _row(anime_id, title, entry))
+                for kind, (_, table, _) in TAG_KINDS.items():
+                    conn.executemany(f"INSERT INTO {table} VALUES (?, ?)",
+                                     [(token, anime_id) for token in _tokens(entry, kind)])
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    tmp_path.replace(path)
+
+
+# --- Filter compilation ---
+
+def _placeholders(values: Iterable) -> str:
+    return ", ".join("?" for _ in values)
+
+
+def watched_keys(watched_anime: Optional[List[str]]) -> Tuple[Set[str], Set[str], Set[str]]:
+    """
+    Normalized (full titles, Russian parts, English parts) such that an
+    anime is watched exactly when one of its title_keys is in the matching
+    set — the rules of 3_filter_basic.is_watched: full key, or Russian /
+    English part, case-insensitive exact match.
+    """
+    titles: Set[str] = set()
+    russian_parts: Set[str] = set()
+    english_parts: Set[str] = set()
+    for watched in watched_anime or []:
+        if not watched or not str(watched).strip():
+            continue
+        watched = str(watched).strip()
+        watched_norm = normalize_title(watched)
+        titles.add(watched_norm)
+        w_russian, w_english = split_title(watched)
+        if w_english:
+            russian_parts.add(normalize_title(w_russian))
+            english_parts.add(normalize_title(w_english))
+        else:
+            russian_parts.add(watched_norm)
+            english_parts.add(watched_norm)
+    return titles, russian_parts, english_parts
+
+
+def watched_condition(watched_anime: Optional[List[str]]) -> Optional[Condition]:
+    """SQL predicate "not watched" (see watched_keys)."""
+    titles, russian_parts, english_parts = watched_keys(watched_anime)
+    if not titles:
+        return None
+    sql = (
+        f"title_norm NOT IN ({_placeholders(titles)}) "
+        f"AND ru_norm NOT IN ({_placeholders(russian_parts)}) "
+        f"AND en_norm NOT IN ({_placeholders(english_parts)})"
+    )
+    return "watched", sql, [*titles, *russian_parts, *english_parts]
+
+
+class AnimeStore:
+    """
+    Read access to a store written by create_store.
+
+    Args:
+        db_file: path of the SQLite file.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(f"file:{Path(db_file).as_posix()}?mode=ro", uri=True)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM anime").fetchone()[0]
+
+    def vocabulary(self, kind: str) -> List[str]:
+        """Distinct genre or theme tokens."""
+        _, table, token_column = TAG_KINDS[kind]
+        return [row[0] for row in self.conn.execute(f"SELECT DISTINCT {token_column} FROM {table}")]
+
+    def tag_predicate(self, kind: str, values: List[str]) -> Tuple[str, List[Any]]:
+        """
+        Predicate "the entry matches any of the values" with the rule of
+        4_filter_romantic: every word of a value is one of the entry's
+        genre / theme tokens.
+
+        Single-word values are looked up together in the join table; each
+        multi-word value needs one lookup per word.
+        """
+        _, table, token_column = TAG_KINDS[kind]
+        lookup = f"id IN (SELECT anime_id FROM {table} WHERE {token_column} {{}})"
+        single: Set[str] = set()
+        parts: List[str] = []
+        params: List[Any] = []
+        for value in values:
+            words = value.split()
+            if not words:
+                parts.append("1")  # no words to miss
+            elif len(words) == 1:
+                single.add(words[0])
+            else:
+                parts.append("(" + " AND ".join(lookup.format("= ?") for _ in words) + ")")
+                params.extend(words)
+        if single:
+            parts.insert(0, lookup.format(f"IN ({_placeholders(single)})"))
+            params[:0] = sorted(single)
+        return ("(" + " OR ".join(parts) + ")" if parts else "0"), params
+
+    def select(self, conditions: List[Condition]) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """
+        Load the entries that satisfy every condition, and count for each
+        condition the entries it excluded first (in list order), like the
+        sequential checks of the Python filters.
+
+        Returns:
+            ({title: entry} in database order, {statistics key: count}).
+        """
+        # NULL fails a WHERE clause just like False, so the predicates stay
+        # plain and can use the column indexes
+        where = " AND ".join(f"({sql})" for _, sql, _ in conditions) or "1"
+        params = [param for _, _, condition_params in conditions for param in condition_params]
+        rows = self.conn.execute(f"SELECT title, data FROM anime WHERE {where} ORDER BY id", params)
+        filtered = {title: json.loads(data) for title, data in rows}
+
+        stats = {key: 0 for key, _, _ in conditions}
+        if conditions:
+            cases = " ".join(f"WHEN NOT COALESCE(({sql}), 0) THEN {i}"
+                             for i, (_, sql, _) in enumerate(conditions))
+            query = f"SELECT CASE {cases} END AS reason, count(*) FROM anime GROUP BY reason"
+            for reason, count in self.conn.execute(query, params):
+                if reason is not None:
+                    stats[conditions[reason][0]] += count
+        return filtered, stats
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Out-of-core description store for the processed anime database.
+
+Descriptions are most of anime_database.json, yet stages 1–2 never read
+them. 2_process_raw.py can write the database split in two (--descriptions):
+
+    metadata.json       {title: entry without "description"}, database order
+    descriptions.bin    UTF-8 descriptions back to back
+    index.json          {title: [byte offset, byte length]} into descriptions.bin
+
+main.py then loads only metadata.json for filtering and wraps the
+survivors in LazyDescriptions, which reads a description from the blob
+the first time its entry is accessed — so only entries that reach the AI
+stage or the final output are ever hydrated.
+"""
+
+import shutil
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import json_io
+
+METADATA_FILE = "metadata.json"
+BLOB_FILE = "descriptions.bin"
+INDEX_FILE = "index.json"
+
+
+def create_description_store(directory: str, anime_dict: Dict[str, Dict[str, Any]]) -> None:
+    """Write the split database of anime_dict into directory (replacing it)."""
+    path = Path(directory)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    index: Dict[str, List[int]] = {}
+    offset = 0
+    with open(tmp_path / BLOB_FILE, "wb") as blob, \
+            open(tmp_path / METADATA_FILE, "wb") as metadata:
+        metadata.write(b"{")
+        for title, entry in anime_dict.items():
+            data = entry.get("description", "").encode("utf-8")
+            blob.write(data)
+            index[title] = [offset, len(data)]
+            offset += len(data)
+            fields = {key: value for key, value in entry.items() if key != "description"}
+            metadata.write(b"," if len(index) > 1 else b"")
+            metadata.write(json_io.dumps(title) + b":" + json_io.dumps(fields, pretty=False))
+        metadata.write(b"}")
+    json_io.dump(index, tmp_path / INDEX_FILE, pretty=False)
+
+    if path.exists():
+        shutil.rmtree(path)
+    tmp_path.replace(path)
+
+
+class DescriptionStore:
+    """
+    Read access to a store written by create_description_store. The
+    index and the blob are only opened when the first description is read.
+
+    Args:
+        directory: store directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._index: Optional[Dict[str, List[int]]] = None
+        self._blob = None
+
+    def load_metadata(self) -> Dict[str, Dict[str, Any]]:
+        """{title: entry without "description"} in database order."""
+        return json_io.load(self.directory / METADATA_FILE)
+
+    def get(self, title: str) -> str:
+        """Description of title ("" if the store has none)."""
+        if self._index is None:
+            self._index = json_io.load(self.directory / INDEX_FILE)
+            self._blob = open(self.directory / BLOB_FILE, "rb")
+        location = self._index.get(title)
+        if location is None:
+            return ""
+        offset, length = location
+        self._blob.seek(offset)
+        return self._blob.read(length).decode("utf-8")
+
+    def close(self) -> None:
+        if self._blob is not None:
+            self._blob.close()
+            self._blob = None
+
+    def attach(self, entries: Dict[str, Dict[str, Any]]) -> "LazyDescriptions":
+        """Lazy view of entries (metadata, e.g. filter survivors) with descriptions."""
+        return LazyDescriptions(entries, self)
+
+
+class LazyDescriptions(Mapping):
+    """
+    Read-only mapping {title: entry} over metadata entries: an entry gets
+    its "description" from the store the first time it is accessed (the
+    entry dict is filled in place, so later changes to it are kept).
+    Iteration over the titles and len() never touch the store.
+
+    Args:
+        entries: {title: metadata entry}.
+        store: DescriptionStore holding the descriptions.
+    """
+
+    def __init__(self, entries: Dict[str, Dict[str, Any]], store: DescriptionStore):
+        self.entries = entries
+        self.store = store
+
+    def __getitem__(self, title: str) -> Dict[str, Any]:
+        entry = self.entries[title]
+        if "description" not in entry:
+            # The processed database keeps "description" as the first key
+            description = self.store.get(title)
+            fields = dict(entry)
+            entry.clear()
+            entry["description"] = description
+            entry.update(fields)
+        return entry
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Staged producer/consumer pipeline for 1_parse_anime_site.py (--pipeline).
+
+    fetch threads ──► bounded HTML queue ──► process pool (parse_html) ──► writer thread
+
+- I/O workers download pages (or read them from the HTML cache) and block
+  when the HTML queue is full, so the network never runs far ahead of parsing.
+- Parsing runs in a ProcessPoolExecutor on all cores; at most `parse_queue`
+  pages are being parsed or waiting to be written at any moment.
+- A single writer thread calls handle_result, so the journal needs no locking.
+  If handle_result (or storing a parse in the cache) raises, the stages
+  stop taking new pages and run_staged re-raises the error.
+
+Per-stage throughput and the time each stage spent blocked on backpressure
+are printed at the end.
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from shikimori_parser import DEFAULT_BACKEND, PARSER_VERSION, HttpFetcher, parse_html
+
+_DONE = object()
+
+
+class StageStats:
+    """Thread-safe counters of one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.blocked = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def done(self, count: int = 1) -> None:
+        with self._lock:
+            now = time.perf_counter()
+            if self.started is None:
+                self.started = now
+            self.finished = now
+            self.items += count
+
+    def wait(self, seconds: float) -> None:
+        with self._lock:
+            self.blocked += seconds
+
+    def report(self) -> str:
+        elapsed = (self.finished - self.started) if self.started is not None else 0.0
+        rate = self.items / elapsed if elapsed > 0 else 0.0
+        return (
+            f"{self.name:<6} {self.items:>7} pages   {rate:8.1f} pages/sec   "
+            f"blocked {self.blocked:7.1f} sec"
+        )
+
+
+def _timed_put(q: queue.Queue, item, stats: StageStats) -> None:
+    start = time.perf_counter()
+    q.put(item)
+    stats.wait(time.perf_counter() - start)
+
+
+def run_staged(
+    anime_urls: Iterable[Dict[str, str]],
+    handle_result: Callable[[int, Dict[str, str], Any, Exception], None],
+    fetcher: Optional[HttpFetcher] = None,
+    cache=None,
+    offline: bool = False,
+    backend: str = DEFAULT_BACKEND,
+    fetch_workers: int = 4,
+    parse_workers: Optional[int] = None,
+    fetch_queue: int = 64,
+    parse_queue: Optional[int] = None,
+) -> List[StageStats]:
+    """
+    Fetch, parse, and persist pages in three overlapping stages.
+
+    Args:
+        anime_urls: [{"url", "id"}, ...] to process; a generator (the
+            catalog crawl) is consumed by the fetch threads as they go.
+        handle_result: callback(idx, anime_info, anime_data, error),
+            always called from the single writer thread.
+        fetcher: HttpFetcher for downloads (unused offline).
+        cache: optional HtmlCache; offline mode reads pages only from it.
+        offline: take pages from the cache instead of the network.
+        backend: extraction backend of shikimori_parser.
+        fetch_workers: number of I/O threads.
+        parse_workers: parser processes (default: all cores).
+        fetch_queue: capacity of the fetched-HTML queue.
+        parse_queue: pages allowed in parsing or waiting for the writer
+            (default: 2 × parse_workers).
+
+    Returns:
+        Stage statistics: fetch, parse, write.
+
+    Raises:
+        Exception: The first error raised by anime_urls, by handle_result
+            or by storing a parse in the cache, once the stages have stopped.
+    """
+    parse_workers = parse_workers or os.cpu_count() or 1
+    parse_queue = parse_queue or 2 * parse_workers
+
+    fetch_stats = StageStats("fetch")
+    parse_stats = StageStats("parse")
+    write_stats = StageStats("write")
+
+    items = enumerate(anime_urls, start=1)
+    items_lock = threading.Lock()
+    html_queue: queue.Queue = queue.Queue(maxsize=fetch_queue)
+    result_queue: queue.Queue = queue.Queue()
+    in_flight = threading.BoundedSemaphore(parse_queue)
+    stop = threading.Event()
+    failures: List[BaseException] = []
+
+    def fail(error: BaseException) -> None:
+        if not failures:
+            failures.append(error)
+        stop.set()
+
+    def next_item():
+        # A generator cannot be advanced from two threads at once
+        with items_lock:
+            return next(items, None)
+
+    def fetch_worker():
+        while not stop.is_set():
+            try:
+                item = next_item()
+            except BaseException as e:  # catalog page that failed to load
+                fail(e)
+                break
+            if item is None:
+                break
+            idx, anime_info = item
+            url = anime_info.get("url")
+            try:
+                if offline:
+                    record = cache.lookup(url)
+                    if record is None:
+                        raise LookupError(f"Not in HTML cache: {url}")
+                    html = cache.read_html(record)
+                elif cache is not None:
+                    html, record = fetcher.fetch_cached(url, cache)
+                else:
+                    html, record = fetcher.fetch_html(url), None
+            except Exception as e:
+                _timed_put(html_queue, (idx, anime_info, None, None, e), fetch_stats)
+                continue
+            fetch_stats.done()
+            _timed_put(html_queue, (idx, anime_info, html, record, None), fetch_stats)
+
+    def writer():
+        while True:
+            item = result_queue.get()
+            if item is _DONE:
+                break
+            idx, anime_info, anime_data, error = item
+            try:
+                # After a failure the writer only drains the queue, so the
+                # main thread never blocks on in_flight
+                if not stop.is_set():
+                    handle_result(idx, anime_info, anime_data, error)
+                    if error is None:
+                        write_stats.done()
+            except BaseException as e:
+                fail(e)
+            finally:
+                in_flight.release()
+
+    def on_parsed(future, idx, anime_info, record):
+        # Runs in the pool's thread, which swallows exceptions: every path
+        # must put the result, or in_flight is never released
+        try:
+            anime_data, error = future.result(), None
+        except BaseException as e:  # parse error, broken or cancelled pool
+            anime_data, error = None, e
+        else:
+            parse_stats.done()
+            if cache is not None and record is not None:
+                try:
+                    cache.store_parsed(record, anime_data, PARSER_VERSION)
+                except Exception as e:
+                    fail(e)
+        result_queue.put((idx, anime_info, anime_data, error))
+
+    fetchers = [threading.Thread(target=fetch_worker, daemon=True) for _ in range(fetch_workers)]
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    for thread in fetchers:
+        thread.start()
+    writer_thread.start()
+
+    def fetchers_done():
+        for thread in fetchers:
+            thread.join()
+        html_queue.put(_DONE)
+
+    threading.Thread(target=fetchers_done, daemon=True).start()
+
+    # "spawn": forking a process that already runs I/O threads is unsafe
+    spawn = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=parse_workers, mp_context=spawn) as pool:
+        while True:
+            item = html_queue.get()
+            if item is _DONE:
+                break
+            if stop.is_set():
+                continue  # drain until the fetch threads have stopped
+            idx, anime_info, html, record, error = item
+
+            start = time.perf_counter()
+            in_flight.acquire()
+            parse_stats.wait(time.perf_counter() - start)
+
+            if error is not None:
+                result_queue.put((idx, anime_info, None, error))
+            elif not offline and record is not None and record.get("parser_version") == PARSER_VERSION:
+                # Unchanged page with a parse cached by the current parser
+                result_queue.put((idx, anime_info, record["parsed"], None))
+            else:
+                future = pool.submit(parse_html, html, anime_info.get("url"), backend)
+                future.add_done_callback(
+                    lambda f, i=idx, a=anime_info, r=record: on_parsed(f, i, a, r)
+                )
+
+    result_queue.put(_DONE)
+    writer_thread.join()
+    if failures:
+        raise failures[0]
+    return [fetch_stats, parse_stats, write_stats]
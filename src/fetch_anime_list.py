@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Collect the list of anime URLs from the shikimori.one catalog.
+
+Catalog pages (<catalog>/page/1, /page/2, ...) are downloaded concurrently
+through a shared HttpFetcher and rate limiter; entries are yielded in
+catalog order and deduplicated by anime ID (the catalog can shift while it
+is being crawled, so the same entry may appear on two pages). Crawling
+stops at --max-pages or at the first page without entries.
+
+Output is the {"anime": [{"id", "url"}, ...]} format read by
+1_parse_anime_site.py (which can also crawl the catalog itself with
+--from-catalog, without an intermediate file).
+
+Usage:
+    python fetch_anime_list.py -o anime_urls.json --max-pages 5
+
+    # Whole catalog, 4 pages in flight, adaptive rate starting at 1 request/sec
+    python fetch_anime_list.py -o anime_urls.json --concurrency 4 --rps 1
+
+    # A filtered catalog view
+    python fetch_anime_list.py -o tv_urls.json --catalog-url https://shikimori.one/animes/kind/tv
+"""
+
+import argparse
+import re
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from lxml import etree
+
+import json_io
+from rate_limiter import AdaptiveRateLimiter, make_rate_limiter
+from shikimori_parser import HttpFetcher
+
+CATALOG_URL = "https://shikimori.one/animes"
+
+# /animes/5680-k-on, /animes/z12345-title: optional letter prefix, numeric ID
+ANIME_HREF = re.compile(r"/animes/[a-z]*(\d+)(?:-[^/?#]*)?/?$")
+
+_CATALOG_ENTRIES = etree.XPath(
+    "//article[contains(concat(' ', normalize-space(@class), ' '), ' b-catalog_entry ')]"
+)
+_FIRST_LINK = etree.XPath("(.//a[@href])[1]/@href")
+
+
+def extract_catalog_entries(html: str, catalog_url: str = CATALOG_URL) -> List[Dict[str, str]]:
+    """
+    Extract anime entries from one catalog page.
+
+    Returns:
+        [{"id": str, "url": absolute URL without query}, ...] in page order.
+    """
+    tree = etree.HTML(html)
+    if tree is None:
+        return []
+
+    entries = []
+    for article in _CATALOG_ENTRIES(tree):
+        hrefs = _FIRST_LINK(article)
+        if not hrefs:
+            continue
+        parts = urlsplit(urljoin(catalog_url, hrefs[0]))
+        match = ANIME_HREF.search(parts.path)
+        if match:
+            url = urlunsplit((parts.scheme, parts.netloc, parts.path, "", ""))
+            entries.append({"id": match.group(1), "url": url})
+    return entries
+
+
+def fetch_catalog_page(fetcher: HttpFetcher, page: int, catalog_url: str = CATALOG_URL) -> List[Dict[str, str]]:
+    """Entries of one catalog page; a page past the end (404) has none."""
+    try:
+        resp = fetcher.get(f"{catalog_url.rstrip('/')}/page/{page}")
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return []
+        raise
+    return extract_catalog_entries(resp.text, catalog_url)
+
+
+def iter_catalog(
+    fetcher: HttpFetcher,
+    max_pages: Optional[int] = None,
+    concurrency: int = 4,
+    catalog_url: str = CATALOG_URL,
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield unique catalog entries in catalog order while the pages download.
+
+    Args:
+        fetcher: shared HttpFetcher (its rate limiter paces the crawl).
+        max_pages: stop after this many pages (None — whole catalog).
+        concurrency: catalog pages in flight.
+        catalog_url: catalog listing, optionally with filters in the path.
+
+    Yields:
+        {"id", "url"} dicts, each ID once.
+    """
+    seen_ids = set()
+    pending: Dict[int, Future] = {}
+    next_page = 1
+    last_page = max_pages or float("inf")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        try:
+            page = 1
+            while page <= last_page:
+                while len(pending) < concurrency and next_page <= last_page:
+                    pending[next_page] = pool.submit(fetch_catalog_page, fetcher, next_page, catalog_url)
+                    next_page += 1
+
+                entries = pending.pop(page).result()
+                if not entries:
+                    break
+                for entry in entries:
+                    if entry["id"] not in seen_ids:
+                        seen_ids.add(entry["id"])
+                        yield entry
+                page += 1
+        finally:
+            for future in pending.values():
+                future.cancel()
+
+
+def fetch_anime_list(
+    output_file: str,
+    max_pages: Optional[int] = None,
+    concurrency: int = 4,
+    rps: float = 0.5,
+    rate_control: Optional[Dict[str, float]] = None,
+    catalog_url: str = CATALOG_URL,
+) -> List[Dict[str, str]]:
+    """
+    Crawl the catalog and save the URL list.
+
+    Args:
+        output_file: JSON file for {"anime": [...], "metadata": {...}}.
+        max_pages: catalog pages to crawl (None — all).
+        concurrency: catalog pages in flight.
+        rps: starting (or, without rate_control, fixed) requests per second.
+        rate_control: {"min_rps", "max_rps"} of the adaptive rate, None — fixed.
+        catalog_url: catalog listing to crawl.
+
+    Returns:
+        The collected entries.
+    """
+    print("=" * 70)
+    print(f"Collecting anime URLs from {catalog_url}")
+    print("=" * 70)
+
+    fetcher = HttpFetcher(pool_size=concurrency, rate_limiter=make_rate_limiter(rps, rate_control))
+    start_time = time.time()
+
+    anime = []
+    for entry in iter_catalog(fetcher, max_pages, concurrency, catalog_url):
+        anime.append(entry)
+        if len(anime) % 100 == 0:
+            print(f"  {len(anime)} anime...")
+
+    json_io.dump({
+        "anime": anime,
+        "metadata": {
+            "count": len(anime),
+            "source": catalog_url,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+    }, output_file)
+
+    elapsed = time.time() - start_time
+    print(f"\n✓ {len(anime)} unique anime saved to {output_file}")
+    print(f"HTTP {fetcher.summary()}")
+    if isinstance(fetcher.rate_limiter, AdaptiveRateLimiter):
+        print(f"Adaptive {fetcher.rate_limiter.summary()}")
+    print(f"Elapsed time: {elapsed:.0f} sec")
+    print("=" * 70)
+    return anime
+
+
+def main():
+    """CLI entry point for the catalog crawler."""
+    ap = argparse.ArgumentParser(description="Collect anime URLs from the shikimori.one catalog")
+    ap.add_argument(
+        "-o", "--output",
+        default="anime_urls.json",
+        help="Output JSON file (default: anime_urls.json)"
+    )
+    ap.add_argument(
+        "--max-pages",
+        type=int,
+        default=None,
+        help="Catalog pages to crawl (default: all)"
+    )
+    ap.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Catalog pages in flight (default: 4)"
+    )
+    ap.add_argument(
+        "--rps",
+        type=float,
+        default=0.5,
+        help="Starting requests per second (default: 0.5)"
+    )
+    ap.add_argument(
+        "--min-rps",
+        type=float,
+        default=0.1,
+        help="Floor of the adaptive request rate (default: 0.1)"
+    )
+    ap.add_argument(
+        "--max-rps",
+        type=float,
+        default=4.0,
+        help="Ceiling of the adaptive request rate (default: 4.0)"
+    )
+    ap.add_argument(
+        "--fixed-rate",
+        action="store_true",
+        help="Keep the request rate at --rps instead of adapting it"
+    )
+    ap.add_argument(
+        "--catalog-url",
+        default=CATALOG_URL,
+        help=f"Catalog listing to crawl (default: {CATALOG_URL})"
+    )
+    args = ap.parse_args()
+
+    if args.concurrency < 1:
+        ap.error("--concurrency must be at least 1")
+    if args.rps <= 0:
+        ap.error("--rps must be positive")
+    if not 0 < args.min_rps <= args.max_rps:
+        ap.error("--min-rps must be positive and not above --max-rps")
+
+    fetch_anime_list(
+        output_file=args.output,
+        max_pages=args.max_pages,
+        concurrency=args.concurrency,
+        rps=args.rps,
+        rate_control=None if args.fixed_rate else {"min_rps": args.min_rps, "max_rps": args.max_rps},
+        catalog_url=args.catalog_url,
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n[INFO] Interrupted by user")
+        sys.exit(0)
+    except requests.RequestException as e:
+        sys.stderr.write(f"\n[ERROR] Catalog crawl failed: {e}\n")
+        sys.exit(1)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of downloaded anime pages.
+
+Layout:
+    <root>/blobs/<sha256 of HTML>.html.gz   — gzip-compressed page bodies,
+                                              stored once per unique content
+    <root>/index/<sha256 of URL>.json       — per-URL record: content hash,
+                                              ETag / Last-Modified validators,
+                                              fetch time and the cached parse
+
+The validators are sent back as If-None-Match / If-Modified-Since on the
+next crawl; a 304 answer means the stored body (and its parse) is reused.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_name, path)
+
+
+class HtmlCache:
+    """
+    Content-addressed HTML store keyed by URL.
+
+    Args:
+        root: cache directory (created on first write).
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.index_dir = self.root / "index"
+
+    def _index_path(self, url: str) -> Path:
+        return self.index_dir / f"{_sha256(url)}.json"
+
+    def _blob_path(self, content_hash: str) -> Path:
+        return self.blobs_dir / f"{content_hash}.html.gz"
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Index record for the URL, or None if the page was never cached."""
+        path = self._index_path(url)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def read_html(self, record: Dict[str, Any]) -> str:
+        """Decompress the page body referenced by an index record."""
+        with gzip.open(self._blob_path(record["content_hash"]), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def conditional_headers(self, record: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a revalidation request."""
+        headers: Dict[str, str] = {}
+        if record:
+            if record.get("etag"):
+                headers["If-None-Match"] = record["etag"]
+            if record.get("last_modified"):
+                headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        _write_atomic(self._index_path(record["url"]), data)
+
+    def store(
+        self,
+        url: str,
+        html: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Save a freshly downloaded page. The cached parse is kept only if
+        the body did not change.
+        """
+        content_hash = _sha256(html)
+        blob = self._blob_path(content_hash)
+        if not blob.exists():
+            self.blobs_dir.mkdir(parents=True, exist_ok=True)
+            _write_atomic(blob, gzip.compress(html.encode("utf-8")))
+
+        old = self.lookup(url) or {}
+        record = {
+            "url": url,
+            "content_hash": content_hash,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time(),
+        }
+        if old.get("content_hash") == content_hash and "parsed" in old:
+            record["parsed"] = old["parsed"]
+            record["parser_version"] = old.get("parser_version")
+        self._write_record(record)
+        return record
+
+    def touch(self, record: Dict[str, Any]) -> None:
+        """Mark a record as revalidated (304 Not Modified) right now."""
+        record["fetched_at"] = time.time()
+        self._write_record(record)
+
+    def store_parsed(self, record: Dict[str, Any], parsed: Dict[str, Any], parser_version: int) -> None:
+        """Attach the parse result of the cached body to its index record."""
+        record["parsed"] = parsed
+        record["parser_version"] = parser_version
+        self._write_record(record)
+
+    def urls(self) -> Iterator[str]:
+        """All URLs present in the cache."""
+        if not self.index_dir.exists():
+            return
+        for path in sorted(self.index_dir.glob("*.json")):
+            with open(path, "r", encoding="utf-8") as f:
+                yield json.load(f)["url"]
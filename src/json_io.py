@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON file I/O shared by the pipeline stages.
+
+Uses orjson when it is installed (several times faster on large
+databases) and the standard json module otherwise. Both write the same
+JSON for the data the pipeline stores, with one exception: non-finite
+floats (NaN, Infinity) come out as NaN / Infinity from json but as null
+from orjson, and only the json backend reads them back. Two layouts:
+
+- pretty (indent=2) for files people read: anime_database.json,
+  analytic.json, results;
+- compact (no whitespace) for internal artifacts: raw database, AI cache,
+  manifest, delta, metadata;
+- one compact object per line (dumps_line) for JSONL journals.
+
+Files are UTF-8 without escaping non-ASCII characters. dump writes to a
+uniquely named temporary file next to the target, flushes it to disk and
+only then renames it over the target, so neither an interrupted write nor
+a crash leaves a truncated file behind, and concurrent writers never
+share a temporary file.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Iterator, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+PathLike = Union[str, Path]
+
+# NamedTemporaryFile creates files readable by the owner only; dump gives
+# them the permissions a plain open() would. The umask is read on the first
+# dump, not at import
+_umask_lock = threading.Lock()
+_umask: Optional[int] = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data: Any, pretty: bool = True) -> bytes:
+    """UTF-8 JSON of data, indented by 2 spaces if pretty."""
+    if orjson is not None:
+        # Non-string keys become strings, as with json
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, option=option)
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _read_umask() -> int:
+    # Linux reports it without changing it; elsewhere os.umask is the only
+    # way, which sets it for the whole process until it is restored
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    umask = os.umask(0o077)
+    os.umask(umask)
+    return umask
+
+
+def _file_mode() -> int:
+    """Permissions of a new file created with open() under the process umask."""
+    global _umask
+    with _umask_lock:
+        if _umask is None:
+            _umask = _read_umask()
+        return 0o666 & ~_umask
+
+
+def dumps_line(data: Any) -> bytes:
+    """Compact UTF-8 JSON of data followed by a newline, for JSONL files."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(data, option=option)
+    return dumps(data, pretty=False) + b"\n"
+
+
+def load(path: PathLike) -> Any:
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+@contextmanager
+def atomic_file(path: PathLike, mode: str = "wb", **kwargs) -> Iterator[IO]:
+    """
+    Open a uniquely named temporary file next to path for writing (mode
+    and kwargs as for open()). On a clean exit it is flushed to disk and
+    renamed over path; on an exception it is removed and path is left
+    untouched.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    f = tempfile.NamedTemporaryFile(
+        mode, dir=path.parent, prefix=path.name + ".", suffix=".tmp", delete=False, **kwargs
+    )
+    try:
+        with f:
+            if hasattr(os, "fchmod"):
+                os.fchmod(f.fileno(), _file_mode())
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if not hasattr(os, "fchmod"):
+            os.chmod(f.name, _file_mode())
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+
+def dump(data: Any, path: PathLike, pretty: bool = True) -> None:
+    """Write data to path atomically (fsynced temporary file, then rename)."""
+    content = dumps(data, pretty)
+    with atomic_file(path) as f:
+        f.write(content)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Streaming reading and writing of large JSON objects.
+
+The raw database can be larger than the memory it is worth loading into
+with json.load. iter_anime reads its "anime" object one entry at a time
+(json.JSONDecoder.raw_decode over a buffer of CHUNK_SIZE characters), so
+only the current entry is decoded; ObjectWriter writes an object entry by
+entry in the same pretty layout as json_io.dump, and ObjectFile walks a
+written object again without loading it.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO, Tuple
+
+import json_io
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = " \t\n\r"
+NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+# Top-level keys of the {"metadata", "anime"} format of 1_parse_anime_site.py
+WRAPPER_KEYS = ("metadata", "anime")
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Pull parser for the structure around decoded JSON values."""
+
+    def __init__(self, f: TextIO):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character (not consumed)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON input")
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON input, found {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next complete value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Most likely a value cut by the buffer end
+                if self._fill():
+                    continue
+                raise
+            # A number at the buffer end ("12", "1.", "1e") may continue in the next chunk
+            if (not self.eof and isinstance(value, (int, float))
+                    and NUMBER_TAIL.match(self.buffer, end).end() == len(self.buffer) and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+    def keys(self) -> Iterator[str]:
+        """
+        Keys of the object at the current position. After each key the
+        caller must consume its value (value() or a nested keys()).
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected an object key in JSON input, found {key!r}")
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def iter_object(path: Path) -> Iterator[Tuple[str, Any]]:
+    """(key, value) pairs of the JSON object in path, one at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f)
+        for key in reader.keys():
+            yield key, reader.value()
+
+
+def iter_anime(path: Path) -> Iterator[Tuple[str, Any]]:
+    """
+    (title, raw entry) pairs of a raw database, one at a time.
+
+    Like data.get("anime", data) after json.load: entries of the "anime"
+    object when the file is in the {"metadata", "anime"} format (its first
+    key is one of WRAPPER_KEYS), otherwise the top-level object itself.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        reader = _Reader(f)
+        keys = reader.keys()
+        first = next(keys, None)
+        if first is None:
+            return
+        if first not in WRAPPER_KEYS:
+            yield first, reader.value()
+            for title in keys:
+                yield title, reader.value()
+            return
+        key = first
+        while key is not None:
+            if key == "anime" and reader.peek() == "{":
+                for title in reader.keys():
+                    yield title, reader.value()
+            else:
+                reader.value()
+            key = next(keys, None)
+
+
+class ObjectFile:
+    """
+    Read-only view of a JSON object file that streams its entries from
+    disk on every pass: len(), iteration over the keys, items() and
+    values() — enough for consumers that only walk a dict in order.
+
+    Args:
+        path: JSON file holding one object.
+        count: number of entries, if known (otherwise counted on first use).
+    """
+
+    def __init__(self, path: Path, count: Optional[int] = None):
+        self.path = Path(path)
+        self.count = count
+
+    def __len__(self) -> int:
+        if self.count is None:
+            self.count = sum(1 for _ in iter_object(self.path))
+        return self.count
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _ in iter_object(self.path))
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return iter_object(self.path)
+
+    def values(self) -> Iterator[Any]:
+        return (value for _, value in iter_object(self.path))
+
+
+class ObjectWriter:
+    """
+    Write a JSON object entry by entry, byte-for-byte as
+    json_io.dump(obj, path) would, and as atomically: the object goes to
+    a json_io.atomic_file that is fsynced and renamed over path on a clean
+    close.
+
+    Usage:
+        with ObjectWriter(path) as writer:
+            for key, value in items:
+                writer.write(key, value)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.count = 0
+        self._file = None
+        self.f = None
+
+    def __enter__(self) -> "ObjectWriter":
+        self._file = json_io.atomic_file(self.path, "w", encoding="utf-8")
+        self.f = self._file.__enter__()
+        self.f.write("{")
+        return self
+
+    def write(self, key: str, value: Any) -> None:
+        # JSON strings never hold a raw newline, so re-indenting is safe
+        encoded = json_io.dumps(value).decode("utf-8").replace("\n", "\n  ")
+        self.f.write(f"{',' if self.count else ''}\n  {json_io.dumps(key).decode('utf-8')}: {encoded}")
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.f.write("\n}" if self.count else "}")
+        self._file.__exit__(exc_type, exc, tb)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Request rate limiting for the shikimori.one crawlers.
+
+TokenBucket keeps the combined request rate of all worker threads under a
+requests-per-second ceiling while allowing a small burst. It is shared by all HttpFetcher workers, so retries count against
+the same budget as first attempts.
+
+AdaptiveRateLimiter wraps a TokenBucket in an AIMD controller: HttpFetcher
+reports the status and latency of every response, the rate grows
+additively while the server looks healthy and is cut multiplicatively on
+429/503, timeouts or rising latency.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+class TokenBucket:
+    """
+    Token-bucket limiter shared by all workers.
+
+    Args:
+        rate: tokens added per second (requests-per-second ceiling).
+        capacity: maximum burst size (default: 1 — no bursts).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else 1.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    def set_rate(self, rate: float) -> None:
+        """Change the rate; tokens earned so far are kept at the old rate."""
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def backlog(self) -> float:
+        """Seconds until every token reserved so far has been used."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, -self._tokens) / self.rate
+
+    def reserve(self) -> float:
+        """
+        Take one token and return how long the caller must wait before
+        using it (0.0 if a token is available right now).
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Block the current thread until a request is allowed."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD request-rate controller with the same acquire() as TokenBucket.
+
+    Every healthy response adds increase / rate requests/sec, i.e. the rate
+    grows by about `increase` per second of traffic. A 429/503 answer, a
+    timeout or a smoothed latency above latency_factor times the best
+    latency seen multiplies the rate by `decrease`. Responses to requests
+    sent before the last cut took effect do not cut again, so a burst of
+    429s costs a single cut.
+
+    Args:
+        rate: starting rate in requests per second.
+        min_rate: floor the rate is never cut below.
+        max_rate: ceiling the rate never grows above.
+        increase: additive step in requests/sec per second of traffic.
+        decrease: multiplicative factor applied on congestion.
+        latency_factor: smoothed latency over the baseline that counts
+            as congestion.
+        throttle_statuses: HTTP statuses that mean "slow down".
+        verbose: print every rate cut.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+        throttle_statuses: Iterable[int] = (429, 503),
+        verbose: bool = True,
+    ):
+        if not 0 < min_rate <= max_rate:
+            raise ValueError("rates must satisfy 0 < min_rate <= max_rate")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.throttle_statuses = frozenset(throttle_statuses)
+        self.verbose = verbose
+
+        self.rate = min(self.max_rate, max(self.min_rate, float(rate)))
+        self.peak_rate = self.rate
+        self.cuts = 0
+        self.bucket = TokenBucket(self.rate)
+
+        self._latency: Optional[float] = None  # EWMA of healthy responses
+        self._baseline: Optional[float] = None
+        self._samples = 0
+        self._last_cut = float("-inf")
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block the current thread until a request is allowed."""
+        self.bucket.acquire()
+
+    def _set_rate(self, rate: float) -> None:
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.peak_rate = max(self.peak_rate, self.rate)
+        self.bucket.set_rate(self.rate)
+
+    def _cut(self, reason: str, latency: float) -> None:
+        now = time.monotonic()
+        if now - latency < self._last_cut:
+            return  # sent before the last cut took effect
+        # Requests already waiting in the bucket still go out at the old rate
+        self._last_cut = now + self.bucket.backlog()
+        old = self.rate
+        self._set_rate(old * self.decrease)
+        self.cuts += 1
+        if self.verbose:
+            print(f"[RATE] {reason}: {old:.2f} -> {self.rate:.2f} requests/sec")
+
+    def record(self, status: Optional[int], latency: float) -> None:
+        """
+        Feed back one response.
+
+        Args:
+            status: HTTP status code, or None for a timeout / connection error.
+            latency: seconds from sending the request to the response.
+        """
+        with self._lock:
+            if status is None:
+                self._cut("timeout", latency)
+                return
+            if status in self.throttle_statuses:
+                self._cut(f"HTTP {status}", latency)
+                return
+            if status >= 500:
+                return
+
+            self._samples += 1
+            if self._latency is None:
+                self._latency = latency
+            else:
+                self._latency += 0.2 * (latency - self._latency)
+            if self._baseline is None or self._latency < self._baseline:
+                self._baseline = self._latency
+            else:
+                # Let the baseline follow a permanent shift slowly
+                self._baseline += 0.01 * (self._latency - self._baseline)
+
+            if self._samples >= 5 and self._latency > self.latency_factor * self._baseline:
+                self._cut(f"latency {self._latency:.2f}s (baseline {self._baseline:.2f}s)", latency)
+            else:
+                self._set_rate(self.rate + self.increase / self.rate)
+
+    def summary(self) -> str:
+        """One-line report of the rate the controller settled on."""
+        with self._lock:
+            return (
+                f"rate settled at {self.rate:.2f} requests/sec "
+                f"(peak {self.peak_rate:.2f}, {self.cuts} cuts, "
+                f"floor {self.min_rate:g}, ceiling {self.max_rate:g})"
+            )
+
+
+def make_rate_limiter(rps: float, rate_control: Optional[Dict[str, float]] = None):
+    """
+    Shared limiter for all workers: an AIMD controller starting at `rps`
+    within rate_control["min_rps"]..rate_control["max_rps"], or a fixed
+    TokenBucket(rps) when rate_control is None.
+    """
+    if rate_control is None:
+        return TokenBucket(rps)
+    return AdaptiveRateLimiter(rps, rate_control["min_rps"], rate_control["max_rps"])
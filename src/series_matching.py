@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fuzzy series matching for 2_process_raw.py (--fuzzy-series).
+
+Titles look like "Russian title / English title". The exact grouping of
+2_process_raw puts together titles with the same Russian base name, so a
+series whose seasons are spelled differently, or that appears under a
+transliterated Russian name, ends up as several "originals". This module
+merges such groups:
+
+- every group gets series keys: its Russian base name transliterated to
+  Latin ("Наруто" → "naruto") and the English halves of its titles, all
+  casefolded, without punctuation and without trailing season markers
+  ("2", "II", "Season 2", "2nd Season", "TV", ...);
+- groups with an identical key are merged directly;
+- similar keys (character trigram Jaccard similarity ≥ threshold) are
+  merged too. Keys are blocked by their words and word prefixes (the
+  first PREFIX_LENGTH letters, so one-word typos still meet); each key is
+  compared only with the keys in its BLOCKS_PER_KEY rarest blocks, and
+  blocks of more than MAX_BLOCK keys ("no", "the", ...) are never used,
+  so the work stays linear in the number of titles. Keys with different
+  numbers in them ("86" / "91 Days") never match fuzzily.
+
+Merges go through a union-find over the exact groups.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+DEFAULT_THRESHOLD = 0.75
+MIN_KEY_LENGTH = 4     # shorter keys ("k", "x") say too little to merge on
+FUZZY_MIN_LENGTH = 6   # shorter keys only merge on exact equality
+MAX_BLOCK = 50
+BLOCKS_PER_KEY = 2
+PREFIX_LENGTH = 4
+
+WORD = re.compile(r"\w+")
+NUMBER = re.compile(r"\d+")
+ORDINAL = re.compile(r"^\d+(?:st|nd|rd|th)$")
+SEASON_WORDS = frozenset({
+    "season", "part", "cour", "tv", "сезон", "часть", "тв",
+    "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x",
+})
+
+# Russian spelling of Japanese names back to Latin (Polivanov system)
+TRANSLITERATION = [
+    ("дзи", "ji"), ("дзю", "ju"), ("дзя", "ja"), ("дзё", "jo"), ("дз", "z"),
+    ("си", "shi"), ("ся", "sha"), ("сю", "shu"), ("сё", "sho"),
+    ("ти", "chi"), ("тя", "cha"), ("тю", "chu"), ("тё", "cho"),
+    ("цу", "tsu"), ("ва", "wa"),
+]
+LETTERS = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "",
+    "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+}
+SYLLABLE = re.compile("|".join(cyrillic for cyrillic, _ in TRANSLITERATION))
+SYLLABLES = dict(TRANSLITERATION)
+LETTER_TABLE = str.maketrans(LETTERS)
+
+
+def series_key(title: str) -> str:
+    """Casefolded words of a title half, without trailing season markers."""
+    words = WORD.findall(title.split(":", 1)[0].casefold())
+    end = len(words)
+    while end > 1 and (words[end - 1].isdigit() or words[end - 1] in SEASON_WORDS
+                       or ORDINAL.match(words[end - 1])):
+        end -= 1
+    return " ".join(words[:end])
+
+
+def transliterate(text: str) -> str:
+    """Latin spelling of a Russian-spelled (mostly Japanese) name."""
+    text = SYLLABLE.sub(lambda match: SYLLABLES[match.group(0)], text)
+    return text.translate(LETTER_TABLE)
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _blocking_tokens(key: str) -> Set[str]:
+    tokens = set()
+    for word in key.split():
+        if len(word) >= 3:
+            tokens.add(word)
+        if len(word) > PREFIX_LENGTH:
+            tokens.add(word[:PREFIX_LENGTH] + "*")
+    return tokens
+
+
+class UnionFind:
+    """Disjoint sets over 0..size-1 (union by size, path halving)."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first: int, second: int) -> bool:
+        """Merge the sets of first and second; False if already merged."""
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return False
+        if self.size[first] < self.size[second]:
+            first, second = second, first
+        self.parent[second] = first
+        self.size[first] += self.size[second]
+        return True
+
+
+def _group_keys(base: str, names: Iterable[str]) -> Set[str]:
+    keys = {transliterate(series_key(base))}
+    for name in names:
+        if " / " in name:
+            keys.add(series_key(name.split(" / ", 1)[1]))
+    return {key for key in keys if len(key) >= MIN_KEY_LENGTH}
+
+
+def merge_series_groups(
+    groups: Dict[str, List[str]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[List[str]]:
+    """
+    Merge exact base-name groups that belong to the same series.
+
+    Args:
+        groups: {base name: titles} as built by 2_process_raw.
+        threshold: minimum trigram Jaccard similarity of two series keys.
+
+    Returns:
+        Merged groups (lists of titles), in the order of their first group.
+    """
+    bases = list(groups)
+    sets = UnionFind(len(bases))
+
+    # Exact key matches: one hash join
+    owner: Dict[str, int] = {}
+    for group_id, base in enumerate(bases):
+        for key in _group_keys(base, groups[base]):
+            if key in owner:
+                sets.union(owner[key], group_id)
+            else:
+                owner[key] = group_id
+
+    # Similar keys: compare within the rarest blocks of each key
+    keys = [key for key in owner if len(key) >= FUZZY_MIN_LENGTH]
+    key_groups = [owner[key] for key in keys]
+    key_numbers = [NUMBER.findall(key) for key in keys]
+    key_tokens = [_blocking_tokens(key) for key in keys]
+    blocks: Dict[str, List[int]] = {}
+    for key_id, tokens in enumerate(key_tokens):
+        for token in tokens:
+            blocks.setdefault(token, []).append(key_id)
+
+    trigrams: List[Optional[Set[str]]] = [None] * len(keys)
+
+    for first, tokens in enumerate(key_tokens):
+        usable = [blocks[token] for token in tokens if 1 < len(blocks[token]) <= MAX_BLOCK]
+        usable.sort(key=len)
+        candidates = {second for block in usable[:BLOCKS_PER_KEY] for second in block if second > first}
+        if not candidates:
+            continue
+        root_a = sets.find(key_groups[first])
+        # Later keys only compare with keys after them: free this set
+        grams_a, trigrams[first] = trigrams[first] or _trigrams(keys[first]), None
+        size_a = len(grams_a)
+        for second in candidates:
+            if key_numbers[second] != key_numbers[first] or sets.find(key_groups[second]) == root_a:
+                continue
+            grams_b = trigrams[second]
+            if grams_b is None:
+                grams_b = trigrams[second] = _trigrams(keys[second])
+            size_b = len(grams_b)
+            # Jaccard ≤ min / max size: skip pairs of very different length
+            if min(size_a, size_b) < threshold * max(size_a, size_b):
+                continue
+            common = len(grams_a & grams_b)
+            if common >= threshold * (size_a + size_b - common):
+                sets.union(root_a, key_groups[second])
+                root_a = sets.find(root_a)
+
+    merged: Dict[int, List[str]] = {}
+    for group_id, base in enumerate(bases):
+        merged.setdefault(sets.find(group_id), []).extend(groups[base])
+    return list(merged.values())
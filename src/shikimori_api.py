@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shikimori GraphQL API ingestion (1_parse_anime_site.py --source api).
+
+Instead of downloading and parsing a full HTML page per anime, up to 50
+anime are requested per GraphQL call with only the fields the pipeline
+uses: kind, episodes, genres/themes, status and air dates, source, age
+rating, score and description.
+
+Every API record is normalized into the raw shape produced by the HTML
+parser, so 2_process_raw.py works on it unchanged:
+
+    {"Русское название / Name": {
+        "url": "...",
+        "info": {"Тип: TV Сериал": "", "Эпизоды: 12": "", "Жанры: Comedy Комедия": "", ...},
+        "rating": "7.81",
+        "description": "..."
+    }}
+
+The API endpoint is configurable (--api-url), e.g. to point the crawler at
+a local stub server that replays recorded responses.
+
+Usage:
+    python shikimori_api.py 5680 1535 -o sample.json
+"""
+
+import argparse
+import json
+import re
+import sys
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fetch_anime_list import ANIME_HREF
+from shikimori_parser import HttpFetcher, clean_text
+
+API_URL = "https://shikimori.one/api/graphql"
+
+# Largest page the API returns
+MAX_BATCH = 50
+
+ANIME_QUERY = """
+query($ids: String, $page: PositiveInt, $limit: PositiveInt) {
+  animes(ids: $ids, page: $page, limit: $limit, order: id) {
+    id name russian url kind score status
+    episodes episodesAired duration rating origin
+    airedOn { year month day }
+    releasedOn { year month day }
+    genres { name russian kind }
+    description
+  }
+}
+"""
+
+KIND_NAMES = {
+    "tv": "TV Сериал",
+    "movie": "Фильм",
+    "ova": "OVA",
+    "ona": "ONA",
+    "special": "Спецвыпуск",
+    "tv_special": "TV Спецвыпуск",
+    "music": "Клип",
+    "pv": "Проморолик",
+    "cm": "Реклама",
+}
+
+ORIGIN_NAMES = {
+    "original": "Оригинал",
+    "manga": "Манга",
+    "web_manga": "Веб-манга",
+    "four_koma_manga": "Енкома",
+    "light_novel": "Ранобэ",
+    "novel": "Новелла",
+    "web_novel": "Веб-новелла",
+    "visual_novel": "Визуальная новелла",
+    "game": "Игра",
+    "card_game": "Карточная игра",
+    "book": "Книга",
+    "picture_book": "Книга с картинками",
+    "radio": "Радио",
+    "music": "Музыка",
+    "other": "Другое",
+    "unknown": "Неизвестен",
+    "mixed_media": "Более одного",
+}
+
+AGE_RATING_NAMES = {
+    "g": "G",
+    "pg": "PG",
+    "pg_13": "PG-13",
+    "r": "R-17",
+    "r_plus": "R+",
+    "rx": "Rx",
+}
+
+# Abbreviated genitive month names as shown on the site
+MONTH_NAMES = [
+    "янв.", "февр.", "марта", "апр.", "мая", "июня",
+    "июля", "авг.", "сент.", "окт.", "нояб.", "дек.",
+]
+
+# [character=123]Name[/character], [i]...[/i], [spoiler=...] and similar markup
+BBCODE_TAG = re.compile(r"\[/?[a-z_]+(?:=[^\]]*)?\]")
+
+
+def _format_date(date: Optional[Dict[str, Optional[int]]]) -> Optional[str]:
+    """{"year", "month", "day"} → "14 февр. 1991 г." (as much as is known)."""
+    if not date or not date.get("year"):
+        return None
+    parts = []
+    if date.get("month"):
+        if date.get("day"):
+            parts.append(str(date["day"]))
+        parts.append(MONTH_NAMES[date["month"] - 1])
+    parts.append(f"{date['year']} г.")
+    return " ".join(parts)
+
+
+def _format_status(anime: Dict[str, Any]) -> Optional[str]:
+    """Status line in the site's wording: "на 2025 г.", "с ... по ...", "в 2008-2009 гг."."""
+    aired = anime.get("airedOn") or {}
+    released = anime.get("releasedOn") or {}
+    aired_text = _format_date(aired)
+    released_text = _format_date(released)
+    if not aired_text:
+        return released_text
+
+    status = anime.get("status")
+    if status == "anons":
+        return f"на {aired_text}"
+    if status == "ongoing" or not released_text:
+        return f"с {aired_text}"
+    if released_text == aired_text:
+        return aired_text
+    if not aired.get("month") and not released.get("month"):
+        return f"в {aired['year']}-{released['year']} гг."
+    return f"с {aired_text} по {released_text}"
+
+
+def _format_episodes(anime: Dict[str, Any]) -> Optional[str]:
+    total = anime.get("episodes") or 0
+    if anime.get("status") == "ongoing":
+        return f"{anime.get('episodesAired') or 0} / {total or '?'}"
+    return str(total) if total else None
+
+
+def _genre_line(genres: List[Dict[str, Any]], singular: str, plural: str) -> Optional[str]:
+    """"Жанры: Comedy Комедия Drama Драма" — English and Russian names, as on the page."""
+    if not genres:
+        return None
+    names = " ".join(
+        " ".join(dict.fromkeys(n for n in (g.get("name"), g.get("russian")) if n)) for g in genres
+    )
+    return f"{singular if len(genres) == 1 else plural}: {names}"
+
+
+def _clean_description(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return None
+    text = clean_text(BBCODE_TAG.sub("", text))
+    return text or None
+
+
+def normalize_anime(anime: Dict[str, Any], url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convert one API record into the raw {title: {"url", "info", "rating",
+    "description"}} shape of shikimori_parser.parse.
+
+    Args:
+        anime: record of the animes GraphQL query.
+        url: page URL to store (default: the URL from the API).
+    """
+    name = anime.get("name") or ""
+    russian = anime.get("russian") or ""
+    title = f"{russian} / {name}" if russian and name and russian != name else (russian or name)
+
+    genres = anime.get("genres") or []
+    lines = [
+        f"Тип: {KIND_NAMES[anime['kind']]}" if anime.get("kind") in KIND_NAMES else None,
+        f"Эпизоды: {_format_episodes(anime)}" if _format_episodes(anime) else None,
+        f"Длительность эпизода: {anime['duration']} мин." if anime.get("duration") else None,
+        f"Статус: {_format_status(anime)}" if _format_status(anime) else None,
+        _genre_line([g for g in genres if g.get("kind") != "theme"], "Жанр", "Жанры"),
+        _genre_line([g for g in genres if g.get("kind") == "theme"], "Тема", "Темы"),
+        f"Рейтинг: {AGE_RATING_NAMES[anime['rating']]}" if anime.get("rating") in AGE_RATING_NAMES else None,
+        f"Первоисточник: {ORIGIN_NAMES[anime['origin']]}" if anime.get("origin") in ORIGIN_NAMES else None,
+    ]
+
+    score = anime.get("score")
+    return {
+        title: {
+            "url": url or anime.get("url"),
+            "info": {line: "" for line in lines if line},
+            "rating": f"{score:.2f}" if score else None,
+            "description": _clean_description(anime.get("description")),
+        }
+    }
+
+
+def anime_id(anime_info: Dict[str, str]) -> Optional[str]:
+    """Numeric anime ID of a URL list entry ("id", or taken from the URL)."""
+    if anime_info.get("id") and str(anime_info["id"]).isdigit():
+        return str(anime_info["id"])
+    match = ANIME_HREF.search(anime_info.get("url") or "")
+    return match.group(1) if match else None
+
+
+def query_animes(
+    fetcher: HttpFetcher,
+    api_url: str = API_URL,
+    ids: Optional[List[str]] = None,
+    page: Optional[int] = None,
+    limit: int = MAX_BATCH,
+) -> List[Dict[str, Any]]:
+    """
+    One GraphQL call: the given IDs, or one page of the catalog ordered by ID.
+
+    Raises:
+        RuntimeError: If the API answers with GraphQL errors.
+    """
+    variables: Dict[str, Any] = {"limit": limit}
+    if ids:
+        variables["ids"] = ",".join(ids)
+    if page:
+        variables["page"] = page
+    answer = fetcher.post_json(api_url, {"query": ANIME_QUERY, "variables": variables})
+    if answer.get("errors"):
+        raise RuntimeError(f"GraphQL error: {answer['errors'][0].get('message', answer['errors'])}")
+    return answer["data"]["animes"]
+
+
+def iter_api_records(
+    anime_urls: Iterable[Dict[str, str]],
+    fetcher: HttpFetcher,
+    api_url: str = API_URL,
+    batch_size: int = MAX_BATCH,
+) -> Iterator[Tuple[Dict[str, str], Optional[Dict[str, Any]], Optional[Exception]]]:
+    """
+    Fetch the listed anime in batches; anime_urls may be a generator,
+    each batch is taken from it as soon as the previous one is done.
+
+    Yields:
+        (anime_info, raw anime data, None) per anime found, or
+        (anime_info, None, error) for anime the batch could not deliver.
+    """
+    items = iter(anime_urls)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            break
+        by_id: Dict[str, List[Dict[str, str]]] = {}
+        for anime_info in batch:
+            by_id.setdefault(anime_id(anime_info), []).append(anime_info)
+
+        no_id = by_id.pop(None, [])
+        for anime_info in no_id:
+            yield anime_info, None, ValueError(f"No anime ID in URL: {anime_info.get('url')}")
+        if not by_id:
+            continue
+
+        try:
+            records = query_animes(fetcher, api_url, ids=list(by_id), limit=batch_size)
+        except Exception as e:
+            for infos in by_id.values():
+                for anime_info in infos:
+                    yield anime_info, None, e
+            continue
+
+        for record in records:
+            for anime_info in by_id.pop(str(record.get("id")), []):
+                yield anime_info, normalize_anime(record, anime_info.get("url")), None
+        for infos in by_id.values():
+            for anime_info in infos:
+                yield anime_info, None, LookupError(f"Not found in API: {anime_info.get('url')}")
+
+
+def main():
+    """CLI entry point: fetch anime by ID through the API and output raw JSON."""
+    ap = argparse.ArgumentParser(description="Fetch anime from the Shikimori GraphQL API as raw JSON.")
+    ap.add_argument("ids", nargs="+", help="Anime IDs or page URLs")
+    ap.add_argument("-o", "--output", default=None, help="Path to save JSON file")
+    ap.add_argument("--api-url", default=API_URL, help=f"GraphQL endpoint (default: {API_URL})")
+    args = ap.parse_args()
+
+    anime_urls = [{"url": value} if not value.isdigit() else {"id": value} for value in args.ids]
+    data: Dict[str, Any] = {}
+    for anime_info, anime_data, error in iter_api_records(anime_urls, HttpFetcher(), args.api_url):
+        if error is not None:
+            sys.stderr.write(f"{error}\n")
+            continue
+        data.update(anime_data)
+
+    js = json.dumps(data, ensure_ascii=False, indent=2)
+    print(js)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(js)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,16 +12,33 @@ Extracts:
 - Info block (from div.c-about -> div.b-entry-info -> div.line-container)
 - Rating (meta[itemprop="ratingValue"], then visible score near "РЕЙТИНГ")
 - Description (from div.c-description > div.description-current OR div[itemprop="description"])
+
+Pages are downloaded through HttpFetcher: one keep-alive session with a
+connection pool, compressed transfer, and retries with exponential backoff
+for timeouts, 429 and 5xx responses. With an HtmlCache (html_cache.py) pages
+are revalidated with conditional GET and unchanged pages reuse their
+cached parse.
+
+Two extraction backends produce identical output: "bs4" (BeautifulSoup +
+CSS selectors, the reference) and "lxml" (precompiled XPath over a raw
+lxml tree, several times faster). Compare them with benchmarks/bench_parser.py.
 """
 
 import argparse
 import json
+import random
 import re
 import sys
-from typing import Dict, Any, Optional
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple
 
 import requests
 from bs4 import BeautifulSoup, Tag
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
 
 HEADERS = {
     "User-Agent": (
@@ -31,13 +48,191 @@ HEADERS = {
     "Accept-Language": "ru,en;q=0.9",
 }
 
+# Bump when the output of the extract_* functions changes:
+# parses cached by an older version are discarded and redone.
+PARSER_VERSION = 1
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class HttpFetcher:
+    """
+    Reusable HTTP client for shikimori.one pages.
+
+    Keeps connections alive in a pooled session, asks for gzip (and brotli,
+    when the brotli package is installed) compressed responses, and retries
+    timeouts, connection errors, 429 and 5xx responses with exponential
+    backoff and full jitter. Retry-After is honoured when the server sends it.
+    Safe to share between threads.
 
-def fetch_html(url: str) -> str:
+    Args:
+        max_retries: retries per URL after the first attempt.
+        backoff_base: first backoff step in seconds (doubles on each retry).
+        backoff_max: upper bound for a single wait, including Retry-After.
+        timeout: request timeout in seconds.
+        pool_size: connections kept alive per host.
+        rate_limiter: optional object with acquire(); called before every
+            attempt, so retries also count against the request rate.
+            If it also has record(status, latency), it is told the status
+            (None on timeouts and connection errors) and latency of every
+            attempt, so it can adapt the rate.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        timeout: float = 30,
+        pool_size: int = 10,
+        rate_limiter=None,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(HEADERS)
+        self.session.headers.update(make_headers(accept_encoding=True))
+
+        self.stats = {"requests": 0, "retries": 0, "not_modified": 0, "bytes": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retry_after(self, resp: requests.Response) -> Optional[float]:
+        value = resp.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(self.backoff_max, max(0.0, seconds))
+
+    def _feedback(self, status: Optional[int], latency: float) -> None:
+        record = getattr(self.rate_limiter, "record", None)
+        if record is not None:
+            record(status, latency)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET the URL, retrying transient failures (see request)."""
+        return self.request("GET", url, headers=headers)
+
+    def post_json(self, url: str, payload: Dict[str, Any]) -> Any:
+        """POST a JSON payload (e.g. a GraphQL query) and decode the JSON answer."""
+        return self.request("POST", url, json=payload).json()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request, retrying transient failures. Only for idempotent
+        requests: a retried POST is sent again as is.
+
+        Raises:
+            requests.HTTPError: On unsuccessful HTTP response (after retries).
+            requests.RequestException: On network errors (after retries).
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            self._count("requests")
+            start = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, headers=headers, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._feedback(None, time.perf_counter() - start)
+                if attempt >= self.max_retries:
+                    raise
+                wait = self._backoff(attempt)
+            else:
+                self._feedback(resp.status_code, time.perf_counter() - start)
+                self._count("bytes", resp.raw.tell() or len(resp.content))
+                if resp.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    resp.raise_for_status()
+                    return resp
+                wait = self._retry_after(resp)
+                if wait is None:
+                    wait = self._backoff(attempt)
+
+            attempt += 1
+            self._count("retries")
+            time.sleep(wait)
+
+    def fetch_html(self, url: str) -> str:
+        """Fetch HTML content from the given URL."""
+        return self.get(url).text
+
+    def fetch_cached(self, url: str, cache) -> Tuple[str, Dict[str, Any]]:
+        """
+        Fetch HTML through an HtmlCache using a conditional GET.
+
+        Returns:
+            (HTML string, cache index record). On 304 Not Modified the
+            body comes from the cache.
+        """
+        record = cache.lookup(url)
+        resp = self.get(url, headers=cache.conditional_headers(record))
+        if resp.status_code == 304 and record is not None:
+            self._count("not_modified")
+            cache.touch(record)
+            return cache.read_html(record), record
+
+        html = resp.text
+        record = cache.store(url, html, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return html, record
+
+    def summary(self) -> str:
+        """One-line counters report: requests, retries, bytes transferred."""
+        with self._lock:
+            stats = dict(self.stats)
+        return (
+            f"requests: {stats['requests']}, retries: {stats['retries']}, "
+            f"not modified: {stats['not_modified']}, "
+            f"transferred: {stats['bytes'] / 1024 / 1024:.1f} MB"
+        )
+
+
+_default_fetcher: Optional[HttpFetcher] = None
+
+
+def get_default_fetcher() -> HttpFetcher:
+    """Module-wide fetcher used when callers do not pass their own."""
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = HttpFetcher()
+    return _default_fetcher
+
+
+def fetch_html(url: str, fetcher: Optional[HttpFetcher] = None, cache=None) -> str:
     """
     Fetch HTML content from the given URL.
 
     Args:
         url: Link to an anime page on shikimori.one.
+        fetcher: HttpFetcher to use (default: shared module-wide fetcher).
+        cache: optional HtmlCache; the page is revalidated with a
+            conditional GET and served from disk when unchanged.
 
     Returns:
         HTML string.
@@ -46,9 +241,10 @@ def fetch_html(url: str) -> str:
         requests.HTTPError: On unsuccessful HTTP response.
         requests.RequestException: On network errors.
     """
-    resp = requests.get(url, headers=HEADERS, timeout=30)
-    resp.raise_for_status()
-    return resp.text
+    fetcher = fetcher or get_default_fetcher()
+    if cache is None:
+        return fetcher.fetch_html(url)
+    return fetcher.fetch_cached(url, cache)[0]
 
 
 def clean_text(s: str) -> str:
@@ -182,12 +378,192 @@ def extract_description(soup: BeautifulSoup) -> Optional[str]:
     return None
 
 
-def parse(url: str) -> Dict[str, Any]:
+# ---------------------------------------------------------------------------
+# lxml backend: XPath over a raw lxml tree, only the nodes that are needed.
+# Mirrors the BeautifulSoup extract_* functions above, including
+# get_text(" ", strip=True) semantics, so both backends give the same output.
+# ---------------------------------------------------------------------------
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_X_TITLE_H1 = etree.XPath("//header//h1")
+_X_TITLE_META = etree.XPath('//meta[@itemprop="name" or @itemprop="headline"]')
+_X_TITLE = etree.XPath("//title")
+_X_INFO_CONTAINERS = etree.XPath(
+    f"//div[{_has_class('c-about')}]//div[{_has_class('b-entry-info')}]"
+    f"//div[{_has_class('line-container')}]"
+)
+_X_INFO_CONTAINERS_FALLBACK = etree.XPath(
+    f"//div[{_has_class('b-entry-info')}]//div[{_has_class('line-container')}]"
+)
+_X_LINES = etree.XPath(f".//div[{_has_class('line')}]")
+_X_NAME = etree.XPath(f".//*[{_has_class('line')} or {_has_class('name')} or {_has_class('key')}]")
+_X_VALUE = etree.XPath(f".//*[{_has_class('value')} or {_has_class('val')}]")
+_X_RATING_META = etree.XPath('//meta[@itemprop="ratingValue"]')
+_X_ABOUT = etree.XPath(f"//div[{_has_class('c-about')}]")
+_X_DESCRIPTION = etree.XPath(
+    f"//div[{_has_class('c-description')}]//div[{_has_class('description-current')}]"
+)
+_X_DESCRIPTION_FALLBACK = etree.XPath('//*[@itemprop="description"]')
+
+# Strings inside these tags are not plain text for BeautifulSoup (Script,
+# Stylesheet, TemplateString, ruby annotations) and are skipped by get_text.
+_NON_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+
+def _iter_strings(el, skip: bool = False):
+    skip = skip or el.tag in _NON_TEXT_TAGS
+    if el.text and not skip:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from _iter_strings(child, skip)
+        if child.tail and not skip:
+            yield child.tail
+
+
+def _node_text(el) -> str:
+    """Equivalent of BeautifulSoup's tag.get_text(" ", strip=True)."""
+    return " ".join(part for part in (s.strip() for s in _iter_strings(el)) if part)
+
+
+def _first(xpath, node):
+    found = xpath(node)
+    return found[0] if found else None
+
+
+def _single_string(el) -> Optional[str]:
+    """Equivalent of BeautifulSoup's tag.string."""
+    children = ([el.text] if el.text else [])
+    for child in el:
+        children.append(child)
+        if child.tail:
+            children.append(child.tail)
+    if len(children) != 1:
+        return None
+    child = children[0]
+    if isinstance(child, str):
+        return child
+    if not isinstance(child.tag, str):
+        return child.text
+    return _single_string(child)
+
+
+def _lxml_title(root) -> Optional[str]:
+    h = _first(_X_TITLE_H1, root)
+    if h is not None:
+        return clean_text(_node_text(h)).strip(' "\'')
+
+    m = _first(_X_TITLE_META, root)
+    if m is not None and m.get("content"):
+        return clean_text(m.get("content"))
+
+    t = _first(_X_TITLE, root)
+    string = _single_string(t) if t is not None else None
+    if string:
+        return clean_text(string.split(" / ")[0])
+    return None
+
+
+def _lxml_info_block(root) -> Dict[str, str]:
+    info: Dict[str, str] = {}
+
+    containers = _X_INFO_CONTAINERS(root) or _X_INFO_CONTAINERS_FALLBACK(root)
+    for cont in containers:
+        lines = _X_LINES(cont)
+        if not lines:
+            name = _first(_X_NAME, cont)
+            value = _first(_X_VALUE, cont)
+            if name is not None and value is not None:
+                k = clean_text(_node_text(name).rstrip(":"))
+                v = clean_text(_node_text(value))
+                if k:
+                    info[k] = v
+            continue
+
+        key = clean_text(_node_text(lines[0]).rstrip(":"))
+        val = clean_text(" ".join([_node_text(ln) for ln in lines[1:]]))
+        if key:
+            info[key] = val
+    return info
+
+
+def _lxml_rating(root) -> Optional[str]:
+    m = _first(_X_RATING_META, root)
+    if m is not None and m.get("content"):
+        return clean_text(m.get("content"))
+
+    right = _first(_X_ABOUT, root)
+    text = _node_text(right if right is not None else root)
+
+    mnum = re.search(r"\b(\d{1,2}[.,]\d{1,2})\b", text)
+    if mnum:
+        return mnum.group(1).replace(",", ".")
+
+    return None
+
+
+def _lxml_description(root) -> Optional[str]:
+    for xpath in (_X_DESCRIPTION, _X_DESCRIPTION_FALLBACK):
+        node = _first(xpath, root)
+        if node is not None:
+            desc = clean_text(_node_text(node))
+            if desc:
+                return desc
+    return None
+
+
+def _extract_bs4(html: str) -> Tuple[str, Dict[str, str], Optional[str], Optional[str]]:
+    soup = BeautifulSoup(html, "lxml")
+    return (
+        extract_title(soup) or "Unknown Title",
+        extract_info_block(soup),
+        extract_rating(soup),
+        extract_description(soup),
+    )
+
+
+def _extract_lxml(html: str) -> Tuple[str, Dict[str, str], Optional[str], Optional[str]]:
+    try:
+        root = etree.HTML(html)
+    except ValueError:
+        # lxml refuses str input with an <?xml encoding=...?> declaration
+        root = etree.HTML(html.encode("utf-8"), etree.HTMLParser(encoding="utf-8"))
+    if root is None:
+        return "Unknown Title", {}, None, None
+    return (
+        _lxml_title(root) or "Unknown Title",
+        _lxml_info_block(root),
+        _lxml_rating(root),
+        _lxml_description(root),
+    )
+
+
+# Extraction backends: name -> function(html) -> (title, info, rating, description).
+# "bs4" is the reference implementation; "lxml" is a faster equivalent.
+BACKENDS = {
+    "bs4": _extract_bs4,
+    "lxml": _extract_lxml,
+}
+DEFAULT_BACKEND = "bs4"
+
+
+def parse(
+    url: str,
+    fetcher: Optional[HttpFetcher] = None,
+    cache=None,
+    backend: str = DEFAULT_BACKEND,
+) -> Dict[str, Any]:
     """
     Parse an anime page and return structured data.
 
     Args:
         url: Link to the anime page.
+        fetcher: HttpFetcher to use (default: shared module-wide fetcher).
+        cache: optional HtmlCache; unchanged pages reuse the cached parse.
+        backend: extraction backend, a key of BACKENDS.
 
     Returns:
         Dictionary in the format:
@@ -200,13 +576,48 @@ def parse(url: str) -> Dict[str, Any]:
           }
         }
     """
-    html = fetch_html(url)
-    soup = BeautifulSoup(html, "lxml")
+    if cache is None:
+        return parse_html(fetch_html(url, fetcher), url, backend)
+
+    html, record = (fetcher or get_default_fetcher()).fetch_cached(url, cache)
+    if record.get("parser_version") == PARSER_VERSION:
+        return record["parsed"]
+    payload = parse_html(html, url, backend)
+    cache.store_parsed(record, payload, PARSER_VERSION)
+    return payload
 
-    title = extract_title(soup) or "Unknown Title"
-    info = extract_info_block(soup)
-    rating = extract_rating(soup)
-    description = extract_description(soup)
+
+def parse_offline(url: str, cache, backend: str = DEFAULT_BACKEND) -> Dict[str, Any]:
+    """
+    Re-parse a page from the HtmlCache without any network access.
+
+    Always runs the current extract_* functions, so the database can be
+    rebuilt after changing the extraction logic.
+
+    Raises:
+        LookupError: The page is not in the cache.
+    """
+    record = cache.lookup(url)
+    if record is None:
+        raise LookupError(f"Not in HTML cache: {url}")
+    payload = parse_html(cache.read_html(record), url, backend)
+    cache.store_parsed(record, payload, PARSER_VERSION)
+    return payload
+
+
+def parse_html(html: str, url: str, backend: str = DEFAULT_BACKEND) -> Dict[str, Any]:
+    """
+    Parse already downloaded page HTML.
+
+    Args:
+        html: HTML string of the anime page.
+        url: Link the HTML was fetched from.
+        backend: extraction backend, a key of BACKENDS.
+
+    Returns:
+        Dictionary in the same format as parse().
+    """
+    title, info, rating, description = BACKENDS[backend](html)
 
     payload: Dict[str, Any] = {
         title: {
@@ -227,15 +638,18 @@ def main():
         url (positional): URL of anime page on shikimori.one
         -o / --output: path to save result to file
         --ensure-ascii: escape non-ASCII characters in JSON
+        --parser: HTML extraction backend (bs4 or lxml)
     """
     ap = argparse.ArgumentParser(description="Parse a Shikimori anime page into JSON.")
     ap.add_argument("url", help="URL of the anime page on shikimori.one")
     ap.add_argument("-o", "--output", help="Path to save JSON file", default=None)
     ap.add_argument("--ensure-ascii", action="store_true",
                     help="Escape non-ASCII in JSON (default: keep UTF-8)")
+    ap.add_argument("--parser", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                    help=f"HTML extraction backend (default: {DEFAULT_BACKEND})")
     args = ap.parse_args()
 
-    data = parse(args.url)
+    data = parse(args.url, backend=args.parser)
 
     js = json.dumps(data, ensure_ascii=args.ensure_ascii, indent=2)
     print(js)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inverted genre / theme index of the processed database as bitsets.
+
+Every entry gets a position (database order); for every genre and theme
+token the index keeps the set of positions of the entries that have it,
+as a Python int with bit i set for position i. A Genre_FILTER value
+matches the entries that have all of its words, so it is the AND of its
+tokens' bitsets, and a list of values is the OR of theirs; required and
+excluded lists then become AND / AND NOT of whole bitsets instead of a
+loop over the entries.
+"""
+
+from typing import Any, Dict, Iterable, List
+
+from analyze_raw import split_tokens
+
+TAG_KINDS = ("genres", "themes")
+
+
+def entry_tokens(info: Dict[str, Any], kind: str) -> List[str]:
+    """
+    Genre ('genres') or theme ('themes') tokens of a processed entry: the
+    list 2_process_raw stores, or the Жанры / Темы text split for databases
+    written before the lists existed.
+    """
+    if kind in info:
+        return info[kind]
+    return split_tokens(info.get('Жанры' if kind == 'genres' else 'Темы', ''))
+
+
+def popcount(bits: int) -> int:
+    """Number of entries in a bitset."""
+    return bin(bits).count("1")
+
+
+def _bitset(positions: List[int], size: int) -> int:
+    # One pass over a byte buffer; OR-ing 1 << i into a growing int would
+    # copy the whole int for every position
+    data = bytearray((size + 7) // 8)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+
+class TagIndex:
+    """
+    {token: bitset} for genres and themes of a database.
+
+    Args:
+        anime_dict: {title: processed entry}; positions follow its order.
+    """
+
+    def __init__(self, anime_dict: Dict[str, Dict[str, Any]]):
+        self.titles: List[str] = list(anime_dict)
+        self.positions: Dict[str, int] = {title: i for i, title in enumerate(self.titles)}
+        self.all = (1 << len(self.titles)) - 1
+
+        postings: Dict[str, Dict[str, List[int]]] = {kind: {} for kind in TAG_KINDS}
+        for position, info in enumerate(anime_dict.values()):
+            for kind in TAG_KINDS:
+                kind_postings = postings[kind]
+                for token in set(entry_tokens(info, kind)):
+                    kind_postings.setdefault(token, []).append(position)
+        self.bits: Dict[str, Dict[str, int]] = {
+            kind: {token: _bitset(positions, len(self.titles)) for token, positions in kind_postings.items()}
+            for kind, kind_postings in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def covers(self, titles: Iterable[str]) -> bool:
+        """True if every title has a position in the index."""
+        return all(title in self.positions for title in titles)
+
+    def mask(self, titles: Iterable[str]) -> int:
+        """Bitset of titles (all of them must be in the index)."""
+        return _bitset([self.positions[title] for title in titles], len(self.titles))
+
+    def token(self, kind: str, token: str) -> int:
+        """Entries with the genre / theme token (0 if no entry has it)."""
+        return self.bits[kind].get(token, 0)
+
+    def value(self, kind: str, value: str) -> int:
+        """Entries that have every word of a Genre_FILTER value."""
+        bits = self.all
+        for token in split_tokens(value):
+            bits &= self.token(kind, token)
+        return bits
+
+    def any_of(self, kind: str, values: Iterable[str]) -> int:
+        """Entries matching at least one of the values."""
+        bits = 0
+        for value in values:
+            bits |= self.value(kind, value)
+        return bits
+
+    def select(self, bits: int) -> List[str]:
+        """Titles of a bitset, in index order."""
+        titles = []
+        data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        for byte_index, byte in enumerate(data):
+            if byte:
+                base = byte_index << 3
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        titles.append(self.titles[base + bit])
+        return titles
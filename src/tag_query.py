@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Boolean genre / theme queries for stage 2 (Genre_FILTER["query"]).
+
+Syntax (operators in capitals, by priority NOT > AND > OR, parentheses
+for grouping):
+
+    (Романтика AND Драма) OR (Романтика AND NOT Школа)
+    genre:Романтика AND NOT theme:"Школа" AND NOT Sci-Fi Фантастика
+
+A tag is one or more words (or a "quoted" value): like a Genre_FILTER
+list value, it matches an entry that has every word among its tokens.
+A genre: / theme: prefix (or жанр: / тема:) restricts the tag to the
+genres or the themes; without one it matches either.
+
+compile_query parses a query once into an AST (cached by text). Over a
+tag_index.TagIndex the AST is evaluated as bitset operations: the
+children of an AND run from the most selective (fewest entries) and each
+only over the entries still left, those of an OR from the least
+selective and only over the entries not matched yet, and both stop as
+soon as the result can no longer change. The same AST also matches a
+single entry (filter plan) and compiles to SQL (anime_store).
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from analyze_raw import split_tokens
+from tag_index import TAG_KINDS, TagIndex, popcount
+
+KEYWORDS = ("AND", "OR", "NOT")
+PREFIXES = {"genre": ("genres",), "жанр": ("genres",), "theme": ("themes",), "тема": ("themes",)}
+
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+_PREFIXED = re.compile(r"^(\w+):(.*)$")
+
+
+class Tag:
+    """Entries having every word of value among their tokens of one of kinds."""
+
+    def __init__(self, kinds: Tuple[str, ...], value: str):
+        self.kinds = kinds
+        self.value = value
+        self.tokens = split_tokens(value)
+
+    def __str__(self) -> str:
+        value = f'"{self.value}"' if not self.tokens or len(self.tokens) > 1 else self.value
+        if self.kinds == TAG_KINDS:
+            return value
+        return f"{'genre' if self.kinds == ('genres',) else 'theme'}:{value}"
+
+    def bits(self, index: TagIndex) -> int:
+        bits = 0
+        for kind in self.kinds:
+            bits |= index.value(kind, self.value)
+        return bits
+
+    def matches(self, tokens: Dict[str, Sequence[str]]) -> bool:
+        return any(all(token in tokens[kind] for token in self.tokens) for kind in self.kinds)
+
+
+class Not:
+    def __init__(self, child):
+        self.child = child
+
+    def __str__(self) -> str:
+        return f"NOT {_grouped(self.child)}"
+
+    def matches(self, tokens: Dict[str, Sequence[str]]) -> bool:
+        return not self.child.matches(tokens)
+
+
+class And:
+    def __init__(self, children: List):
+        self.children = children
+
+    def __str__(self) -> str:
+        return " AND ".join(_grouped(child) for child in self.children)
+
+    def matches(self, tokens: Dict[str, Sequence[str]]) -> bool:
+        return all(child.matches(tokens) for child in self.children)
+
+
+class Or:
+    def __init__(self, children: List):
+        self.children = children
+
+    def __str__(self) -> str:
+        return " OR ".join(_grouped(child) for child in self.children)
+
+    def matches(self, tokens: Dict[str, Sequence[str]]) -> bool:
+        return any(child.matches(tokens) for child in self.children)
+
+
+def _grouped(node) -> str:
+    # Compound operands in parentheses, even where precedence makes them optional
+    return f"({node})" if isinstance(node, (And, Or)) else str(node)
+
+
+def _tokenize(text: str) -> List[Tuple[str, str, int]]:
+    """(kind, text, position): kind is "(", ")", "keyword", "quoted" or "word"."""
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise ValueError(f"Invalid genre query {text!r}: unmatched quote at position {pos}")
+        start = match.start(match.lastindex)
+        opening, closing, quoted, word = match.groups()
+        if opening:
+            tokens.append(("(", opening, start))
+        elif closing:
+            tokens.append((")", closing, start))
+        elif quoted is not None:
+            tokens.append(("quoted", quoted, start))
+        elif word in KEYWORDS:
+            tokens.append(("keyword", word, start))
+        else:
+            tokens.append(("word", word, start))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over the tokens of one query."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def error(self, expected: str):
+        if self.pos < len(self.tokens):
+            _, found, position = self.tokens[self.pos]
+            where = f"found {found!r} at position {position}"
+        else:
+            where = "found the end of the query"
+        return ValueError(f"Invalid genre query {self.text!r}: expected {expected}, {where}")
+
+    def peek(self) -> Tuple[Optional[str], Optional[str]]:
+        if self.pos < len(self.tokens):
+            kind, value, _ = self.tokens[self.pos]
+            return kind, value
+        return None, None
+
+    def parse(self):
+        node = self.parse_or()
+        if self.pos < len(self.tokens):
+            raise self.error("AND, OR or the end of the query")
+        return node
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == ("keyword", "OR"):
+            self.pos += 1
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while self.peek() == ("keyword", "AND"):
+            self.pos += 1
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not(self):
+        if self.peek() == ("keyword", "NOT"):
+            self.pos += 1
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.peek()
+        if kind == "(":
+            self.pos += 1
+            node = self.parse_or()
+            if self.peek()[0] != ")":
+                raise self.error("')'")
+            self.pos += 1
+            return node
+        if kind in ("word", "quoted"):
+            return self.parse_tag()
+        raise self.error("a genre / theme, NOT or '('")
+
+    def parse_tag(self):
+        kinds = TAG_KINDS
+        kind, value = self.peek()
+        if kind == "word" and self._is_prefixed(value):
+            prefixed = _PREFIXED.match(value)
+            kinds = PREFIXES[prefixed.group(1).lower()]
+            if prefixed.group(2):
+                self.tokens[self.pos] = ("word", prefixed.group(2), self.tokens[self.pos][2])
+            else:
+                self.pos += 1
+                kind, value = self.peek()
+                if kind not in ("word", "quoted"):
+                    raise self.error(f"a value after {prefixed.group(1)}:")
+        if self.peek()[0] == "quoted":
+            value = self.peek()[1]
+            self.pos += 1
+            return Tag(kinds, value)
+        # Consecutive words form one multi-word value, e.g. Sci-Fi Фантастика
+        words = []
+        while self.peek()[0] == "word" and not (words and self._is_prefixed(self.peek()[1])):
+            words.append(self.peek()[1])
+            self.pos += 1
+        return Tag(kinds, " ".join(words))
+
+    @staticmethod
+    def _is_prefixed(word: str) -> bool:
+        prefixed = _PREFIXED.match(word)
+        return bool(prefixed) and prefixed.group(1).lower() in PREFIXES
+
+
+def _simplify(node):
+    """Flatten nested AND / OR and drop double negations."""
+    if isinstance(node, Not):
+        child = _simplify(node.child)
+        return child.child if isinstance(child, Not) else Not(child)
+    if isinstance(node, (And, Or)):
+        children = []
+        for child in map(_simplify, node.children):
+            children.extend(child.children if type(child) is type(node) else [child])
+        return type(node)(children)
+    return node
+
+
+class TagQuery:
+    """
+    A compiled query.
+
+    Args:
+        text: query text (see the module docstring).
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.root = _simplify(_Parser(text).parse())
+
+    def __str__(self) -> str:
+        return str(self.root)
+
+    def tags(self) -> Iterator[Tag]:
+        """All tags of the query."""
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Tag):
+                yield node
+            elif isinstance(node, Not):
+                stack.append(node.child)
+            else:
+                stack.extend(reversed(node.children))
+
+    # --- Bitset evaluation ---
+
+    def evaluate(self, index: TagIndex, candidates: Optional[int] = None) -> int:
+        """Bitset of the candidates (default: all entries of index) matching the query."""
+        if candidates is None:
+            candidates = index.all
+        sizes: Dict[int, int] = {}
+        self._estimate(self.root, index, sizes)
+        return self._evaluate(self.root, index, candidates, sizes)
+
+    def _estimate(self, node, index: TagIndex, sizes: Dict[int, int]) -> int:
+        """Estimated number of matching entries, stored in sizes by node id."""
+        if isinstance(node, Tag):
+            size = popcount(node.bits(index))
+        elif isinstance(node, Not):
+            size = len(index) - self._estimate(node.child, index, sizes)
+        elif isinstance(node, And):
+            size = min(self._estimate(child, index, sizes) for child in node.children)
+        else:
+            size = min(len(index), sum(self._estimate(child, index, sizes) for child in node.children))
+        sizes[id(node)] = size
+        return size
+
+    def _evaluate(self, node, index: TagIndex, candidates: int, sizes: Dict[int, int]) -> int:
+        if isinstance(node, Tag):
+            return candidates & node.bits(index)
+        if isinstance(node, Not):
+            return candidates & ~self._evaluate(node.child, index, candidates, sizes)
+        if isinstance(node, And):
+            # Most selective first; later children only see what is left
+            for child in sorted(node.children, key=lambda child: sizes[id(child)]):
+                candidates = self._evaluate(child, index, candidates, sizes)
+                if not candidates:
+                    break
+            return candidates
+        # Or: widest first; later children only see what is not matched yet
+        matched = 0
+        for child in sorted(node.children, key=lambda child: -sizes[id(child)]):
+            found = self._evaluate(child, index, candidates, sizes)
+            matched |= found
+            candidates &= ~found
+            if not candidates:
+                break
+        return matched
+
+    # --- Single entry / SQL ---
+
+    def matches(self, genres: Sequence[str], themes: Sequence[str]) -> bool:
+        """True if an entry with these genre and theme tokens matches."""
+        return self.root.matches({"genres": genres, "themes": themes})
+
+    def to_sql(self, store) -> Tuple[str, List]:
+        """The query as a predicate over an anime_store.AnimeStore (tag_predicate per tag)."""
+        return self._sql(self.root, store)
+
+    def _sql(self, node, store) -> Tuple[str, List]:
+        if isinstance(node, Tag):
+            parts = [store.tag_predicate(kind, [node.value]) for kind in node.kinds]
+            sql = " OR ".join(part for part, _ in parts)
+            return f"({sql})", [param for _, params in parts for param in params]
+        if isinstance(node, Not):
+            sql, params = self._sql(node.child, store)
+            return f"(NOT {sql})", params
+        operator = " AND " if isinstance(node, And) else " OR "
+        parts = [self._sql(child, store) for child in node.children]
+        return "(" + operator.join(sql for sql, _ in parts) + ")", [p for _, params in parts for p in params]
+
+
+@lru_cache(maxsize=128)
+def compile_query(text: str) -> TagQuery:
+    """Parse text once; later calls with the same text reuse the AST."""
+    return TagQuery(text)
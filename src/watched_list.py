@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watched list: hash index for stage 1 and import of a shikimori list export.
+
+WatchedIndex normalizes and splits the watched titles once, so checking a
+database title is three set lookups instead of a loop over the whole
+list. load_watched_list reads the list export of a shikimori profile
+(Profile → List → Export: JSON or XML, optionally gzipped) and returns its
+anime titles as "Russian / English" strings that WatchedIndex (and the
+SQL / column filters) match by either half.
+"""
+
+import codecs
+import gzip
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import json_io
+from anime_store import watched_keys
+
+# Every status except "planned": the anime was started at least
+WATCHED_STATUSES = ("completed", "watching", "rewatching", "on_hold", "dropped")
+
+# my_status of the MyAnimeList-compatible XML export → shikimori status
+XML_STATUSES = {
+    "watching": "watching",
+    "completed": "completed",
+    "on-hold": "on_hold",
+    "dropped": "dropped",
+    "plan to watch": "planned",
+}
+
+
+class WatchedIndex:
+    """
+    Normalized watched titles as sets — the rules of
+    3_filter_basic.is_watched: an anime is watched if its full key, or its
+    Russian / English part, matches a watched title (case-insensitive).
+
+    Args:
+        watched_anime: watched titles ("Russian / English", or one part).
+    """
+
+    def __init__(self, watched_anime: Optional[Iterable[str]]):
+        self.titles, self.russian_parts, self.english_parts = watched_keys(list(watched_anime or []))
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __contains__(self, anime_name: str) -> bool:
+        # title_keys with one casefold: casefold maps characters one by
+        # one and never produces " / ", so the halves split the same way
+        name = anime_name.casefold()
+        if name.strip() in self.titles:
+            return True
+        russian, separator, english = name.partition(" / ")
+        if russian.strip() in self.russian_parts:
+            return True
+        # Without a separator the English part is "", which no watched title has
+        return bool(separator) and english.strip() in self.english_parts
+
+
+def _read_bytes(path: Path) -> bytes:
+    if path.suffix == ".gz":
+        with gzip.open(path, "rb") as f:
+            data = f.read()
+    else:
+        data = path.read_bytes()
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    return data
+
+
+def _export_title(russian: Optional[str], english: Optional[str]) -> Optional[str]:
+    russian = (russian or "").strip()
+    english = (english or "").strip()
+    if russian and english:
+        return f"{russian} / {english}"
+    return russian or english or None
+
+
+def _titles_from_json(entries: list, statuses: set) -> List[str]:
+    titles = []
+    for entry in entries:
+        if entry.get("target_type", "Anime") != "Anime" or entry.get("status") not in statuses:
+            continue
+        title = _export_title(entry.get("target_title_ru"), entry.get("target_title"))
+        if title:
+            titles.append(title)
+    return titles
+
+
+def _titles_from_xml(root: ET.Element, statuses: set) -> List[str]:
+    titles = []
+    for anime in root.iter("anime"):
+        status = anime.findtext("shiki_status")
+        if not status:
+            status = XML_STATUSES.get((anime.findtext("my_status") or "").strip().lower())
+        if status not in statuses:
+            continue
+        title = _export_title(anime.findtext("series_title_ru"), anime.findtext("series_title"))
+        if title:
+            titles.append(title)
+    return titles
+
+
+def load_watched_list(path: str, statuses: Iterable[str] = WATCHED_STATUSES) -> List[str]:
+    """
+    Anime titles of a shikimori list export with one of statuses.
+
+    Args:
+        path: export file — JSON (a list of {"target_title", "target_title_ru",
+            "status", ...}) or XML (MyAnimeList format with series_title /
+            shiki_status); ".gz" files are decompressed.
+        statuses: shikimori statuses that count as watched.
+
+    Returns:
+        Titles as "Russian / English" (or the one name the export has).
+    """
+    path = Path(path)
+    data = _read_bytes(path)
+    statuses = set(statuses)
+    if data.lstrip()[:1] == b"<":
+        return _titles_from_xml(ET.fromstring(data), statuses)
+    entries = json_io.loads(data)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a JSON list of the shikimori list export")
+    return _titles_from_json(entries, statuses)
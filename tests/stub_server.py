@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local stub HTTP server for the crawler tests.
+
+StubServer runs http.server in a background thread on a free port of
+127.0.0.1. Every request is answered by the `respond` callable the test
+passes in; the server records the method, path and body of each request
+so the test can check what the crawler sent.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+# (method, path, body) -> (status, headers, body[, delay in seconds])
+Responder = Callable[[str, str, bytes], Tuple]
+
+
+class StubServer:
+    """
+    Context manager serving `respond` on http://127.0.0.1:<port>.
+
+    Args:
+        respond: answers one request, see Responder.
+    """
+
+    def __init__(self, respond: Responder):
+        self.respond = respond
+        self.requests: List[Tuple[str, str, bytes]] = []
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _answer(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with stub._lock:
+                    stub.requests.append((self.command, self.path, body))
+                status, headers, payload, *delay = stub.respond(self.command, self.path, body)
+                if delay:
+                    time.sleep(delay[0])
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _answer
+            do_POST = _answer
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self._thread.join()
+
+
+def scripted(responses: List[Tuple], default: Tuple = (200, {}, b"ok")) -> Responder:
+    """Responder answering with responses in order, then always with default."""
+    queue = list(responses)
+    lock = threading.Lock()
+
+    def respond(method: str, path: str, body: bytes) -> Tuple:
+        with lock:
+            return queue.pop(0) if queue else default
+
+    return respond
+
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Error propagation out of the run_staged writer thread.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from etl_pipeline import run_staged  # noqa: E402
+from shikimori_parser import PARSER_VERSION  # noqa: E402
+
+
+class CachedFetcher:
+    """Every page is unchanged and already parsed, so nothing reaches the pool."""
+
+    def __init__(self):
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+    def fetch_cached(self, url, cache):
+        with self._lock:
+            self.fetched += 1
+        return "<html></html>", {"parser_version": PARSER_VERSION, "parsed": {url: {}}}
+
+
+def run_with_timeout(target, timeout: float = 30):
+    """Run target in a thread; fail instead of hanging the test run."""
+    outcome = {}
+
+    def call():
+        try:
+            outcome["result"] = target()
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=call, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        raise AssertionError("run_staged did not return")
+    return outcome
+
+
+class WriterFailureTest(unittest.TestCase):
+    def test_handle_result_error_is_raised_in_the_caller(self):
+        anime_urls = [{"url": f"https://shikimori.one/animes/{i}"} for i in range(200)]
+        fetcher = CachedFetcher()
+        handled = []
+
+        def handle_result(idx, anime_info, anime_data, error):
+            if idx == 3:
+                raise OSError("disk full")
+            handled.append(idx)
+
+        outcome = run_with_timeout(lambda: run_staged(
+            anime_urls, handle_result, fetcher=fetcher, cache=object(),
+            fetch_workers=2, parse_workers=1, fetch_queue=2, parse_queue=2,
+        ))
+
+        self.assertIsInstance(outcome.get("error"), OSError)
+        self.assertEqual(str(outcome["error"]), "disk full")
+        self.assertNotIn(3, handled)
+        # The stages stop soon after the failure instead of fetching everything
+        self.assertLess(fetcher.fetched, len(anime_urls))
+
+    def test_without_errors_every_page_is_written(self):
+        anime_urls = [{"url": f"https://shikimori.one/animes/{i}"} for i in range(50)]
+        handled = []
+        outcome = run_with_timeout(lambda: run_staged(
+            anime_urls, lambda idx, *_: handled.append(idx), fetcher=CachedFetcher(), cache=object(),
+            fetch_workers=2, parse_workers=1, fetch_queue=2, parse_queue=2,
+        ))
+
+        self.assertNotIn("error", outcome)
+        self.assertEqual(sorted(handled), list(range(1, 51)))
+        self.assertEqual(outcome["result"][2].items, 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
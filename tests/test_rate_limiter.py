@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AdaptiveRateLimiter driven by HttpFetcher against a local stub server.
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import contextlib
+import io
+import sys
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from rate_limiter import AdaptiveRateLimiter  # noqa: E402
+from shikimori_parser import HttpFetcher  # noqa: E402
+from stub_server import StubServer, scripted  # noqa: E402
+
+OK = (200, {}, b"ok")
+
+
+def throttled(status: int, retry_after: str = "0", delay: float = 0.0):
+    return (status, {"Retry-After": retry_after}, b"slow down", delay)
+
+
+def make_fetcher(limiter: AdaptiveRateLimiter) -> HttpFetcher:
+    return HttpFetcher(max_retries=4, backoff_base=0.01, backoff_max=5.0, timeout=5, rate_limiter=limiter)
+
+
+class RateCutTest(unittest.TestCase):
+    def test_429_cuts_rate_and_honours_retry_after(self):
+        limiter = AdaptiveRateLimiter(10, min_rate=1, max_rate=20, verbose=False)
+        fetcher = make_fetcher(limiter)
+        with StubServer(scripted([throttled(429, retry_after="1")])) as server:
+            start = time.monotonic()
+            self.assertEqual(fetcher.fetch_html(server.url + "/animes/1"), "ok")
+            elapsed = time.monotonic() - start
+
+        self.assertGreaterEqual(elapsed, 0.9)
+        self.assertEqual(fetcher.stats["retries"], 1)
+        self.assertEqual(limiter.cuts, 1)
+        # Cut to 5, then one healthy response adds increase / rate
+        self.assertAlmostEqual(limiter.rate, 5 + 0.1 / 5)
+
+    def test_retry_after_http_date(self):
+        limiter = AdaptiveRateLimiter(10, min_rate=1, max_rate=20, verbose=False)
+        fetcher = make_fetcher(limiter)
+        retry_at = formatdate(time.time() + 2, usegmt=True)
+        with StubServer(scripted([throttled(503, retry_after=retry_at)])) as server:
+            start = time.monotonic()
+            fetcher.fetch_html(server.url + "/animes/1")
+            elapsed = time.monotonic() - start
+
+        # The date has a one-second resolution: the wait is between 1 and 2 s
+        self.assertGreaterEqual(elapsed, 0.9)
+        self.assertLess(elapsed, 4)
+        self.assertEqual(limiter.cuts, 1)
+
+    def test_each_503_after_a_cut_cuts_again_down_to_the_floor(self):
+        limiter = AdaptiveRateLimiter(10, min_rate=2, max_rate=20, verbose=False)
+        fetcher = make_fetcher(limiter)
+        with StubServer(scripted([throttled(503)] * 3)) as server:
+            fetcher.fetch_html(server.url + "/animes/1")
+
+        self.assertEqual(fetcher.stats["retries"], 3)
+        self.assertEqual(limiter.cuts, 3)
+        # 10 -> 5 -> 2.5 -> 2 (floor), then one healthy response
+        self.assertAlmostEqual(limiter.rate, 2 + 0.1 / 2)
+
+    def test_burst_of_429_sent_before_the_cut_costs_one_cut(self):
+        limiter = AdaptiveRateLimiter(100, min_rate=1, max_rate=200, verbose=False)
+        fetcher = make_fetcher(limiter)
+        responses = [throttled(429, delay=0.3)] * 4
+        with StubServer(scripted(responses)) as server:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                pages = list(pool.map(fetcher.fetch_html, [f"{server.url}/animes/{i}" for i in range(4)]))
+
+        self.assertEqual(pages, ["ok"] * 4)
+        self.assertEqual(fetcher.stats["retries"], 4)
+        self.assertEqual(limiter.cuts, 1)
+
+    def test_rising_latency_cuts_rate(self):
+        limiter = AdaptiveRateLimiter(50, min_rate=1, max_rate=100, verbose=True)
+        fetcher = make_fetcher(limiter)
+        output = io.StringIO()
+        with StubServer(scripted([OK] * 8, default=OK + (0.3,))) as server:
+            with contextlib.redirect_stdout(output):
+                for i in range(10):
+                    fetcher.fetch_html(f"{server.url}/animes/{i}")
+
+        self.assertGreaterEqual(limiter.cuts, 1)
+        self.assertLess(limiter.rate, 50)
+        self.assertIn("[RATE] latency", output.getvalue())
+
+
+class RecoveryTest(unittest.TestCase):
+    def test_rate_grows_additively_up_to_the_ceiling(self):
+        limiter = AdaptiveRateLimiter(
+            20, min_rate=1, max_rate=25, increase=20, latency_factor=1e9, verbose=False
+        )
+        fetcher = make_fetcher(limiter)
+        rates = []
+        with StubServer(scripted([throttled(503)])) as server:
+            for i in range(30):
+                fetcher.fetch_html(f"{server.url}/animes/{i}")
+                rates.append(limiter.rate)
+
+        self.assertEqual(limiter.cuts, 1)
+        # Cut 20 -> 10, then every healthy response adds increase / rate
+        self.assertAlmostEqual(rates[0], 10 + 20 / 10)
+        self.assertAlmostEqual(rates[1], rates[0] + 20 / rates[0])
+        self.assertEqual(rates, sorted(rates))
+        self.assertEqual(rates[-1], 25)
+        self.assertEqual(limiter.peak_rate, 25)
+        self.assertIn("rate settled at 25.00 requests/sec", limiter.summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GraphQL ingestion backend against a local stub server that replays a
+recorded API response (tests/data/graphql_animes.json).
+
+Run from the repository root:
+    python -m pytest -q tests
+"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from shikimori_api import ANIME_QUERY, iter_api_records, normalize_anime  # noqa: E402
+from shikimori_parser import HttpFetcher  # noqa: E402
+from stub_server import StubServer  # noqa: E402
+
+RECORDED = json.loads((Path(__file__).resolve().parent / "data/graphql_animes.json").read_text(encoding="utf-8"))
+RECORDS = {record["id"]: record for record in RECORDED["data"]["animes"]}
+
+
+def replay(method, path, body):
+    """Answer an animes(ids: ...) query with the recorded records of those IDs."""
+    variables = json.loads(body)["variables"]
+    ids = variables["ids"].split(",")
+    animes = sorted((RECORDS[i] for i in ids if i in RECORDS), key=lambda record: int(record["id"]))
+    payload = json.dumps({"data": {"animes": animes[:variables["limit"]]}}).encode("utf-8")
+    return 200, {"Content-Type": "application/json"}, payload
+
+
+def anime_url(anime_id: str, slug: str) -> dict:
+    return {"url": f"https://shikimori.one/animes/z{anime_id}-{slug}"}
+
+
+class NormalizeAnimeTest(unittest.TestCase):
+    def test_released_series(self):
+        raw = normalize_anime(RECORDS["1535"])
+        self.assertEqual(raw, {
+            "Тетрадь смерти / Death Note": {
+                "url": "https://shikimori.one/animes/1535-death-note",
+                "info": {
+                    "Тип: TV Сериал": "",
+                    "Эпизоды: 37": "",
+                    "Длительность эпизода: 23 мин.": "",
+                    "Статус: с 4 окт. 2006 г. по 27 июня 2007 г.": "",
+                    "Жанры: Mystery Детектив Supernatural Сверхъестественное Shounen Сёнэн": "",
+                    "Тема: Psychological Психологическое": "",
+                    "Рейтинг: R-17": "",
+                    "Первоисточник: Манга": "",
+                },
+                "rating": "8.62",
+                "description": "Ягами Лайт находит тетрадь, которую обронил Рюк.",
+            }
+        })
+
+    def test_ongoing_series(self):
+        info = normalize_anime(RECORDS["21"])["Ван-Пис / One Piece"]
+        self.assertIn("Эпизоды: 1100 / ?", info["info"])
+        self.assertIn("Статус: с 20 окт. 1999 г.", info["info"])
+        self.assertNotIn("Темы", " ".join(info["info"]))
+        self.assertEqual(info["description"], "Гол Д. Роджер был известен как Король пиратов.")
+
+    def test_no_description(self):
+        info = normalize_anime(RECORDS["5680"], url="https://shikimori.one/animes/5680")["Кэйон! / K-On!"]
+        self.assertEqual(info["url"], "https://shikimori.one/animes/5680")
+        self.assertIn("Темы: Music Музыка School Школа", info["info"])
+        self.assertIn("Первоисточник: Енкома", info["info"])
+        self.assertIsNone(info["description"])
+
+
+class IterApiRecordsTest(unittest.TestCase):
+    def test_batches_and_records(self):
+        anime_urls = [
+            anime_url("5680", "k-on"),
+            anime_url("1535", "death-note"),
+            {"url": "https://shikimori.one/characters/80-light-yagami"},
+            anime_url("21", "one-piece"),
+            anime_url("99999", "missing"),
+        ]
+        with StubServer(replay) as server:
+            fetcher = HttpFetcher(max_retries=0, timeout=5)
+            results = list(iter_api_records(anime_urls, fetcher, server.url + "/api/graphql", batch_size=2))
+
+        # Two IDs per call; the URL without an ID never reaches the API
+        posts = [json.loads(body) for _, _, body in server.requests]
+        self.assertEqual([method for method, _, _ in server.requests], ["POST"] * 3)
+        self.assertEqual({path for _, path, _ in server.requests}, {"/api/graphql"})
+        self.assertEqual([post["variables"]["ids"] for post in posts], ["5680,1535", "21", "99999"])
+        self.assertTrue(all(post["query"] == ANIME_QUERY and post["variables"]["limit"] == 2 for post in posts))
+
+        by_url = {anime_info["url"]: (raw, error) for anime_info, raw, error in results}
+        self.assertEqual(len(results), len(anime_urls))
+        for anime_id, slug in (("5680", "k-on"), ("1535", "death-note"), ("21", "one-piece")):
+            raw, error = by_url[anime_url(anime_id, slug)["url"]]
+            self.assertIsNone(error)
+            self.assertEqual(raw, normalize_anime(RECORDS[anime_id], anime_url(anime_id, slug)["url"]))
+        self.assertIsInstance(by_url["https://shikimori.one/characters/80-light-yagami"][1], ValueError)
+        self.assertIsInstance(by_url[anime_url("99999", "missing")["url"]][1], LookupError)
+
+    def test_graphql_error_fails_the_whole_batch(self):
+        def respond(method, path, body):
+            payload = json.dumps({"errors": [{"message": "ids: invalid"}], "data": None}).encode("utf-8")
+            return 200, {"Content-Type": "application/json"}, payload
+
+        with StubServer(respond) as server:
+            fetcher = HttpFetcher(max_retries=0, timeout=5)
+            results = list(iter_api_records(
+                [anime_url("5680", "k-on"), anime_url("1535", "death-note")], fetcher, server.url, batch_size=50
+            ))
+
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual([raw for _, raw, _ in results], [None, None])
+        for _, _, error in results:
+            self.assertIsInstance(error, RuntimeError)
+            self.assertIn("ids: invalid", str(error))
+
+
+if __name__ == "__main__":
+    unittest.main()